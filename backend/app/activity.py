@@ -0,0 +1,39 @@
+import base64
+from datetime import datetime
+from typing import Optional, Tuple
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+from app.models.activity import Activity
+
+
+def record_activity(db: Session, owner_id: str, entity_type: str, entity_id: str, action: str, title: str,
+                    ts: Optional[datetime] = None):
+    """Add an activity row to the session; it is committed together with the change it describes"""
+    db.add(Activity(
+        owner_id=owner_id,
+        entity_type=entity_type,
+        entity_id=entity_id,
+        action=action,
+        title=title,
+        ts=ts or datetime.utcnow()
+    ))
+
+
+def encode_cursor(activity: Activity) -> str:
+    raw = f"{activity.ts.isoformat()}|{activity.id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Raises ValueError for malformed cursors"""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    ts, activity_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+    return datetime.fromisoformat(ts), int(activity_id)
+
+
+def latest_activities(db: Session, owner_id: str, limit: int, cursor: Optional[str] = None):
+    """Newest-first page of activities, read as one range over (owner_id, ts, id)"""
+    query = db.query(Activity).filter(Activity.owner_id == owner_id)
+    if cursor:
+        query = query.filter(tuple_(Activity.ts, Activity.id) < decode_cursor(cursor))
+    return query.order_by(Activity.ts.desc(), Activity.id.desc()).limit(limit).all()
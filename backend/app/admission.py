@@ -0,0 +1,157 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from app.auth import token_subject
+from app.metrics import register_metrics
+
+# Tokens charged per request by route class; analytics runs a dozen aggregates
+ROUTE_CLASS_COST = {"analytics": 5.0, "list": 1.0, "read": 1.0, "write": 1.0}
+
+# Idle buckets are dropped beyond this many users; a dropped bucket is a full one
+MAX_BUCKETS = 10_000
+
+
+def route_class(method: str, path: str) -> str:
+    # Bootstrap computes the full analytics summary among its sections
+    if path.startswith(("/api/analytics", "/api/bootstrap")):
+        return "analytics"
+    if method in ("GET", "HEAD"):
+        # /api/<collection> is a list page, anything deeper a detail read
+        return "list" if path.rstrip("/").count("/") == 2 else "read"
+    return "write"
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, capacity: float, now: float):
+        self.tokens = capacity
+        self.updated = now
+
+
+class AdmissionController:
+    """Per-user token buckets, per-route-class concurrency limits and a global in-flight cap.
+
+    Everything runs on the event loop, so no locking is needed. Requests
+    over their rate get 429 straight away; when the server or a route class
+    is saturated the request waits at most `queue_timeout` for a slot and
+    is then shed with 503, so queues (and tail latency) stay bounded.
+    """
+
+    def __init__(self, rate: float, burst: float, max_in_flight: int,
+                 class_limits: Dict[str, int], queue_timeout: float):
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.class_limits = class_limits
+        self.queue_timeout = queue_timeout
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._semaphores = {name: asyncio.Semaphore(limit) for name, limit in class_limits.items()}
+        self.in_flight = 0
+        self.class_in_flight = {name: 0 for name in class_limits}
+        self.counters = {"admitted": 0, "rate_limited": 0, "shed_global": 0, "shed_class": 0}
+        self.peak_in_flight = 0
+
+    def take(self, key: str, cost: float) -> float:
+        """Charge `cost` tokens to `key`; returns 0 when admitted, else seconds until it would be"""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.burst, now)
+            while len(self._buckets) > MAX_BUCKETS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+            bucket.updated = now
+        if bucket.tokens >= cost:
+            bucket.tokens -= cost
+            return 0.0
+        return (cost - bucket.tokens) / self.rate
+
+    async def acquire(self, name: str) -> bool:
+        if self.in_flight >= self.max_in_flight:
+            self.counters["shed_global"] += 1
+            return False
+        semaphore = self._semaphores[name]
+        if semaphore.locked():
+            try:
+                await asyncio.wait_for(semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.counters["shed_class"] += 1
+                return False
+        else:
+            await semaphore.acquire()
+        self.in_flight += 1
+        self.class_in_flight[name] += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        self.counters["admitted"] += 1
+        return True
+
+    def release(self, name: str):
+        self.in_flight -= 1
+        self.class_in_flight[name] -= 1
+        self._semaphores[name].release()
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "max_in_flight": self.max_in_flight,
+            "classes": {
+                name: {"in_flight": self.class_in_flight[name], "limit": limit}
+                for name, limit in self.class_limits.items()
+            },
+            "tracked_users": len(self._buckets),
+        }
+
+
+def _reject(status_code: int, detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        {"detail": detail},
+        status_code=status_code,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, rate: float = 20.0, burst: float = 60.0, max_in_flight: int = 64,
+                 class_limits: Optional[Dict[str, int]] = None, queue_timeout: float = 0.25,
+                 exempt_paths: str = ""):
+        self.app = app
+        self.controller = AdmissionController(
+            rate, burst, max_in_flight,
+            class_limits or {"analytics": 4, "list": 16, "read": 32, "write": 8},
+            queue_timeout
+        )
+        self.exempt_paths = tuple(filter(None, (p.strip() for p in exempt_paths.split(","))))
+        register_metrics("admission", self.controller.stats)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith("/api/") \
+                or scope["path"].startswith(self.exempt_paths) or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+        # Decoded once here; get_db and get_current_user reuse it from request.state
+        key = token_subject(request) or f"ip:{request.client.host if request.client else 'unknown'}"
+        name = route_class(scope["method"], scope["path"])
+
+        wait = self.controller.take(key, ROUTE_CLASS_COST[name])
+        if wait:
+            self.controller.counters["rate_limited"] += 1
+            await _reject(429, "Too many requests", wait)(scope, receive, send)
+            return
+        if not await self.controller.acquire(name):
+            await _reject(503, "Server busy, retry shortly", 1)(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(name)
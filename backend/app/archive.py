@@ -0,0 +1,256 @@
+"""Hot/cold archival of closed deals and completed tasks.
+
+Usage:
+    python -m app.archive [--days N] [--batch-size N]
+
+With ARCHIVE_AFTER_DAYS set, deals in a closed stage and completed tasks
+whose close (or completion) date is older than that move from deals/tasks
+into deals_archive/tasks_archive, which have the same columns. The move
+runs as an "archive" job queued at startup (or from this command, e.g. from
+cron) in batches of ARCHIVE_BATCH_SIZE rows, one short transaction each,
+so the hot tables and their indexes only hold open work and the recent
+past.
+
+Reads union in the archive only when it can change the answer:
+
+- list pages are read from the hot table first; the archive is probed for
+  the first row of the same filter and order, and the page is re-read over
+  both tables only when that row would land on it;
+- facet counts and totals add the archive's own rollups, and only for
+  owners and filters the archive summaries say it has rows for;
+- fetching by id falls back to the archive; archived rows are read-only;
+- analytics add archive_summaries, per-month counts and deal values that
+  triggers keep as rows arrive, instead of scanning archived rows.
+
+The cutoff is never less than MIN_ARCHIVE_AGE_DAYS, so the analytics
+windows of the last few weeks always come from the hot tables alone.
+"""
+import argparse
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import and_, delete, func, insert, literal_column, select, union_all, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, aliased
+from app.activity import record_activity
+from app.config import get_settings
+from app.models.archive import ArchiveSummary, deals_archive, tasks_archive
+from app.models.deal import Deal
+from app.models.task import Task
+
+ARCHIVED_STAGES = ("closed_won", "closed_lost")
+MIN_ARCHIVE_AGE_DAYS = 60
+
+
+def _combined(model, archive, name: str):
+    columns = [column.name for column in model.__table__.columns]
+    both = union_all(
+        select(*[model.__table__.c[column] for column in columns]),
+        select(*[archive.c[column] for column in columns])
+    ).subquery(name)
+    return aliased(model, both, adapt_on_names=True)
+
+
+# ORM entities over the archive tables and over hot + archive; they load
+# ordinary Deal/Task objects, which must not be modified
+ArchivedDeal = aliased(Deal, deals_archive, adapt_on_names=True)
+ArchivedTask = aliased(Task, tasks_archive, adapt_on_names=True)
+AllDeals = _combined(Deal, deals_archive, "all_deals")
+AllTasks = _combined(Task, tasks_archive, "all_tasks")
+
+
+def archive_cutoff(days: Optional[int] = None) -> Optional[datetime]:
+    """Rows closed before this are archived; None when archival is off"""
+    days = get_settings().archive_after_days if days is None else days
+    if days <= 0:
+        return None
+    return datetime.utcnow() - timedelta(days=max(days, MIN_ARCHIVE_AGE_DAYS))
+
+
+def _plans(cutoff: datetime) -> List[tuple]:
+    """(entity, hot table, archive table, condition) for each archived entity"""
+    deals, tasks = Deal.__table__, Task.__table__
+    return [
+        ("deals", deals, deals_archive, and_(
+            deals.c.stage.in_(ARCHIVED_STAGES),
+            func.coalesce(deals.c.actual_close_date, deals.c.updated_at) < cutoff
+        )),
+        ("tasks", tasks, tasks_archive, and_(
+            tasks.c.is_completed == True,
+            func.coalesce(tasks.c.completed_at, tasks.c.updated_at) < cutoff
+        )),
+    ]
+
+
+def archive_engine(bind: Engine, cutoff: datetime, batch_size: int,
+                   on_batch: Optional[Callable[[dict], None]] = None) -> Dict[str, int]:
+    """Move every archivable row in one database, `batch_size` rows per transaction.
+
+    Candidates are found by walking the table in rowid order, so the whole
+    pass reads each hot row once. The copy and delete re-check the
+    condition inside the write transaction, so a deal reopened in between
+    stays put. `on_batch` is called with the running counts between
+    batches (the archive job reports progress and checks for cancellation
+    there).
+    """
+    moved = {"deals": 0, "tasks": 0}
+    rowid = literal_column("rowid")
+    for entity, source, target, condition in _plans(cutoff):
+        columns = [column.name for column in source.columns]
+        last = 0
+        while True:
+            with bind.begin() as conn:
+                rowids = conn.execute(
+                    select(rowid).select_from(source).where(rowid > last, condition).order_by(rowid).limit(batch_size)
+                ).scalars().all()
+                if not rowids:
+                    break
+                last = rowids[-1]
+                batch = and_(rowid.in_(rowids), condition)
+                conn.execute(insert(target).from_select(
+                    columns, select(*[source.c[column] for column in columns]).where(batch)
+                ))
+                moved[entity] += conn.execute(delete(source).where(batch)).rowcount
+            if on_batch is not None:
+                on_batch(moved)
+    return moved
+
+
+def summary_triggers() -> List[str]:
+    """CREATE TRIGGER statements keeping archive_summaries in step with the archive tables"""
+    sources = [
+        ("deals", "deals_archive", "stage", "actual_close_date", "coalesce({row}.value, 0)"),
+        ("tasks", "tasks_archive", "status", "completed_at", "0"),
+    ]
+    statements = []
+    for entity, table, status, date, value in sources:
+        key = (
+            f"owner_id = {{row}}.owner_id AND entity = '{entity}' AND status = coalesce({{row}}.{status}, '') "
+            f"AND period = coalesce(strftime('%Y-%m', {{row}}.{date}), '')"
+        )
+        statements.append(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_summary_insert AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO archive_summaries (owner_id, entity, status, period, count, value) VALUES "
+            f"(NEW.owner_id, '{entity}', coalesce(NEW.{status}, ''), "
+            f"coalesce(strftime('%Y-%m', NEW.{date}), ''), 1, {value.format(row='NEW')}) "
+            f"ON CONFLICT (owner_id, entity, status, period) DO UPDATE SET "
+            f"count = count + 1, value = value + excluded.value; END"
+        )
+        statements.append(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_summary_delete AFTER DELETE ON {table} BEGIN "
+            f"UPDATE archive_summaries SET count = count - 1, value = value - {value.format(row='OLD')} "
+            f"WHERE {key.format(row='OLD')}; END"
+        )
+    return statements
+
+
+def archived_counts(db: Session, owner_id: str, entity: str) -> Dict[str, int]:
+    """Archived row counts by deal stage or task status; empty when nothing is archived"""
+    rows = db.query(ArchiveSummary.status, func.sum(ArchiveSummary.count)).filter(
+        ArchiveSummary.owner_id == owner_id,
+        ArchiveSummary.entity == entity,
+        ArchiveSummary.count > 0
+    ).group_by(ArchiveSummary.status)
+    return {status: count for status, count in rows}
+
+
+def archive_summaries(db: Session, owner_id: str) -> List[ArchiveSummary]:
+    return db.query(ArchiveSummary).filter(
+        ArchiveSummary.owner_id == owner_id,
+        ArchiveSummary.count > 0
+    ).all()
+
+
+def read_through(fetch: Callable[[object, int, int], list], hot, archived, combined,
+                 skip: int, limit: int, sort_key: Callable) -> list:
+    """One list page, read over hot + archive only when an archived row would be on it.
+
+    `fetch(entity, skip, limit)` runs the page query against an entity.
+    The hot page stands when it is full and the first archived row in the
+    same order sorts after its last row.
+    """
+    rows = fetch(hot, skip, limit)
+    first_archived = fetch(archived, 0, 1)
+    if first_archived and (len(rows) < limit or sort_key(first_archived[0]) <= sort_key(rows[-1])):
+        return fetch(combined, skip, limit)
+    return rows
+
+
+def add_counts(total: int, facets: Dict[str, Dict[str, int]], more_total: int,
+               more_facets: Dict[str, Dict[str, int]]):
+    """Sum two (total, facets) results from count_facets"""
+    for field, counts in more_facets.items():
+        merged = facets.setdefault(field, {})
+        for value, count in counts.items():
+            merged[value] = merged.get(value, 0) + count
+    return total + more_total, facets
+
+
+def delete_archived_for_contacts(db: Session, owner_id: str, contact_ids: List[str]):
+    """Archived deals and tasks go with their contact, as the hot ones do through the ORM cascade"""
+    for entity, table in (("deal", deals_archive), ("task", tasks_archive)):
+        condition = and_(table.c.owner_id == owner_id, table.c.contact_id.in_(contact_ids))
+        for row_id, title in db.execute(select(table.c.id, table.c.title).where(condition)):
+            record_activity(db, owner_id, entity, row_id, "deleted", title)
+        db.execute(delete(table).where(condition))
+
+
+def repoint_archived(db: Session, owner_id: str, contact_ids: List[str], primary_id: str) -> List[tuple]:
+    """Move archived deals and tasks of merged contacts onto the surviving contact.
+
+    Returns (entity_type, id, previous contact_id) for every moved row.
+    """
+    moved = []
+    for entity_type, table in (("deal", deals_archive), ("task", tasks_archive)):
+        condition = and_(table.c.owner_id == owner_id, table.c.contact_id.in_(contact_ids))
+        moved += [(entity_type, row_id, contact_id)
+                  for row_id, contact_id in db.execute(select(table.c.id, table.c.contact_id).where(condition))]
+        db.execute(update(table).where(condition).values(contact_id=primary_id))
+    return moved
+
+
+def request_archive(directory: Session):
+    """Queue a system archive run unless one is already queued or running"""
+    from app.jobs import job_queue
+    from app.models.job import Job
+    pending = directory.query(Job.id).filter(
+        Job.kind == "archive",
+        Job.status.in_(("queued", "running"))
+    ).first()
+    if pending is None:
+        job_queue.enqueue(directory, "archive", priority=200)
+
+
+def schedule_archive():
+    """Startup hook: queue an archive run when ARCHIVE_AFTER_DAYS is set"""
+    from app.database import SessionLocal
+    if archive_cutoff() is None:
+        return
+    directory = SessionLocal()
+    try:
+        request_archive(directory)
+    finally:
+        directory.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=None, help="Archive rows closed this many days ago (defaults to ARCHIVE_AFTER_DAYS)")
+    parser.add_argument("--batch-size", type=int, default=None, help="Rows per transaction (defaults to ARCHIVE_BATCH_SIZE)")
+    args = parser.parse_args()
+
+    from app.database import all_tenant_engines, engine
+    from app.migrations import migrate
+    cutoff = archive_cutoff(args.days)
+    if cutoff is None:
+        raise SystemExit("Archival is off: set ARCHIVE_AFTER_DAYS or pass --days")
+    batch_size = args.batch_size or get_settings().archive_batch_size
+    migrate(engine)
+    totals = {"deals": 0, "tasks": 0}
+    for bind in all_tenant_engines():
+        for entity, count in archive_engine(bind, cutoff, batch_size).items():
+            totals[entity] += count
+    print(f"Archived {totals['deals']} deals and {totals['tasks']} tasks closed before {cutoff:%Y-%m-%d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""Field-level change history for contacts, deals and tasks.
+
+Update endpoints snapshot the fields they are about to change and, once the
+update is committed, hand the differences to the audit writer. The writer
+queues them in memory and a background thread inserts them in batches, so a
+request pays for an in-memory append rather than a second write. A batch
+is written once it reaches AUDIT_BATCH_SIZE entries or AUDIT_FLUSH_INTERVAL
+after its first entry, whichever comes first. The queue
+is bounded: when it is full the request writes its own entries. Stopping
+the writer (application shutdown) flushes everything still queued; entries
+queued when the process is killed outright are lost.
+"""
+import itertools
+import json
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.config import get_settings
+from app.database import get_tenant_engine
+from app.metrics import register_metrics
+from app.models.audit import AuditEntry
+
+logger = logging.getLogger(__name__)
+
+
+def _encode(value) -> Optional[str]:
+    if value is None:
+        return None
+    return json.dumps(value, default=lambda v: v.isoformat() if hasattr(v, "isoformat") else str(v))
+
+
+def snapshot(obj, fields) -> dict:
+    """Values of `fields` on `obj` before an update is applied"""
+    return {field: getattr(obj, field, None) for field in fields}
+
+
+def field_changes(obj, before: dict) -> List[tuple]:
+    """(field, old, new) for every snapshotted field whose value has changed"""
+    changes = []
+    for field, old in before.items():
+        new = getattr(obj, field, None)
+        if new != old:
+            changes.append((field, old, new))
+    return changes
+
+
+class AuditWriter:
+    """Bounded in-memory queue of audit entries drained by one writer thread"""
+
+    def __init__(self, max_queue: int, batch_size: int, flush_interval: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)  # (seq, rows) per update; no rows = flush now
+        self._sequence = itertools.count(1)
+        self._last_queued = {}  # owner id -> seq of that owner's latest queued update
+        self._last_written = 0
+        self._written = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self.counters = {"queued": 0, "written": 0, "batches": 0, "sync_writes": 0, "failed": 0}
+        register_metrics("audit", self.stats)
+
+    def stats(self) -> dict:
+        return {**self.counters, "queue_depth": self._queue.qsize()}
+
+    def record(self, owner_id: str, entity_type: str, entity_id: str, changed_by: str, changes: List[tuple]):
+        """Queue the changes of one committed update"""
+        if not changes:
+            return
+        now = datetime.utcnow()
+        rows = [
+            {
+                "owner_id": owner_id,
+                "entity_type": entity_type,
+                "entity_id": entity_id,
+                "field": field,
+                "old_value": _encode(old),
+                "new_value": _encode(new),
+                "changed_by": changed_by,
+                "changed_at": now,
+            }
+            for field, old, new in changes
+        ]
+        if self._thread is not None and not self._stopping.is_set():
+            seq = next(self._sequence)
+            try:
+                self._queue.put_nowait((seq, rows))
+                self._last_queued[owner_id] = seq
+                self.counters["queued"] += len(rows)
+                return
+            except queue.Full:
+                pass
+        # Not running, or the writer has fallen behind: write in the caller
+        self.counters["sync_writes"] += 1
+        self._write(rows)
+
+    def barrier(self, owner_id: str, timeout: float = 2.0):
+        """Wait until the owner's queued updates have been written, so history reads see them.
+
+        Batches are written in queue order, so this waits only for the
+        batch holding the owner's latest update (flushed at once rather
+        than after AUDIT_FLUSH_INTERVAL), never for entries queued later.
+        """
+        target = self._last_queued.get(owner_id, 0)
+        if self._last_written >= target:
+            return
+        self._wake()
+        with self._written:
+            self._written.wait_for(lambda: self._last_written >= target or self._thread is None, timeout)
+
+    def start(self):
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Flush everything queued, then stop the writer thread"""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._wake()
+        self._thread.join(timeout)
+        self._thread = None
+        with self._written:
+            self._written.notify_all()
+
+    def _wake(self):
+        try:
+            self._queue.put_nowait((0, []))
+        except queue.Full:
+            pass  # a full queue is flushed without waiting anyway
+
+    def _write(self, rows: List[dict]):
+        by_owner = defaultdict(list)
+        for row in rows:
+            by_owner[row["owner_id"]].append(row)
+        for owner_id, owner_rows in by_owner.items():
+            try:
+                with get_tenant_engine(owner_id).begin() as conn:
+                    conn.execute(insert(AuditEntry.__table__), owner_rows)
+                self.counters["written"] += len(owner_rows)
+            except Exception:
+                self.counters["failed"] += len(owner_rows)
+                logger.exception("Failed to write %d audit entries for owner %s", len(owner_rows), owner_id)
+
+    def _run(self):
+        # After stop() is requested the loop keeps draining until the queue is empty
+        while True:
+            try:
+                seq, rows = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return
+                continue
+            batch = list(rows)
+            last_seq = seq
+            deadline = time.monotonic() + self.flush_interval
+            while rows and len(batch) < self.batch_size:
+                remaining = 0 if self._stopping.is_set() else deadline - time.monotonic()
+                try:
+                    seq, rows = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.extend(rows)
+                last_seq = max(last_seq, seq)
+            if batch:
+                self._write(batch)
+                self.counters["batches"] += 1
+            with self._written:
+                self._last_written = max(self._last_written, last_seq)
+                self._written.notify_all()
+
+
+def history_page(db: Session, owner_id: str, entity_type: str, entity_id: str,
+                 cursor: Optional[str], limit: int, entities: tuple) -> Optional[dict]:
+    """Newest-first page of an entity's changes; raises ValueError for malformed cursors.
+
+    History outlives the entity, so ownership is checked against the
+    owner's audit entries. Returns None, for the route to answer 404, when
+    the owner has neither entries for that id nor a row of it in `entities`
+    (the hot model and its archive alias), i.e. it is not theirs or never
+    existed.
+    """
+    audit_writer.barrier(owner_id)
+    query = db.query(AuditEntry).filter(
+        AuditEntry.owner_id == owner_id,
+        AuditEntry.entity_type == entity_type,
+        AuditEntry.entity_id == entity_id
+    )
+    paged = query.filter(AuditEntry.id < int(cursor)) if cursor else query
+    entries = paged.order_by(AuditEntry.id.desc()).limit(limit + 1).all()
+    if not entries:
+        known = (cursor and query.with_entities(AuditEntry.id).first()) or any(
+            db.query(entity.id).filter(entity.id == entity_id, entity.owner_id == owner_id).first()
+            for entity in entities
+        )
+        if not known:
+            return None
+    next_cursor = str(entries[limit - 1].id) if len(entries) > limit else None
+    return {"items": entries[:limit], "next_cursor": next_cursor}
+
+
+audit_writer = AuditWriter(
+    get_settings().audit_queue_size,
+    get_settings().audit_batch_size,
+    get_settings().audit_flush_interval
+)
+
+
+def start_audit_writer():
+    audit_writer.start()
+
+
+def stop_audit_writer():
+    audit_writer.stop()
@@ -1,10 +1,10 @@
+import secrets
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status, Request, Response
 from fastapi.security import HTTPBearer
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_directory_db
 from app.models.user import User
 from app.config import get_settings
 
@@ -20,11 +20,13 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(days=7)
     to_encode.update({"exp": expire})
+    from jose import jwt
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=ALGORITHM)
     return encoded_jwt
 
 
 def verify_token(token: str) -> Optional[dict]:
+    from jose import JWTError, jwt
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[ALGORITHM])
         return payload
@@ -32,6 +34,28 @@ def verify_token(token: str) -> Optional[dict]:
         return None
 
 
+def token_subject(request: Request) -> Optional[str]:
+    """User id from the session cookie, decoded once per request"""
+    if not hasattr(request.state, "token_subject"):
+        token = request.cookies.get(settings.cookie_name)
+        payload = verify_token(token) if token else None
+        request.state.token_subject = payload.get("sub") if payload else None
+    return request.state.token_subject
+
+
+def require_operator(request: Request):
+    """Dependency for operator endpoints: `Authorization: Bearer <METRICS_TOKEN>`; off while the token is unset"""
+    if not settings.metrics_token:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operator endpoints are disabled; set METRICS_TOKEN")
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), settings.metrics_token.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Operator token required",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
 def set_auth_cookie(response: Response, token: str):
     """Set HTTP-only cookie with the access token"""
     response.set_cookie(
@@ -55,7 +79,7 @@ def clear_auth_cookie(response: Response):
 
 async def get_current_user(
     request: Request,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_directory_db)
 ) -> User:
     """Get current user from HTTP-only cookie"""
     credentials_exception = HTTPException(
@@ -64,17 +88,8 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    # Get token from HTTP-only cookie
-    token = request.cookies.get(settings.cookie_name)
-    
-    if not token:
-        raise credentials_exception
-    
-    payload = verify_token(token)
-    if payload is None:
-        raise credentials_exception
-    
-    user_id: str = payload.get("sub")
+    # Get user id from the token in the HTTP-only cookie
+    user_id = token_subject(request)
     if user_id is None:
         raise credentials_exception
     
@@ -87,19 +102,10 @@ async def get_current_user(
 
 async def get_current_user_optional(
     request: Request,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_directory_db)
 ) -> Optional[User]:
     """Get current user if authenticated, otherwise return None"""
-    token = request.cookies.get(settings.cookie_name)
-    
-    if not token:
-        return None
-    
-    payload = verify_token(token)
-    if payload is None:
-        return None
-    
-    user_id: str = payload.get("sub")
+    user_id = token_subject(request)
     if user_id is None:
         return None
     
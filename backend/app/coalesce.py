@@ -0,0 +1,96 @@
+import asyncio
+import itertools
+from collections import OrderedDict
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode
+from starlette.requests import Request
+from app.admission import route_class
+from app.auth import token_subject
+from app.metrics import register_metrics
+
+# Users whose last write is remembered; forgetting one only allows joining a
+# request that started before a write already forgotten about
+MAX_TRACKED_WRITERS = 10_000
+
+
+class Flight:
+    __slots__ = ("started", "done", "messages")
+
+    def __init__(self, started: int):
+        self.started = started
+        self.done = asyncio.Event()
+        self.messages: Optional[list] = None
+
+
+class SingleFlightMiddleware:
+    """Share one execution between identical concurrent analytics and list reads.
+
+    Requests are identical when the user, path and sorted query string match.
+    The first one runs and records its response messages; others arriving
+    while it is in flight wait and replay them. A write from the same user
+    starts a new generation, so a read issued after a write never receives
+    a response computed before it.
+    """
+
+    def __init__(self, app, route_classes: tuple = ("analytics", "list")):
+        self.app = app
+        self.route_classes = route_classes
+        self._flights: Dict[tuple, Flight] = {}
+        self._clock = itertools.count()
+        self._last_write: "OrderedDict[str, int]" = OrderedDict()
+        self.counters = {"executed": 0, "coalesced": 0, "fallbacks": 0}
+        register_metrics("single_flight", self.stats)
+
+    def stats(self) -> dict:
+        return {**self.counters, "in_flight": len(self._flights)}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith("/api/"):
+            await self.app(scope, receive, send)
+            return
+        user_id = token_subject(Request(scope))
+        if user_id is None:
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] != "GET":
+            self._last_write[user_id] = next(self._clock)
+            self._last_write.move_to_end(user_id)
+            while len(self._last_write) > MAX_TRACKED_WRITERS:
+                self._last_write.popitem(last=False)
+            await self.app(scope, receive, send)
+            return
+        if route_class(scope["method"], scope["path"]) not in self.route_classes:
+            await self.app(scope, receive, send)
+            return
+
+        query = urlencode(sorted(parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True)))
+        key = (user_id, scope["path"], query)
+        flight = self._flights.get(key)
+        if flight is not None and self._last_write.get(user_id, -1) < flight.started:
+            await flight.done.wait()
+            if flight.messages is not None:
+                self.counters["coalesced"] += 1
+                for message in flight.messages:
+                    await send(message)
+                return
+            # The leader failed; run this request on its own
+            self.counters["fallbacks"] += 1
+            await self.app(scope, receive, send)
+            return
+
+        flight = self._flights[key] = Flight(next(self._clock))
+        recorded = []
+
+        async def record(message):
+            recorded.append(message)
+            await send(message)
+
+        self.counters["executed"] += 1
+        try:
+            await self.app(scope, receive, record)
+            flight.messages = recorded
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            flight.done.set()
@@ -0,0 +1,201 @@
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from app.metrics import register_metrics
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+# Bodies above this are compressed off the event loop
+THREADPOOL_THRESHOLD = 64 * 1024
+
+
+def available_encodings() -> list:
+    """Supported codecs in order of preference"""
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+
+def negotiate(accept_encoding: str, encodings: list) -> Optional[str]:
+    """Pick the preferred encoding the client accepts with a non-zero q-value"""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    best = None
+    for encoding in encodings:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > 0 and (best is None or quality > best[1]):
+            best = (encoding, quality)
+    return best[0] if best else None
+
+
+class CompressedBodyCache:
+    """Byte-bounded LRU of compressed bodies keyed by (encoding, body digest).
+
+    The digest is the payload's version: an unchanged analytics response
+    hashes to the same key and reuses its compressed bytes, while any change
+    in the data produces a new key, so entries never need invalidating.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, bytes], bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, bytes]) -> Optional[bytes]:
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return compressed
+
+    def put(self, key: Tuple[str, bytes], compressed: bytes):
+        if len(compressed) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = compressed
+            self._size += len(compressed)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size, "hits": self.hits, "misses": self.misses}
+
+
+class CompressionMiddleware:
+    """Compress buffered responses with zstd, brotli or gzip.
+
+    Only complete bodies are compressed; streamed responses such as the
+    reminder event stream pass through untouched so events are not held
+    back in a compressor buffer.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, content_types: str = "application/json,text/",
+                 gzip_level: int = 5, zstd_level: int = 3, brotli_quality: int = 4,
+                 cache_paths: str = "", cache_max_bytes: int = 16 * 1024 * 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.content_types = tuple(filter(None, (t.strip() for t in content_types.split(","))))
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+        self.brotli_quality = brotli_quality
+        self.cache_paths = tuple(filter(None, (p.strip() for p in cache_paths.split(","))))
+        self.cache = CompressedBodyCache(cache_max_bytes)
+        self.encodings = available_encodings()
+        self.counters = {"compressed": 0, "bytes_in": 0, "bytes_out": 0}
+        register_metrics("compression", self.stats)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        cacheable = scope["path"].startswith(self.cache_paths)
+        start_message = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                # Copied because the headers are rewritten below and the
+                # message may be replayed to other requests (single-flight)
+                start_message = {**message, "headers": list(message["headers"])}
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start_message["headers"])
+            if message.get("more_body", False) or not self._should_compress(headers, body):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = await self._compress(encoding, body, cacheable)
+            self.counters["compressed"] += 1
+            self.counters["bytes_in"] += len(body)
+            self.counters["bytes_out"] += len(compressed)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+    def stats(self) -> dict:
+        return {**self.counters, "encodings": self.encodings, "cache": self.cache.stats()}
+
+    def _should_compress(self, headers: MutableHeaders, body: bytes) -> bool:
+        if len(body) < self.minimum_size or "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        return content_type.startswith(self.content_types) and not content_type.startswith("text/event-stream")
+
+    async def _compress(self, encoding: str, body: bytes, cacheable: bool) -> bytes:
+        key = None
+        if cacheable:
+            key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+            compressed = self.cache.get(key)
+            if compressed is not None:
+                return compressed
+
+        if len(body) > THREADPOOL_THRESHOLD:
+            compressed = await run_in_threadpool(self._encode, encoding, body)
+        else:
+            compressed = self._encode(encoding, body)
+        if key is not None:
+            self.cache.put(key, compressed)
+        return compressed
+
+    def _encode(self, encoding: str, body: bytes) -> bytes:
+        if encoding == "zstd":
+            return zstandard.ZstdCompressor(level=self.zstd_level).compress(body)
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
@@ -14,6 +14,90 @@ class Settings(BaseSettings):
     
     # Database
     database_url: str = "sqlite:///./crm.db"
+    compact_ids: bool = False  # store UUID keys as 16-byte BLOBs (see app.migrate_ids)
+    auto_migrate: bool = True  # apply pending migrations at startup (see app.migrations)
+    
+    # Tenant sharding: owner data lives in per-owner SQLite files, or in
+    # shard_count hash buckets when shard_count > 0 (see app.shards)
+    shard_by_owner: bool = False
+    shard_count: int = 0
+    shard_dir: str = "./shards"
+    shard_engine_cache_size: int = 32
+    
+    # Background jobs
+    job_workers: int = 2  # concurrency budget for imports, exports and rebuilds
+    job_lease_seconds: float = 60.0  # a running job whose process stops renewing this long is failed
+    
+    # Due-date reminders. With several workers, log and webhook reminders are
+    # sent by whichever worker holds the "reminders" lease (see app.leases)
+    reminders_enabled: bool = True
+    reminder_lease_seconds: float = 60.0
+    reminder_sinks: str = "log"  # comma-separated: log, webhook, sse
+    reminder_webhook_url: str = ""
+    
+    # Response compression (zstd and brotli are used when their packages are installed)
+    compression_enabled: bool = True
+    compression_min_size: int = 1024  # bytes; smaller bodies are sent as is
+    compression_types: str = "application/json,text/"  # content-type prefixes
+    compression_gzip_level: int = 5
+    compression_zstd_level: int = 3
+    compression_brotli_quality: int = 4
+    compression_cache_paths: str = "/api/analytics"  # reuse compressed bytes for unchanged bodies
+    compression_cache_bytes: int = 16 * 1024 * 1024
+    
+    # Admission control: per-user token buckets, per-route-class concurrency
+    # limits and a global in-flight cap (see app.admission)
+    admission_enabled: bool = True
+    rate_limit_per_second: float = 20.0  # tokens refilled per user; analytics costs 5, other requests 1
+    rate_limit_burst: float = 60.0
+    max_in_flight: int = 64
+    analytics_concurrency: int = 4
+    list_concurrency: int = 16
+    read_concurrency: int = 32
+    write_concurrency: int = 8  # SQLite has a single writer
+    admission_queue_timeout: float = 0.25  # seconds to wait for a slot before shedding with 503
+    admission_exempt_paths: str = "/api/health,/api/reminders/stream,/api/auth"
+    
+    # Bearer token for GET /api/metrics; the endpoint is disabled while empty
+    metrics_token: str = ""
+    
+    # Identical concurrent analytics/list reads by one user share one execution
+    single_flight_enabled: bool = True
+    
+    # Field-level audit history, queued in memory and written in batches
+    audit_queue_size: int = 10_000  # callers write their own entries when the queue is full
+    audit_batch_size: int = 500
+    audit_flush_interval: float = 0.5  # seconds
+    
+    # Contact typeahead: per-owner prefix indexes, least recently used owners
+    # are dropped beyond this many indexed terms (about 4 per contact)
+    suggest_max_terms: int = 4_000_000
+    
+    # Closed deals and completed tasks older than this many days (at least 60)
+    # move to archive tables in the background; 0 keeps everything hot (see app.archive)
+    archive_after_days: int = 0
+    archive_batch_size: int = 500  # rows per transaction
+    
+    # Workers tell each other which owners' data changed so in-process caches
+    # stay current (see app.invalidation); a single-process deployment can turn it off
+    invalidation_enabled: bool = True
+    invalidation_poll_interval: float = 0.5  # seconds
+    invalidation_retention: float = 600.0  # seconds events are kept for slow pollers
+    
+    # Statements slower than the threshold are logged with their query plan
+    # and summed per statement for GET /api/metrics/slow-queries (see app.slowlog)
+    slow_query_enabled: bool = False
+    slow_query_threshold_ms: float = 100.0
+    slow_query_log_path: str = "./slow-queries.log"  # rotating JSON lines; empty sends them to the app log
+    slow_query_log_bytes: int = 10 * 1024 * 1024
+    slow_query_log_backups: int = 5
+    slow_query_max_statements: int = 1000  # distinct statements kept per worker
+    
+    # Event-loop watchdog: a heartbeat task measures loop lag and a thread
+    # records the stack and route of code that blocks the loop (see app.watchdog)
+    loop_watchdog_enabled: bool = False
+    loop_watchdog_interval: float = 0.05  # seconds between heartbeats
+    loop_watchdog_threshold: float = 0.1  # seconds of lag counted as a stall
     
     # Cookie settings
     cookie_name: str = "crm_session"
@@ -1,10 +1,30 @@
-from sqlalchemy import create_engine
+import glob
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from fastapi import Depends, Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
 from app.config import get_settings
+from app.migrations import migrate
 
 settings = get_settings()
 
+
+@event.listens_for(Engine, "connect")
+def _incremental_auto_vacuum(dbapi_connection, connection_record):
+    # Only takes effect on a file that has no tables yet, so every database
+    # and shard file this app creates can return free pages with
+    # incremental_vacuum (see app.maintenance); older files are left as they are
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    cursor.close()
+
+
 engine = create_engine(
     settings.database_url,
     connect_args={"check_same_thread": False}  # SQLite specific
@@ -15,9 +35,123 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
-def get_db():
+def sqlite_path(database_url: str) -> str:
+    if not database_url.startswith("sqlite:///"):
+        raise SystemExit(f"Only SQLite databases are supported, got {database_url}")
+    return database_url[len("sqlite:///"):]
+
+
+def tenant_tables():
+    """Tables holding per-owner data; these move to shard files when sharding is enabled"""
+    return [
+        table for table in Base.metadata.sorted_tables
+        if "owner_id" in table.c and not table.info.get("directory")
+    ]
+
+
+def shard_key(owner_id: str) -> str:
+    digest = hashlib.sha256(owner_id.encode()).hexdigest()
+    if settings.shard_count > 0:
+        return f"bucket-{int(digest, 16) % settings.shard_count:04d}"
+    return f"owner-{digest[:24]}"
+
+
+def shard_path(key: str) -> str:
+    return os.path.join(settings.shard_dir, f"{key}.db")
+
+
+class TenantEngines:
+    """LRU of open shard engines; a shard is migrated the first time it is opened"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._engines = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Engine:
+        with self._lock:
+            shard_engine = self._engines.get(key)
+            if shard_engine is not None:
+                self._engines.move_to_end(key)
+                return shard_engine
+
+            os.makedirs(settings.shard_dir, exist_ok=True)
+            shard_engine = create_engine(
+                f"sqlite:///{shard_path(key)}",
+                connect_args={"check_same_thread": False}
+            )
+            migrate(shard_engine, tenant_tables())
+            self._engines[key] = shard_engine
+
+            while len(self._engines) > self.capacity:
+                _, evicted = self._engines.popitem(last=False)
+                evicted.dispose()
+            return shard_engine
+
+
+tenant_engines = TenantEngines(settings.shard_engine_cache_size)
+
+
+def get_tenant_engine(owner_id: str) -> Engine:
+    if not settings.shard_by_owner:
+        return engine
+    return tenant_engines.get(shard_key(owner_id))
+
+
+def all_tenant_engines():
+    """Every engine holding owner data, for background work that spans all owners"""
+    if not settings.shard_by_owner:
+        return [engine]
+    paths = sorted(glob.glob(os.path.join(settings.shard_dir, "*.db")))
+    return [tenant_engines.get(os.path.splitext(os.path.basename(path))[0]) for path in paths]
+
+
+@contextmanager
+def read_snapshot(owner_id: str):
+    """Session whose reads all see the owner's data as of its first query.
+
+    SQLite only keeps a snapshot inside an explicit transaction, which the
+    driver does not open for SELECTs; the transaction is rolled back at the
+    end since nothing is written.
+    """
+    with get_tenant_engine(owner_id).connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("BEGIN")
+        db = Session(bind=conn)
+        try:
+            yield db
+        finally:
+            db.close()
+            conn.exec_driver_sql("ROLLBACK")
+
+
+def get_directory_db():
+    """Session on the main database (users and other shared tables)"""
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def get_db(request: Request, directory: Session = Depends(get_directory_db)):
+    """Session for the authenticated owner's data.
+
+    Without sharding this is the directory session itself, so a request
+    still uses a single connection.
+    """
+    if not settings.shard_by_owner:
+        yield directory
+        return
+
+    from app.auth import token_subject
+    owner_id = token_subject(request)
+    if owner_id is None:
+        # get_current_user rejects the request before any tenant data is read
+        yield directory
+        return
+
+    db = SessionLocal(bind=get_tenant_engine(owner_id))
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,292 @@
+"""Duplicate contact detection and merging.
+
+Comparing every pair of contacts is quadratic, so candidates are found by
+blocking: each contact gets a few cheap keys (normalised email, phone
+digits, a phonetic name key within its company) and only contacts that
+share a key are compared. Blocks larger than MAX_BLOCK_SIZE are skipped as
+uninformative (a shared switchboard number, say), which keeps the number of
+comparisons linear in the number of contacts.
+"""
+import re
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+from app.activity import record_activity
+from app.models.contact import Contact
+from app.models.deal import Deal
+from app.models.task import Task
+from app.models.types import GUID
+from app.archive import repoint_archived
+from app.audit import field_changes, snapshot
+
+MAX_BLOCK_SIZE = 50
+
+# Score weights; a pair at or above the threshold is a duplicate
+EMAIL_WEIGHT = 0.5
+PHONE_WEIGHT = 0.3
+NAME_WEIGHT = 0.45
+COMPANY_WEIGHT = 0.2
+DEFAULT_THRESHOLD = 0.6
+
+# Fields copied from duplicates onto the surviving contact when it has none
+MERGE_FIELDS = ("email", "phone", "company", "job_title", "address", "city", "country", "source")
+
+# Lower-casing in SQLite is much cheaper than per-row Python string work
+CONTACTS_SQL = """
+    SELECT id, lower(first_name), lower(last_name), lower(trim(email)), phone, lower(company)
+    FROM contacts
+    WHERE owner_id = ?
+"""
+
+_SOUNDEX_CODES = {c: str(d) for d, letters in enumerate(("aeiouyhw", "bfpv", "cgjkqsxz", "dt", "l", "mn", "r")) for c in letters}
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_NON_DIGIT = re.compile(r"\D+")
+_COMPANY_SUFFIXES = re.compile(r"\b(inc|llc|ltd|gmbh|corp|corporation|co|company|plc|sa|ag)\b")
+
+
+def soundex(word: str) -> str:
+    word = "".join(c for c in word.lower() if c.isalpha())
+    if not word:
+        return ""
+    code = word[0]
+    previous = _SOUNDEX_CODES.get(word[0], "")
+    for c in word[1:]:
+        digit = _SOUNDEX_CODES.get(c, "")
+        if digit != "0" and digit != previous:
+            code += digit
+        if c not in "hw":
+            previous = digit
+    return (code + "000")[:4]
+
+
+def normalize_email(email: Optional[str]) -> str:
+    if not email or "@" not in email:
+        return ""
+    local, _, domain = email.strip().lower().rpartition("@")
+    return f"{local.split('+', 1)[0]}@{domain}"
+
+
+def normalize_phone(phone: Optional[str]) -> str:
+    digits = _NON_DIGIT.sub("", phone or "")
+    # Last ten digits, so "+1 (555) 123-4567" and "555.123.4567" agree
+    return digits[-10:] if len(digits) >= 7 else ""
+
+
+def normalize_company(company: Optional[str]) -> str:
+    return _NON_ALNUM.sub(" ", _COMPANY_SUFFIXES.sub("", (company or "").lower())).strip()
+
+
+def trigrams(text: str) -> frozenset:
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2)) if text else frozenset()
+
+
+def similarity(a: frozenset, b: frozenset) -> float:
+    """Dice coefficient of two trigram sets; a set intersection instead of an edit-distance DP"""
+    if not a or not b:
+        return 0.0
+    if a is b or a == b:
+        return 1.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+class _Features:
+    """Normalised fields of the contacts being compared, computed on first use.
+
+    Only contacts that share a block are ever compared, so trigram sets are
+    built for a small fraction of the rows and reused across their pairs.
+    """
+
+    def __init__(self, rows: list):
+        self.rows = rows
+        self._trigrams: Dict[str, frozenset] = {}
+        self._phones: Dict[int, str] = {}
+
+    def trigrams(self, text: str) -> frozenset:
+        found = self._trigrams.get(text)
+        if found is None:
+            found = self._trigrams[text] = trigrams(text)
+        return found
+
+    def email(self, index: int) -> str:
+        email = self.rows[index][3]
+        return normalize_email(email) if email and "+" in email else email or ""
+
+    def phone(self, index: int) -> str:
+        phone = self._phones.get(index)
+        if phone is None:
+            phone = self._phones[index] = normalize_phone(self.rows[index][4])
+        return phone
+
+    def name(self, index: int) -> frozenset:
+        row = self.rows[index]
+        return self.trigrams(f"{row[1] or ''} {row[2] or ''}".strip())
+
+    def company(self, index: int) -> frozenset:
+        return self.trigrams(normalize_company(self.rows[index][5]))
+
+
+def score_pair(features: _Features, a: int, b: int) -> tuple:
+    """Weighted match score in [0, 1] for two contacts and the signals that contributed"""
+    score = 0.0
+    reasons = []
+    email = features.email(a)
+    if email and email == features.email(b):
+        score += EMAIL_WEIGHT
+        reasons.append("email")
+    phone = features.phone(a)
+    if phone and phone == features.phone(b):
+        score += PHONE_WEIGHT
+        reasons.append("phone")
+    name = similarity(features.name(a), features.name(b))
+    if name >= 0.7:
+        score += NAME_WEIGHT * name
+        reasons.append("name")
+    company = similarity(features.company(a), features.company(b))
+    if company >= 0.7:
+        score += COMPANY_WEIGHT * company
+        reasons.append("company")
+    return min(score, 1.0), reasons
+
+
+def build_blocks(rows: list) -> Dict[str, List[int]]:
+    """Map each blocking key to the contacts (row indexes) that have it"""
+    blocks: Dict[str, List[int]] = defaultdict(list)
+    soundexes: Dict[str, str] = {}
+    companies: Dict[str, str] = {}
+    for index, (_, first_name, last_name, email, phone, company) in enumerate(rows):
+        if email:
+            blocks["e:" + (normalize_email(email) if "+" in email else email)].append(index)
+        if phone:
+            digits = normalize_phone(phone)
+            if digits:
+                blocks["p:" + digits].append(index)
+        if last_name:
+            code = soundexes.get(last_name)
+            if code is None:
+                code = soundexes[last_name] = soundex(last_name)
+            company_key = companies.get(company)
+            if company_key is None:
+                company_key = companies[company] = normalize_company(company)
+            blocks[f"n:{code}:{(first_name or '')[:1]}:{company_key}"].append(index)
+    return blocks
+
+
+class _DisjointSet:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, x):
+        root = x
+        while self.parent.get(root, root) != root:
+            root = self.parent[root]
+        while x != root:
+            self.parent[x], x = root, self.parent.get(x, x)
+        return root
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[rb] = ra
+
+
+def find_duplicate_clusters(db: Session, owner_id: str, threshold: float = DEFAULT_THRESHOLD) -> dict:
+    """Group the owner's contacts into duplicate clusters.
+
+    Returns the clusters (contact ids, best pair score, matching signals)
+    sorted by score, with counts of contacts scanned and pairs compared.
+    """
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.execute(CONTACTS_SQL, (owner_id,))
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+
+    blocks = build_blocks(rows)
+    features = _Features(rows)
+
+    clusters = _DisjointSet()
+    best: Dict[int, tuple] = {}
+    compared = set()
+    for members in blocks.values():
+        if len(members) < 2 or len(members) > MAX_BLOCK_SIZE:
+            continue
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                if (a, b) in compared:
+                    continue
+                compared.add((a, b))
+                score, reasons = score_pair(features, a, b)
+                if score >= threshold:
+                    clusters.union(a, b)
+                    for index in (a, b):
+                        if index not in best or best[index][0] < score:
+                            best[index] = (score, reasons)
+
+    grouped: Dict[int, List[int]] = defaultdict(list)
+    for index in best:
+        grouped[clusters.find(index)].append(index)
+
+    to_str = GUID().process_result_value
+    result = []
+    for members in grouped.values():
+        score = max(best[i][0] for i in members)
+        reasons = sorted({reason for i in members for reason in best[i][1]})
+        result.append({
+            "contact_ids": [to_str(rows[i][0], None) for i in sorted(members)],
+            "score": round(score, 3),
+            "reasons": reasons,
+        })
+    result.sort(key=lambda cluster: (-cluster["score"], -len(cluster["contact_ids"])))
+    return {"clusters": result, "scanned": len(rows), "compared": len(compared)}
+
+
+def merge_contacts(db: Session, owner_id: str, primary: Contact, duplicate_ids: List[str]) -> dict:
+    """Fold duplicates into `primary`: fill its blank fields, re-point deals and tasks, delete the rest.
+
+    Deals and tasks move with one UPDATE per table and duplicates go in one
+    DELETE, so the cost does not grow with the number of related rows
+    loaded into the session. The caller commits, then records the returned
+    "audit" entries: (entity_type, entity_id, changes) for the primary and
+    every moved deal and task.
+    """
+    duplicates = db.query(Contact).filter(
+        Contact.owner_id == owner_id,
+        Contact.id.in_(duplicate_ids),
+        Contact.id != primary.id
+    ).order_by(Contact.created_at).all()
+    ids = [duplicate.id for duplicate in duplicates]
+    if not ids:
+        return {"merged": 0, "deals_moved": 0, "tasks_moved": 0, "audit": []}
+
+    before = snapshot(primary, MERGE_FIELDS + ("notes",))
+    for field in MERGE_FIELDS:
+        if not getattr(primary, field):
+            value = next((getattr(d, field) for d in duplicates if getattr(d, field)), None)
+            if value:
+                setattr(primary, field, value)
+    notes = [primary.notes] + [d.notes for d in duplicates]
+    primary.notes = "\n\n".join(dict.fromkeys(n.strip() for n in notes if n and n.strip())) or None
+    primary.updated_at = datetime.utcnow()
+
+    moved = []
+    for entity_type, model in (("deal", Deal), ("task", Task)):
+        moved += [(entity_type, row_id, contact_id) for row_id, contact_id in db.query(model.id, model.contact_id).filter(
+            model.owner_id == owner_id, model.contact_id.in_(ids)
+        )]
+    deals_moved = db.query(Deal).filter(Deal.owner_id == owner_id, Deal.contact_id.in_(ids)).update(
+        {Deal.contact_id: primary.id}, synchronize_session=False
+    )
+    tasks_moved = db.query(Task).filter(Task.owner_id == owner_id, Task.contact_id.in_(ids)).update(
+        {Task.contact_id: primary.id}, synchronize_session=False
+    )
+    moved += repoint_archived(db, owner_id, ids, primary.id)
+    audit = [("contact", primary.id, field_changes(primary, before))]
+    audit += [(entity_type, row_id, [("contact_id", contact_id, primary.id)]) for entity_type, row_id, contact_id in moved]
+    for duplicate in duplicates:
+        record_activity(db, owner_id, "contact", duplicate.id, "deleted", duplicate.full_name)
+        db.expunge(duplicate)  # keep the ORM cascade from deleting the moved rows
+    db.query(Contact).filter(Contact.owner_id == owner_id, Contact.id.in_(ids)).delete(synchronize_session=False)
+    return {"merged": len(ids), "deals_moved": deals_moved, "tasks_moved": tasks_moved, "audit": audit}
@@ -0,0 +1,74 @@
+from typing import Optional, Set
+from fastapi import HTTPException
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, selectinload
+from app.models.contact import Contact
+from app.models.deal import Deal
+from app.models.task import Task
+from app.schemas.contact import ContactResponse
+from app.schemas.deal import DealResponse
+from app.schemas.task import TaskResponse
+from app.schemas.expanded import ContactWithRelated, DealWithRelated, TaskWithRelated
+
+CLOSED_STAGES = ("closed_won", "closed_lost")
+
+# Relations each entity can embed through ?include=
+INCLUDES = {
+    Contact: {"deals", "tasks", "open_tasks"},
+    Deal: {"contact"},
+    Task: {"contact"},
+}
+
+
+def parse_include(model, include: Optional[str]) -> Set[str]:
+    requested = {part.strip() for part in (include or "").split(",") if part.strip()}
+    unknown = requested - INCLUDES[model]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot include {', '.join(sorted(unknown))}; allowed: {', '.join(sorted(INCLUDES[model]))}"
+        )
+    return requested
+
+
+def include_options(model, includes: Set[str]) -> list:
+    """Eager-load options so a page costs one extra query per relation, whatever its size"""
+    options = []
+    if model is Contact:
+        if "deals" in includes:
+            options.append(selectinload(Contact.deals))
+        if "tasks" in includes:
+            options.append(selectinload(Contact.tasks))
+        elif "open_tasks" in includes:
+            options.append(selectinload(Contact.tasks.and_(Task.is_completed == False)))
+    elif "contact" in includes:
+        # Many-to-one: joined into the main query. The archive entities are
+        # aliases the join cannot be adapted to, so they load it separately
+        loader = selectinload if inspect(model).is_aliased_class else joinedload
+        options.append(loader(model.contact))
+    return options
+
+
+def expand_contact(contact: Contact, includes: Set[str]) -> ContactWithRelated:
+    item = ContactWithRelated.model_validate(contact)
+    if "deals" in includes:
+        item.deals = [DealResponse.model_validate(deal) for deal in contact.deals]
+        item.deal_value_total = sum(deal.value or 0.0 for deal in contact.deals)
+        item.open_deal_value = sum(deal.value or 0.0 for deal in contact.deals if deal.stage not in CLOSED_STAGES)
+    if "tasks" in includes or "open_tasks" in includes:
+        item.tasks = [TaskResponse.model_validate(task) for task in contact.tasks]
+    return item
+
+
+def expand_deal(deal: Deal, includes: Set[str]) -> DealWithRelated:
+    item = DealWithRelated.model_validate(deal)
+    if "contact" in includes:
+        item.contact = ContactResponse.model_validate(deal.contact) if deal.contact else None
+    return item
+
+
+def expand_task(task: Task, includes: Set[str]) -> TaskWithRelated:
+    item = TaskWithRelated.model_validate(task)
+    if "contact" in includes:
+        item.contact = ContactResponse.model_validate(task.contact) if task.contact else None
+    return item
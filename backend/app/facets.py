@@ -0,0 +1,127 @@
+"""Facet counts and exact totals for the list endpoints.
+
+Unfiltered lists are answered from facet_counts, a per-owner rollup that
+SQLite triggers keep exact on every insert, update and delete (including
+bulk and raw-cursor writes), so a count costs one indexed read instead of
+a scan. Filtered lists run one GROUP BY per requested facet over the same
+filtered query as the page. Rows with no value for a field are counted in
+the total but not in its facet.
+"""
+from typing import Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import func
+from sqlalchemy.orm import Query, Session
+from app.models.facet_count import FacetCount
+
+# Fields each list endpoint can facet on, by table name
+FACET_FIELDS = {
+    "contacts": ("status", "source", "country"),
+    "deals": ("stage", "currency"),
+    "tasks": ("priority", "task_type", "status"),
+}
+
+# Archived rows are counted under their archive table (see app.archive)
+FACET_FIELDS["deals_archive"] = FACET_FIELDS["deals"]
+FACET_FIELDS["tasks_archive"] = FACET_FIELDS["tasks"]
+
+# facet_counts.field/value of the per-owner row count
+TOTAL = "*"
+
+
+def parse_facets(model, facets: Optional[str]) -> List[str]:
+    """Validate a comma-separated ?facets= value against the model's facet fields"""
+    if not facets:
+        return []
+    allowed = FACET_FIELDS[model.__tablename__]
+    requested = list(dict.fromkeys(part.strip() for part in facets.split(",") if part.strip()))
+    unknown = [name for name in requested if name not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown facet(s): {', '.join(unknown)}; expected any of {', '.join(allowed)}"
+        )
+    return requested
+
+
+def count_facets(db: Session, model, owner_id: str, query: Query, fields: List[str],
+                 filtered: bool, entity: Optional[str] = None) -> Tuple[int, Dict[str, Dict[str, int]]]:
+    """Exact total and per-value counts for `query` (the list query without paging or ordering).
+
+    `entity` names the rollup to read when `model` is an alias, such as an
+    archive table's.
+    """
+    facets: Dict[str, Dict[str, int]] = {name: {} for name in fields}
+    if not filtered:
+        total = 0
+        rows = db.query(FacetCount.field, FacetCount.value, FacetCount.count).filter(
+            FacetCount.owner_id == owner_id,
+            FacetCount.entity == (entity or model.__tablename__),
+            FacetCount.field.in_(fields + [TOTAL]),
+            FacetCount.count > 0
+        )
+        for field, value, count in rows:
+            if field == TOTAL:
+                total = count
+            else:
+                facets[field][value] = count
+        return total, facets
+
+    query = query.order_by(None)
+    total = query.with_entities(func.count(model.id)).scalar()
+    for name in fields:
+        column = getattr(model, name)
+        for value, count in query.with_entities(column, func.count(model.id)).filter(
+                column.isnot(None)).group_by(column):
+            facets[name][value] = count
+    return total, facets
+
+
+def _upsert(table: str, field: str, value: str, row: str) -> str:
+    return (
+        f"INSERT INTO facet_counts (owner_id, entity, field, value, count) "
+        f"SELECT {row}.owner_id, '{table}', '{field}', {value}, 1 WHERE {value} IS NOT NULL "
+        f"ON CONFLICT (owner_id, entity, field, value) DO UPDATE SET count = count + 1;"
+    )
+
+
+def _decrement(table: str, field: str, value: str, row: str) -> str:
+    return (
+        f"UPDATE facet_counts SET count = count - 1 WHERE owner_id = {row}.owner_id "
+        f"AND entity = '{table}' AND field = '{field}' AND value = {value};"
+    )
+
+
+def rollup_triggers(table: str) -> List[str]:
+    """CREATE TRIGGER statements keeping facet_counts in step with `table`"""
+    fields = FACET_FIELDS[table]
+    inserts = [_upsert(table, TOTAL, f"'{TOTAL}'", "NEW")] + [_upsert(table, f, f"NEW.{f}", "NEW") for f in fields]
+    deletes = [_decrement(table, TOTAL, f"'{TOTAL}'", "OLD")] + [_decrement(table, f, f"OLD.{f}", "OLD") for f in fields]
+    statements = [
+        f"CREATE TRIGGER IF NOT EXISTS {table}_facets_insert AFTER INSERT ON {table} "
+        f"BEGIN {' '.join(inserts)} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_facets_delete AFTER DELETE ON {table} "
+        f"BEGIN {' '.join(deletes)} END",
+    ]
+    for field in fields:
+        statements.append(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_facets_{field}_update AFTER UPDATE OF {field} ON {table} "
+            f"WHEN OLD.{field} IS NOT NEW.{field} "
+            f"BEGIN {_decrement(table, field, f'OLD.{field}', 'OLD')} {_upsert(table, field, f'NEW.{field}', 'NEW')} END"
+        )
+    return statements
+
+
+def rollup_backfill(table: str) -> List[str]:
+    """Statements recomputing facet_counts for `table` from its current rows"""
+    statements = [
+        f"DELETE FROM facet_counts WHERE entity = '{table}'",
+        f"INSERT INTO facet_counts (owner_id, entity, field, value, count) "
+        f"SELECT owner_id, '{table}', '{TOTAL}', '{TOTAL}', COUNT(*) FROM {table} GROUP BY owner_id",
+    ]
+    for field in FACET_FIELDS[table]:
+        statements.append(
+            f"INSERT INTO facet_counts (owner_id, entity, field, value, count) "
+            f"SELECT owner_id, '{table}', '{field}', {field}, COUNT(*) FROM {table} "
+            f"WHERE {field} IS NOT NULL GROUP BY owner_id, {field}"
+        )
+    return statements
@@ -0,0 +1,73 @@
+from datetime import datetime
+from sqlalchemy import select, func, case, and_
+from sqlalchemy.orm import Session
+from app.models.deal_stage_transition import DealStageTransition
+
+# Forward order of the pipeline; closed_lost is terminal and ranks below everything
+PIPELINE_STAGES = ["lead", "qualified", "proposal", "negotiation", "closed_won"]
+STAGE_RANK = {stage: rank for rank, stage in enumerate(PIPELINE_STAGES)}
+
+
+def _rank(column):
+    return case(STAGE_RANK, value=column, else_=-1)
+
+
+def stage_funnel(db: Session, owner_id: str, start: datetime, end: datetime) -> list:
+    """Per-stage entries, exits and median days in stage for stages entered in [start, end).
+
+    A single statement: LEAD() over each deal's transitions yields the time a
+    stage was left and where the deal went next, then a second window ranks
+    stay durations per stage so the median is picked without another query.
+    """
+    t = DealStageTransition
+    window = {"partition_by": t.deal_id, "order_by": (t.changed_at, t.id)}
+    spans = select(
+        t.to_stage.label("stage"),
+        t.changed_at.label("entered_at"),
+        func.lead(t.to_stage).over(**window).label("next_stage"),
+        func.lead(t.changed_at).over(**window).label("left_at")
+    ).where(
+        t.owner_id == owner_id,
+        t.changed_at >= start
+    ).subquery()
+
+    days = func.julianday(spans.c.left_at) - func.julianday(spans.c.entered_at)
+    ranked = select(
+        spans.c.stage,
+        spans.c.next_stage,
+        days.label("days"),
+        func.row_number().over(
+            partition_by=spans.c.stage,
+            order_by=(spans.c.left_at.is_(None), days)
+        ).label("rn"),
+        func.count(spans.c.left_at).over(partition_by=spans.c.stage).label("exited")
+    ).where(spans.c.entered_at < end).subquery()
+
+    is_median_row = and_(
+        ranked.c.days.isnot(None),
+        ranked.c.rn.in_([(ranked.c.exited + 1) / 2, (ranked.c.exited + 2) / 2])
+    )
+    rows = db.execute(
+        select(
+            ranked.c.stage,
+            func.count(),
+            func.sum(case((_rank(ranked.c.next_stage) > _rank(ranked.c.stage), 1), else_=0)),
+            func.sum(case((ranked.c.next_stage == "closed_lost", 1), else_=0)),
+            func.sum(case((ranked.c.next_stage.is_(None), 1), else_=0)),
+            func.avg(case((is_median_row, ranked.c.days)))
+        ).group_by(ranked.c.stage)
+    ).all()
+
+    funnel = []
+    for stage, entered, advanced, lost, still_in_stage, median_days in rows:
+        funnel.append({
+            "stage": stage,
+            "entered": entered,
+            "advanced": advanced or 0,
+            "lost": lost or 0,
+            "still_in_stage": still_in_stage or 0,
+            "conversion_rate": round((advanced or 0) / entered * 100, 2) if entered else 0.0,
+            "median_days": round(median_days, 2) if median_days is not None else None,
+        })
+    funnel.sort(key=lambda row: (STAGE_RANK.get(row["stage"], len(PIPELINE_STAGES)), row["stage"]))
+    return funnel
@@ -0,0 +1,177 @@
+"""Cross-worker invalidation of in-process caches.
+
+Each uvicorn worker keeps its own in-memory state (the contact typeahead
+index, the reminder schedule), which writes handled by another worker do
+not update. Code that changes an owner's data publishes an
+(owner, topic) event; the bus appends it to the cache_invalidations table
+in the main database, and every worker polls that table for events from
+other processes and passes them to the handlers subscribed to the topic.
+
+Publishing only adds to an in-memory set; the bus thread writes the
+pending events in one insert and reads new ones in one range query on the
+primary key every INVALIDATION_POLL_INTERVAL seconds, so a cache is stale
+for at most about two intervals after a write elsewhere. Events are
+pruned after INVALIDATION_RETENTION seconds. A worker that has not polled
+for that long may have missed events, so its handlers are called with
+None, meaning every owner.
+
+Topics: "contacts" (suggest index) and "tasks" (reminder schedule).
+"""
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import delete, func, insert, select
+from app.config import get_settings
+from app.database import engine
+from app.metrics import register_metrics
+from app.models.invalidation import CacheInvalidation
+
+logger = logging.getLogger(__name__)
+
+# Old events are deleted every this many polls
+PRUNE_EVERY = 120
+
+
+class InvalidationBus:
+    """Publishes this process's (owner, topic) events and delivers other processes' events"""
+
+    def __init__(self, poll_interval: float, retention: float):
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.origin = uuid.uuid4().hex
+        self._handlers: Dict[str, List[Callable[[Optional[str]], None]]] = defaultdict(list)
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._last_seq = 0
+        self._last_poll = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self.counters = {"published": 0, "received": 0, "resets": 0, "failed": 0}
+        register_metrics("invalidation", self.stats)
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = len(self._pending)
+        return {**self.counters, "pending": pending, "last_seq": self._last_seq, "running": self._thread is not None}
+
+    def subscribe(self, topic: str, handler: Callable[[Optional[str]], None]):
+        """Call handler(owner_id) when another worker changes the owner's data; None means every owner"""
+        self._handlers[topic].append(handler)
+
+    def publish(self, owner_id: str, *topics: str):
+        """Announce a committed change to other workers; a no-op when the bus is not running"""
+        if self._thread is None:
+            return
+        with self._lock:
+            self._pending.update((owner_id, topic) for topic in topics)
+
+    def start(self):
+        table = CacheInvalidation.__table__
+        with engine.connect() as conn:
+            # Caches start empty, so earlier events are of no interest
+            self._last_seq = conn.execute(select(func.coalesce(func.max(table.c.seq), 0))).scalar()
+        self._last_poll = time.monotonic()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="invalidation-bus", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Write any pending events, then stop the bus thread"""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, set()
+        if not pending:
+            return
+        now = datetime.utcnow()
+        rows = [
+            {"owner_id": owner_id, "topic": topic, "origin": self.origin, "created_at": now}
+            for owner_id, topic in pending
+        ]
+        try:
+            with engine.begin() as conn:
+                conn.execute(insert(CacheInvalidation.__table__), rows)
+            self.counters["published"] += len(rows)
+        except Exception:
+            with self._lock:
+                self._pending |= pending  # retried on the next tick
+            raise
+
+    def _poll(self):
+        table = CacheInvalidation.__table__
+        with engine.connect() as conn:
+            rows = conn.execute(
+                select(table.c.seq, table.c.owner_id, table.c.topic, table.c.origin)
+                .where(table.c.seq > self._last_seq)
+                .order_by(table.c.seq)
+            ).all()
+        now = time.monotonic()
+        missed = now - self._last_poll > self.retention
+        self._last_poll = now
+        if missed:
+            self.counters["resets"] += 1
+            for topic in list(self._handlers):
+                self._dispatch(topic, None)
+        changed = set()
+        for seq, owner_id, topic, origin in rows:
+            self._last_seq = seq
+            if origin != self.origin:
+                changed.add((owner_id, topic))
+        self.counters["received"] += len(changed)
+        if not missed:
+            for owner_id, topic in changed:
+                self._dispatch(topic, owner_id)
+
+    def _dispatch(self, topic: str, owner_id: Optional[str]):
+        for handler in self._handlers.get(topic, ()):
+            try:
+                handler(owner_id)
+            except Exception:
+                self.counters["failed"] += 1
+                logger.exception("Invalidation handler for %r failed (owner %s)", topic, owner_id)
+
+    def _prune(self):
+        cutoff = datetime.utcnow() - timedelta(seconds=self.retention)
+        with engine.begin() as conn:
+            conn.execute(delete(CacheInvalidation.__table__).where(CacheInvalidation.created_at < cutoff))
+
+    def _run(self):
+        ticks = 0
+        while True:
+            stopping = self._stopping.wait(self.poll_interval)
+            try:
+                self._flush()
+                if stopping:
+                    return
+                self._poll()
+                ticks += 1
+                if ticks % PRUNE_EVERY == 0:
+                    self._prune()
+            except Exception:
+                logger.exception("Invalidation bus tick failed")
+                if stopping:
+                    return
+
+
+invalidation_bus = InvalidationBus(
+    get_settings().invalidation_poll_interval,
+    get_settings().invalidation_retention
+)
+
+
+def start_invalidation_bus():
+    if get_settings().invalidation_enabled:
+        invalidation_bus.start()
+
+
+def stop_invalidation_bus():
+    invalidation_bus.stop()
@@ -0,0 +1,315 @@
+import itertools
+import json
+import logging
+import queue
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+from sqlalchemy.orm import Session
+from app.config import get_settings
+from app.database import SessionLocal, get_tenant_engine
+from app.leases import PROCESS_ID
+from app.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+JOB_HANDLERS: Dict[str, Callable] = {}
+
+# Minimum seconds between progress writes; the final update is always written
+PROGRESS_INTERVAL = 0.5
+
+
+def job_handler(kind: str):
+    """Register a function as the handler for a job kind.
+
+    The handler receives a JobContext and may return a JSON-serialisable
+    result. Long handlers should call ctx.progress() periodically, which
+    also raises JobCancelled once a cancel has been requested.
+    """
+    def register(func: Callable) -> Callable:
+        JOB_HANDLERS[kind] = func
+        return func
+    return register
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobContext:
+    def __init__(self, job: Job):
+        self.job_id = job.id
+        self.owner_id = job.owner_id
+        self.params = json.loads(job.params) if job.params else {}
+        self._last_progress = 0.0
+
+    def tenant_session(self) -> Session:
+        """Session on the database holding the job owner's data"""
+        return SessionLocal(bind=get_tenant_engine(self.owner_id))
+
+    def progress(self, fraction: float, message: Optional[str] = None, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last_progress < PROGRESS_INTERVAL:
+            return
+        self._last_progress = now
+
+        db = SessionLocal()
+        try:
+            job = db.query(Job).filter(Job.id == self.job_id).first()
+            job.progress = max(0.0, min(fraction, 1.0))
+            if message is not None:
+                job.message = message
+            db.commit()
+            cancel_requested = job.cancel_requested
+        finally:
+            db.close()
+        if cancel_requested:
+            raise JobCancelled()
+
+
+class JobQueue:
+    """Bounded pool of worker threads running persisted jobs in priority order.
+
+    A claimed job carries the claiming process's runner id and a lease that
+    a background thread renews every third of `lease_seconds`. Several
+    processes share the jobs table, so a process starting up (or any
+    process, periodically) only fails running jobs whose lease has expired,
+    i.e. whose runner has gone away.
+    """
+
+    def __init__(self, lease_seconds: float = 60.0):
+        self.lease_seconds = lease_seconds
+        self.runner_id = PROCESS_ID
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._workers = []
+        self._leases: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def start(self, workers: int):
+        self._recover()
+        self._stopping.clear()
+        self._leases = threading.Thread(target=self._renew_leases, name="job-leases", daemon=True)
+        self._leases.start()
+        for i in range(workers):
+            worker = threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self, timeout: float = 5.0):
+        for _ in self._workers:
+            self._queue.put((float("inf"), next(self._sequence), None))
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+        if self._leases is not None:
+            self._stopping.set()
+            self._leases.join(timeout)
+            self._leases = None
+
+    def enqueue(self, db: Session, kind: str, owner_id: Optional[str] = None,
+                params: Optional[dict] = None, priority: int = 100) -> Job:
+        """Persist a job with the given directory session and queue it"""
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job = Job(
+            kind=kind,
+            owner_id=owner_id,
+            params=json.dumps(params) if params else None,
+            priority=priority
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        self._queue.put((priority, next(self._sequence), job.id))
+        return job
+
+    def cancel(self, db: Session, job: Job):
+        """Cancel a queued job immediately, or ask a running one to stop.
+
+        Both writes are conditional on the status, like _claim(): a job
+        claimed in the meantime gets a stop request instead, and its worker
+        finishes it as cancelled at the next progress report.
+        """
+        cancelled = db.query(Job).filter(Job.id == job.id, Job.status == "queued").update({
+            "status": "cancelled",
+            "finished_at": datetime.utcnow()
+        }, synchronize_session=False)
+        if not cancelled:
+            db.query(Job).filter(Job.id == job.id, Job.status == "running").update({
+                "cancel_requested": True
+            }, synchronize_session=False)
+        db.commit()
+
+    def _expire_abandoned(self, db: Session) -> int:
+        """Fail running jobs whose runner stopped renewing its lease (NULL: claimed before leases)"""
+        now = datetime.utcnow()
+        expired = db.query(Job).filter(
+            Job.status == "running",
+            (Job.lease_expires_at == None) | (Job.lease_expires_at < now)
+        ).update({
+            "status": "failed",
+            "error": "Interrupted: the process running it stopped",
+            "finished_at": now
+        }, synchronize_session=False)
+        db.commit()
+        return expired
+
+    def _renew_leases(self):
+        while not self._stopping.wait(self.lease_seconds / 3):
+            db = SessionLocal()
+            try:
+                db.query(Job).filter(Job.runner == self.runner_id, Job.status == "running").update({
+                    "lease_expires_at": datetime.utcnow() + timedelta(seconds=self.lease_seconds)
+                }, synchronize_session=False)
+                db.commit()
+                self._expire_abandoned(db)
+            except Exception:
+                logger.exception("Renewing job leases failed")
+            finally:
+                db.close()
+
+    def _recover(self):
+        """Requeue jobs persisted before a restart and fail running ones whose runner is gone"""
+        db = SessionLocal()
+        try:
+            self._expire_abandoned(db)
+            queued = db.query(Job.id, Job.priority).filter(Job.status == "queued").order_by(
+                Job.priority, Job.created_at
+            ).all()
+        finally:
+            db.close()
+        for job_id, priority in queued:
+            self._queue.put((priority, next(self._sequence), job_id))
+
+    def _claim(self, db: Session, job_id: str) -> Optional[Job]:
+        # Conditional update so a job is only ever run by one worker or process
+        now = datetime.utcnow()
+        claimed = db.query(Job).filter(Job.id == job_id, Job.status == "queued").update({
+            "status": "running",
+            "started_at": now,
+            "runner": self.runner_id,
+            "lease_expires_at": now + timedelta(seconds=self.lease_seconds)
+        })
+        db.commit()
+        if not claimed:
+            return None
+        return db.query(Job).filter(Job.id == job_id).first()
+
+    def _finish(self, job_id: str, **fields):
+        db = SessionLocal()
+        try:
+            fields["finished_at"] = datetime.utcnow()
+            fields["lease_expires_at"] = None
+            # A job failed after its lease lapsed keeps that outcome
+            finished = db.query(Job).filter(
+                Job.id == job_id, Job.runner == self.runner_id, Job.status == "running"
+            ).update(fields)
+            db.commit()
+            if not finished:
+                logger.warning("Job %s lost its lease before finishing; result dropped", job_id)
+        finally:
+            db.close()
+
+    def _run(self):
+        while True:
+            _, _, job_id = self._queue.get()
+            if job_id is None:
+                return
+
+            db = SessionLocal()
+            try:
+                job = self._claim(db, job_id)
+                if job is None:
+                    continue
+                kind = job.kind
+                ctx = JobContext(job)
+                handler = JOB_HANDLERS[kind]
+            finally:
+                db.close()
+
+            try:
+                result = handler(ctx)
+            except JobCancelled:
+                self._finish(job_id, status="cancelled")
+            except Exception:
+                logger.exception("Job %s (%s) failed", job_id, kind)
+                self._finish(job_id, status="failed", error=traceback.format_exc(limit=5))
+            else:
+                self._finish(
+                    job_id,
+                    status="succeeded",
+                    progress=1.0,
+                    result=json.dumps(result) if result is not None else None
+                )
+
+
+job_queue = JobQueue(get_settings().job_lease_seconds)
+
+
+def start_job_workers():
+    job_queue.start(get_settings().job_workers)
+
+
+def stop_job_workers():
+    job_queue.stop()
+
+
+@job_handler("seed")
+def run_seed(ctx: JobContext):
+    from app.seed_data import seed_example_data
+    from app.reminders import reminder_scheduler
+    from app.suggest import suggest_index
+    from app.ordering import rebalance_columns
+    from app.invalidation import invalidation_bus
+    # The seed is one transaction, so progress is reported around it: a
+    # progress write from inside would wait on the seed's own write lock
+    ctx.progress(0.0, "Creating example contacts, deals and tasks", force=True)
+    db = ctx.tenant_session()
+    try:
+        seed_example_data(db, ctx.owner_id)
+        rebalance_columns(db, ctx.owner_id)  # respaces the seeded deals among any the owner already had
+        db.commit()
+    finally:
+        db.close()
+    ctx.progress(0.8, "Loading reminders and search index", force=True)
+    reminder_scheduler.load(get_tenant_engine(ctx.owner_id), owner_id=ctx.owner_id)
+    suggest_index.invalidate(ctx.owner_id)
+    invalidation_bus.publish(ctx.owner_id, "contacts", "tasks")
+    return {"seeded": True}
+
+
+@job_handler("rebalance_positions")
+def run_rebalance_positions(ctx: JobContext):
+    """Respace the owner's pipeline positions (see app.ordering)"""
+    from app.ordering import rebalance_columns
+    db = ctx.tenant_session()
+    try:
+        updated = rebalance_columns(db, ctx.owner_id, ctx.params.get("stages"))
+        db.commit()
+    finally:
+        db.close()
+    return {"updated": updated}
+
+
+@job_handler("archive")
+def run_archive(ctx: JobContext):
+    """Move old closed deals and completed tasks to the archive tables (see app.archive)"""
+    from app.archive import archive_cutoff, archive_engine
+    from app.database import all_tenant_engines
+    cutoff = archive_cutoff(ctx.params.get("days"))
+    if cutoff is None:
+        return {"deals": 0, "tasks": 0}
+    engines = all_tenant_engines()
+    totals = {"deals": 0, "tasks": 0}
+    for i, bind in enumerate(engines):
+        # Progress writes also raise JobCancelled between batches
+        moved = archive_engine(
+            bind, cutoff, get_settings().archive_batch_size,
+            lambda counts: ctx.progress(i / len(engines), f"Archived {counts['deals']} deals, {counts['tasks']} tasks (database {i + 1} of {len(engines)})")
+        )
+        for entity, count in moved.items():
+            totals[entity] += count
+    return totals
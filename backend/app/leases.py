@@ -0,0 +1,48 @@
+"""Leader leases in the main database.
+
+Work that must happen once across all workers (sending a reminder to a
+webhook, say) is done only by the process holding the lease of that name.
+try_acquire() takes the lease when it is free or expired and extends it
+when this process already holds it, in one conditional upsert, so two
+processes asking at the same moment cannot both get it. A holder that
+stops asking loses the lease `ttl` seconds after its last renewal.
+"""
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from app.database import engine
+from app.models.lease import Lease
+
+# Identifies this process as a lease holder
+PROCESS_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaderLease:
+    def __init__(self, name: str, ttl: float):
+        self.name = name
+        self.ttl = ttl
+
+    def try_acquire(self) -> bool:
+        """Take or renew the lease; True when this process holds it afterwards"""
+        now = datetime.utcnow()
+        table = Lease.__table__
+        statement = insert(table).values(name=self.name, holder=PROCESS_ID, expires_at=now + timedelta(seconds=self.ttl))
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.name],
+            set_={"holder": statement.excluded.holder, "expires_at": statement.excluded.expires_at},
+            where=(table.c.holder == PROCESS_ID) | (table.c.expires_at < now)
+        )
+        with engine.begin() as conn:
+            conn.execute(statement)
+            holder = conn.execute(select(table.c.holder).where(table.c.name == self.name)).scalar()
+        return holder == PROCESS_ID
+
+    def release(self):
+        """Give the lease up early (on shutdown) so another process can take over at once"""
+        table = Lease.__table__
+        with engine.begin() as conn:
+            conn.execute(table.update().where(table.c.name == self.name, table.c.holder == PROCESS_ID)
+                         .values(expires_at=datetime.utcnow()))
@@ -0,0 +1,70 @@
+from typing import Dict, Iterable, List, Optional, Sequence
+from fastapi import Depends, HTTPException
+from sqlalchemy.orm import Session
+from app.auth import get_current_user
+from app.database import get_db
+from app.models.user import User
+
+# Largest ?ids= list accepted by the list endpoints
+MAX_BATCH_IDS = 500
+
+# Ids per IN (...) query; stays well under SQLite's bound-parameter limit
+IN_CHUNK = 500
+
+
+def parse_ids(ids: Optional[str]) -> Optional[List[str]]:
+    """Split a comma-separated ?ids= value, dropping blanks and repeats but keeping order"""
+    if ids is None:
+        return None
+    parsed = list(dict.fromkeys(part.strip() for part in ids.split(",") if part.strip()))
+    if len(parsed) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+    return parsed
+
+
+class BatchLoader:
+    """Request-scoped cache of one owner's entities by id.
+
+    Routers collect the ids they need and call load_many(); whatever is not
+    cached yet is fetched with one IN (...) query per model, so resolving
+    related entities for a page costs a query per model instead of one per
+    row. Rows already loaded for the response can be added with prime().
+    """
+
+    def __init__(self, db: Session, owner_id: str):
+        self.db = db
+        self.owner_id = owner_id
+        self._cache: Dict[type, Dict[str, object]] = {}
+
+    def prime(self, objects: Iterable):
+        for obj in objects:
+            self._cache.setdefault(type(obj), {})[obj.id] = obj
+
+    def load_many(self, model, ids: Iterable[Optional[str]], options: Sequence = ()) -> Dict[str, object]:
+        """Entities of `model` for the given ids; ids that do not exist (or belong to someone else) are left out.
+
+        `options` (eager loads) apply to the rows fetched by this call only.
+        """
+        cache = self._cache.setdefault(model, {})
+        wanted = list(dict.fromkeys(i for i in ids if i is not None))
+        missing = [i for i in wanted if i not in cache]
+        for start in range(0, len(missing), IN_CHUNK):
+            chunk = missing[start:start + IN_CHUNK]
+            for obj in self.db.query(model).options(*options).filter(
+                    model.owner_id == self.owner_id, model.id.in_(chunk)
+            ):
+                cache[obj.id] = obj
+            for i in chunk:
+                cache.setdefault(i, None)  # remember misses too
+        return {i: cache[i] for i in wanted if cache.get(i) is not None}
+
+    def load(self, model, id: Optional[str]):
+        return self.load_many(model, [id]).get(id) if id is not None else None
+
+
+def get_loader(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> BatchLoader:
+    """One loader per request: FastAPI caches dependency values for the request"""
+    return BatchLoader(db, current_user.id)
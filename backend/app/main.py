@@ -1,7 +1,7 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
-from app.database import engine, Base, get_db
+from app.database import get_directory_db
 from app.config import get_settings
 from app.routers import (
     auth_router,
@@ -9,14 +9,27 @@ from app.routers import (
     deals_router,
     tasks_router,
     analytics_router,
-    users_router
+    users_router,
+    activity_router,
+    jobs_router,
+    reminders_router,
+    bootstrap_router
 )
-from app.auth import get_current_user
+from app.auth import get_current_user, require_operator
 from app.models.user import User
-from app.seed_data import seed_example_data
-
-# Create database tables
-Base.metadata.create_all(bind=engine)
+from app.jobs import job_queue, start_job_workers, stop_job_workers
+from app.reminders import start_reminders, stop_reminders
+from app.audit import start_audit_writer, stop_audit_writer
+from app.invalidation import start_invalidation_bus, stop_invalidation_bus
+from app.archive import schedule_archive
+from app.slowlog import slow_query_log, start_slow_query_log, stop_slow_query_log
+from app.watchdog import start_loop_watchdog, stop_loop_watchdog
+from app.migrations import ensure_schema
+from app.compression import CompressionMiddleware
+from app.admission import AdmissionMiddleware
+from app.coalesce import SingleFlightMiddleware
+from app.request_context import RequestContextMiddleware
+from app.metrics import collect_metrics
 
 settings = get_settings()
 
@@ -27,6 +40,42 @@ app = FastAPI(
     redirect_slashes=False
 )
 
+# Middleware added last runs first: CORS wraps compression, then single-flight
+# (so coalesced requests never take an admission slot), then admission control,
+# then the request context read by the slow-query log and the loop watchdog
+app.add_middleware(RequestContextMiddleware)
+
+if settings.admission_enabled:
+    app.add_middleware(
+        AdmissionMiddleware,
+        rate=settings.rate_limit_per_second,
+        burst=settings.rate_limit_burst,
+        max_in_flight=settings.max_in_flight,
+        class_limits={
+            "analytics": settings.analytics_concurrency,
+            "list": settings.list_concurrency,
+            "read": settings.read_concurrency,
+            "write": settings.write_concurrency,
+        },
+        queue_timeout=settings.admission_queue_timeout,
+        exempt_paths=settings.admission_exempt_paths
+    )
+
+if settings.single_flight_enabled:
+    app.add_middleware(SingleFlightMiddleware)
+
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_min_size,
+        content_types=settings.compression_types,
+        gzip_level=settings.compression_gzip_level,
+        zstd_level=settings.compression_zstd_level,
+        brotli_quality=settings.compression_brotli_quality,
+        cache_paths=settings.compression_cache_paths,
+        cache_max_bytes=settings.compression_cache_bytes
+    )
+
 # CORS configuration
 app.add_middleware(
     CORSMiddleware,
@@ -43,6 +92,32 @@ app.include_router(deals_router, prefix="/api")
 app.include_router(tasks_router, prefix="/api")
 app.include_router(analytics_router, prefix="/api")
 app.include_router(users_router, prefix="/api")
+app.include_router(activity_router, prefix="/api")
+app.include_router(jobs_router, prefix="/api")
+app.include_router(reminders_router, prefix="/api")
+app.include_router(bootstrap_router, prefix="/api")
+
+
+@app.on_event("startup")
+def start_background_workers():
+    ensure_schema()
+    start_slow_query_log()
+    start_loop_watchdog()
+    start_invalidation_bus()
+    start_audit_writer()
+    start_job_workers()
+    schedule_archive()
+    start_reminders()
+
+
+@app.on_event("shutdown")
+def stop_background_workers():
+    stop_reminders()
+    stop_job_workers()
+    stop_audit_writer()
+    stop_invalidation_bus()
+    stop_slow_query_log()
+    stop_loop_watchdog()
 
 
 @app.get("/")
@@ -55,11 +130,26 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/api/metrics", dependencies=[Depends(require_operator)])
+async def metrics():
+    """Counters from admission control, compression and other request-path components"""
+    return collect_metrics()
+
+
+@app.get("/api/metrics/slow-queries", dependencies=[Depends(require_operator)])
+async def slow_queries(
+    limit: int = Query(20, ge=1, le=100),
+    sort: str = Query("total", pattern="^(total|max|count)$")
+):
+    """This worker's slowest statements by total, worst-case or count of slow executions"""
+    return slow_query_log.top(limit, sort)
+
+
 @app.post("/api/seed")
 async def seed_data(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_directory_db)
 ):
-    """Seed example data for the current user"""
-    seed_example_data(db, current_user.id)
-    return {"message": "Example data seeded successfully"}
+    """Seed example data for the current user in the background"""
+    job = job_queue.enqueue(db, "seed", owner_id=current_user.id, priority=10)
+    return {"message": "Example data seeding started", "job_id": job.id}
@@ -0,0 +1,261 @@
+"""Online backups and routine upkeep of the SQLite files, safe to run while the app serves.
+
+Usage:
+    python -m app.maintenance backup [--output DIR] [--pages 256] [--pause 0.05] [--verify]
+    python -m app.maintenance analyze [--full] [--pause 0.05]
+    python -m app.maintenance vacuum [--pages 256] [--pause 0.05] [--enable]
+    python -m app.maintenance check [--full]
+    python -m app.maintenance run
+
+Every command covers DATABASE_URL and, with SHARD_BY_OWNER, every shard
+file, and prints one report line per file with its duration and page
+counts (--json prints them as JSON objects). Work is split into short
+steps with a pause between them, so each step holds a lock only briefly
+and requests keep running alongside:
+
+- backup copies --pages pages per step through the SQLite backup API into
+  a new timestamped directory. A write from the app makes the copy start
+  over; after MAX_RESTARTS of those the rest of the file is copied in one
+  step, which holds off writers for as long as the copy takes. The report
+  counts the restarts.
+- analyze refreshes planner statistics one table at a time. It uses
+  PRAGMA analysis_limit unless --full is given, then runs PRAGMA optimize.
+- vacuum returns free pages to the filesystem --pages at a time with
+  incremental_vacuum. Files the app creates use auto_vacuum=INCREMENTAL
+  from the start; a file created before that is skipped until --enable
+  switches it over with a one-off VACUUM, which rewrites the whole file
+  and blocks writers while it runs.
+- check runs PRAGMA quick_check (integrity_check with --full) and exits
+  with status 1 when a file reports problems.
+
+``run`` does analyze, vacuum and check in that order, and is meant to be
+scheduled, e.g. nightly from cron: ``0 3 * * * cd backend && python -m app.maintenance run``.
+"""
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import List
+from app.config import get_settings
+from app.database import sqlite_path
+
+# Seconds a step waits for the app's write lock before giving up
+BUSY_TIMEOUT = 5.0
+
+# Restarts before a backup stops stepping and copies the file in one go
+MAX_RESTARTS = 3
+
+# Rows ANALYZE samples per index unless --full
+ANALYSIS_LIMIT = 1000
+
+
+def database_files() -> List[str]:
+    """The main database followed by any shard files"""
+    settings = get_settings()
+    paths = [sqlite_path(settings.database_url)]
+    if settings.shard_by_owner:
+        paths += sorted(glob.glob(os.path.join(settings.shard_dir, "*.db")))
+    return paths
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    if not os.path.exists(path):
+        raise SystemExit(f"No database at {path}")
+    return sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None)
+
+
+def _pragma(conn: sqlite3.Connection, name: str) -> int:
+    return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+
+def _report(step: str, path: str, started: float, conn: sqlite3.Connection, **details) -> dict:
+    return {
+        "step": step,
+        "database": path,
+        "seconds": round(time.perf_counter() - started, 3),
+        "pages": _pragma(conn, "page_count"),
+        "free_pages": _pragma(conn, "freelist_count"),
+        "page_size": _pragma(conn, "page_size"),
+        **details,
+    }
+
+
+class _Restarted(Exception):
+    pass
+
+
+def backup(path: str, target: str, pages: int, pause: float, verify: bool = False) -> dict:
+    """Copy a live database to `target` a few pages at a time"""
+    started = time.perf_counter()
+    source = _connect(path)
+    partial = f"{target}.partial"
+    if os.path.exists(partial):
+        os.remove(partial)
+    copy = sqlite3.connect(partial)
+    state = {"steps": 0, "restarts": 0, "remaining": None}
+
+    def progress(status, remaining, total):
+        state["steps"] += 1
+        if state["remaining"] is not None and remaining > state["remaining"]:
+            state["restarts"] += 1  # the source changed under the copy
+            if state["restarts"] >= MAX_RESTARTS:
+                raise _Restarted()
+        state["remaining"] = remaining
+        if remaining:
+            time.sleep(pause)  # backup() only sleeps when the source is locked
+
+    try:
+        try:
+            source.backup(copy, pages=pages, progress=progress)
+        except _Restarted:
+            source.backup(copy)  # writes keep outpacing the steps
+        problems = copy.execute("PRAGMA quick_check").fetchall() if verify else None
+    finally:
+        copy.close()
+    os.replace(partial, target)
+    details = {"target": target, "steps": state["steps"], "restarts": state["restarts"]}
+    if problems is not None:
+        details["verified"] = problems == [("ok",)]
+    try:
+        return _report("backup", path, started, source, **details)
+    finally:
+        source.close()
+
+
+def analyze(path: str, full: bool, pause: float) -> dict:
+    """Refresh planner statistics table by table, then let PRAGMA optimize do the rest"""
+    started = time.perf_counter()
+    conn = _connect(path)
+    try:
+        conn.execute(f"PRAGMA analysis_limit = {0 if full else ANALYSIS_LIMIT}")
+        tables = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )]
+        for table in tables:
+            conn.execute(f'ANALYZE "{table}"')
+            time.sleep(pause)
+        conn.execute("PRAGMA optimize")
+        return _report("analyze", path, started, conn, tables=len(tables), full=full)
+    finally:
+        conn.close()
+
+
+def vacuum(path: str, pages: int, pause: float, enable: bool) -> dict:
+    """Release free pages in small increments; --enable converts a file to incremental auto_vacuum first"""
+    started = time.perf_counter()
+    conn = _connect(path)
+    try:
+        before = _pragma(conn, "page_count")
+        mode = _pragma(conn, "auto_vacuum")
+        if mode != 2:
+            if not enable:
+                return _report("vacuum", path, started, conn, released=0,
+                               skipped="auto_vacuum is not INCREMENTAL; rerun with --enable")
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")  # rewrites the file; blocks writers until done
+        steps = 0
+        free = _pragma(conn, "freelist_count")
+        while free > 0:
+            # sqlite3 steps a statement without result columns only once, and
+            # each step frees one page, so a step is `pages` single-page runs
+            # in one short write transaction
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for _ in range(min(pages, free)):
+                    conn.execute("PRAGMA incremental_vacuum(1)")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            steps += 1
+            remaining = _pragma(conn, "freelist_count")
+            if remaining >= free:
+                break  # the app is freeing pages as fast; the next run continues
+            free = remaining
+            time.sleep(pause)
+        return _report("vacuum", path, started, conn, released=before - _pragma(conn, "page_count"),
+                       steps=steps, converted=mode != 2)
+    finally:
+        conn.close()
+
+
+def check(path: str, full: bool) -> dict:
+    started = time.perf_counter()
+    conn = _connect(path)
+    try:
+        rows = [row[0] for row in conn.execute("PRAGMA integrity_check" if full else "PRAGMA quick_check")]
+        problems = [] if rows == ["ok"] else rows
+        return _report("check", path, started, conn, ok=not problems, problems=problems[:20], full=full)
+    finally:
+        conn.close()
+
+
+def _print(report: dict, as_json: bool):
+    if as_json:
+        print(json.dumps(report))
+        return
+    size_mb = report["pages"] * report["page_size"] / 1_000_000
+    extra = ", ".join(
+        f"{key}={value}" for key, value in report.items()
+        if key not in ("step", "database", "seconds", "pages", "free_pages", "page_size")
+    )
+    print(f"{report['step']:<8} {report['database']}: {report['seconds']:.2f}s, "
+          f"{report['pages']} pages ({size_mb:.1f} MB), {report['free_pages']} free"
+          + (f", {extra}" if extra else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--json", action="store_true", help="Print reports as JSON lines")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    backup_parser = subparsers.add_parser("backup", help="Online copy of every database file")
+    backup_parser.add_argument("--output", default="./backups", help="Directory for timestamped backup sets")
+    backup_parser.add_argument("--pages", type=int, default=256, help="Pages copied per step")
+    backup_parser.add_argument("--pause", type=float, default=0.05, help="Seconds between steps")
+    backup_parser.add_argument("--verify", action="store_true", help="quick_check each copy")
+    analyze_parser = subparsers.add_parser("analyze", help="Refresh query planner statistics")
+    analyze_parser.add_argument("--full", action="store_true", help="Scan whole indexes instead of sampling")
+    analyze_parser.add_argument("--pause", type=float, default=0.05, help="Seconds between tables")
+    vacuum_parser = subparsers.add_parser("vacuum", help="Return free pages to the filesystem")
+    vacuum_parser.add_argument("--pages", type=int, default=256, help="Pages released per step")
+    vacuum_parser.add_argument("--pause", type=float, default=0.05, help="Seconds between steps")
+    vacuum_parser.add_argument("--enable", action="store_true", help="Switch to incremental auto_vacuum (one full VACUUM)")
+    check_parser = subparsers.add_parser("check", help="Verify database integrity")
+    check_parser.add_argument("--full", action="store_true", help="integrity_check instead of quick_check")
+    subparsers.add_parser("run", help="analyze, vacuum and check with default settings")
+    args = parser.parse_args()
+
+    paths = database_files()
+    reports = []
+    if args.command == "backup":
+        target_dir = os.path.join(args.output, datetime.utcnow().strftime("%Y%m%d-%H%M%S"))
+        os.makedirs(target_dir)
+        for path in paths:
+            target = os.path.join(target_dir, os.path.basename(path))
+            if path != paths[0]:
+                os.makedirs(os.path.join(target_dir, "shards"), exist_ok=True)
+                target = os.path.join(target_dir, "shards", os.path.basename(path))
+            reports.append(backup(path, target, args.pages, args.pause, args.verify))
+            _print(reports[-1], args.json)
+    else:
+        steps = ["analyze", "vacuum", "check"] if args.command == "run" else [args.command]
+        for step in steps:
+            for path in paths:
+                if step == "analyze":
+                    report = analyze(path, getattr(args, "full", False), getattr(args, "pause", 0.05))
+                elif step == "vacuum":
+                    report = vacuum(path, getattr(args, "pages", 256), getattr(args, "pause", 0.05),
+                                    getattr(args, "enable", False))
+                else:
+                    report = check(path, getattr(args, "full", False))
+                reports.append(report)
+                _print(report, args.json)
+    if any(report.get("ok") is False or report.get("verified") is False for report in reports):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+from typing import Callable, Dict
+
+METRIC_SOURCES: Dict[str, Callable[[], dict]] = {}
+
+
+def register_metrics(name: str, source: Callable[[], dict]):
+    """Expose a component's counters under `name` in GET /api/metrics"""
+    METRIC_SOURCES[name] = source
+
+
+def collect_metrics() -> dict:
+    return {name: source() for name, source in METRIC_SOURCES.items()}
@@ -0,0 +1,106 @@
+"""Convert UUID key columns between TEXT and 16-byte BLOB storage.
+
+Usage:
+    python -m app.migrate_ids --to compact [--database ./crm.db]
+    python -m app.migrate_ids --to text [--database ./crm.db]
+
+All GUID columns (primary keys and the foreign keys pointing at them) are
+rewritten in a single transaction, then the file is VACUUMed so the space
+is actually reclaimed. Without --database, the main database and, with
+SHARD_BY_OWNER, every shard file in SHARD_DIR are converted, one file at a
+time; already converted keys are left as they are, so a run that stops
+part way can simply be repeated. Set COMPACT_IDS to match the new storage
+before starting the app again.
+"""
+import argparse
+import glob
+import os
+import sqlite3
+import time
+import uuid
+from app.config import get_settings
+from app.database import Base, sqlite_path
+from app.models.types import GUID
+import app.models  # noqa: F401  (register all tables on Base.metadata)
+
+
+def _to_blob(value):
+    if isinstance(value, str):
+        try:
+            return uuid.UUID(value).bytes
+        except ValueError:
+            return value
+    return value
+
+
+def _to_text(value):
+    if isinstance(value, bytes) and len(value) == 16:
+        return str(uuid.UUID(bytes=value))
+    return value
+
+
+def guid_columns():
+    """Map table name -> names of its GUID columns"""
+    columns = {}
+    for table in Base.metadata.sorted_tables:
+        names = [c.name for c in table.columns if isinstance(c.type, GUID)]
+        if names:
+            columns[table.name] = names
+    return columns
+
+
+def migrate(path: str, to: str) -> dict:
+    convert = _to_blob if to == "compact" else _to_text
+    size_before = os.path.getsize(path)
+    started = time.perf_counter()
+
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.create_function("convert_key", 1, convert, deterministic=True)
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    rows = 0
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        for table, names in guid_columns().items():
+            if table not in existing:
+                continue
+            assignments = ", ".join(f"{name} = convert_key({name})" for name in names)
+            rows += conn.execute(f"UPDATE {table} SET {assignments}").rowcount
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("VACUUM")
+    conn.close()
+
+    return {
+        "rows": rows,
+        "seconds": round(time.perf_counter() - started, 2),
+        "size_before": size_before,
+        "size_after": os.path.getsize(path),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--to", choices=["compact", "text"], required=True)
+    parser.add_argument("--database", default=None, help="SQLite file (defaults to DATABASE_URL)")
+    args = parser.parse_args()
+
+    if args.database:
+        paths = [args.database]
+    else:
+        settings = get_settings()
+        paths = [sqlite_path(settings.database_url)]
+        if settings.shard_by_owner:
+            paths += sorted(glob.glob(os.path.join(settings.shard_dir, "*.db")))
+    for path in paths:
+        report = migrate(path, args.to)
+        print(
+            f"{path}: rewrote {report['rows']} rows in {report['seconds']}s; "
+            f"{report['size_before']:,} -> {report['size_after']:,} bytes"
+        )
+    print(f"Set COMPACT_IDS={'true' if args.to == 'compact' else 'false'} before restarting the app")
+
+
+if __name__ == "__main__":
+    main()
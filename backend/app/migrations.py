@@ -0,0 +1,260 @@
+"""Versioned schema migrations for the main database and shard files.
+
+Usage:
+    python -m app.migrations upgrade [--database sqlite:///./crm.db]
+    python -m app.migrations status [--database sqlite:///./crm.db]
+
+The applied version is kept in SQLite's ``PRAGMA user_version``, so checking
+whether a database is current costs one pragma read and no table scans.
+Add a migration by appending a function decorated with ``@migration(n)``;
+each step receives the open connection and the tables that belong to the
+database being upgraded (every table for the main database, the per-owner
+tables for a shard file).
+"""
+import argparse
+import logging
+from typing import Callable, List, Optional
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS: List[tuple] = []  # (version, description, step)
+
+
+def migration(version: int):
+    def register(step: Callable) -> Callable:
+        MIGRATIONS.append((version, (step.__doc__ or step.__name__).strip(), step))
+        MIGRATIONS.sort(key=lambda entry: entry[0])
+        return step
+    return register
+
+
+def latest_version() -> int:
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def schema_version(bind: Engine) -> int:
+    with bind.connect() as conn:
+        return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def _add_missing_columns(conn: Connection, table, names):
+    """ALTER TABLE ... ADD COLUMN for columns a table created by an older version lacks"""
+    existing = {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table.name})")}
+    for name in names:
+        if name not in existing:
+            column = table.c[name]
+            conn.exec_driver_sql(
+                f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(conn.dialect)}"
+            )
+
+
+def _create_missing(conn: Connection, tables):
+    # checkfirst keeps this safe on databases created by the old create_all
+    # path, and picks up indexes added to existing tables since then
+    for table in tables:
+        table.create(conn, checkfirst=True)
+        existing = {row[1] for row in conn.exec_driver_sql(f"PRAGMA index_list({table.name})")}
+        columns = {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table.name})")}
+        for index in table.indexes:
+            # An index on a column added by a later migration is created by that step
+            if index.name not in existing and all(column.name in columns for column in index.columns):
+                index.create(conn)
+
+
+@migration(1)
+def initial_schema(conn: Connection, tables):
+    """Create tables and indexes"""
+    _create_missing(conn, tables)
+
+
+@migration(2)
+def facet_rollups(conn: Connection, tables):
+    """Add facet_counts with its maintenance triggers and backfill it"""
+    from app.facets import FACET_FIELDS, rollup_backfill, rollup_triggers
+    _create_missing(conn, tables)
+    names = {table.name for table in tables}
+    for table in FACET_FIELDS:
+        if table in names and "facet_counts" in names:
+            for statement in rollup_triggers(table) + rollup_backfill(table):
+                conn.exec_driver_sql(statement)
+
+
+@migration(3)
+def audit_log(conn: Connection, tables):
+    """Add audit_log for field-level change history"""
+    _create_missing(conn, tables)
+
+
+@migration(4)
+def deal_positions(conn: Connection, tables):
+    """Add deals.position for board ordering and number existing columns"""
+    from app.ordering import rebalance_columns
+    deals = next((table for table in tables if table.name == "deals"), None)
+    if deals is None:
+        return
+    if conn.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'deals'").first():
+        _add_missing_columns(conn, deals, ["position"])
+    _create_missing(conn, tables)
+    for (owner_id,) in conn.exec_driver_sql("SELECT DISTINCT owner_id FROM deals").fetchall():
+        rebalance_columns(conn, owner_id)
+
+
+@migration(5)
+def cache_invalidations(conn: Connection, tables):
+    """Add cache_invalidations for the cross-worker invalidation bus"""
+    _create_missing(conn, tables)
+
+
+@migration(6)
+def archive_tables(conn: Connection, tables):
+    """Add deals_archive, tasks_archive and archive_summaries with their triggers"""
+    from app.archive import summary_triggers
+    from app.facets import rollup_triggers
+    _create_missing(conn, tables)
+    names = {table.name for table in tables}
+    if {"deals_archive", "tasks_archive", "archive_summaries", "facet_counts"} <= names:
+        for statement in rollup_triggers("deals_archive") + rollup_triggers("tasks_archive") + summary_triggers():
+            conn.exec_driver_sql(statement)
+
+
+@migration(7)
+def activity_backfill(conn: Connection, tables):
+    """Record created/completed activities for rows that predate the activity log"""
+    names = {table.name for table in tables}
+    if "activities" not in names:
+        return
+    # Rows written since the log existed already have their events
+    conn.exec_driver_sql(
+        "CREATE TEMP TABLE logged_activities AS SELECT DISTINCT entity_id, action FROM activities"
+    )
+    conn.exec_driver_sql("CREATE INDEX temp.ix_logged_activities ON logged_activities (entity_id, action)")
+    sources = [
+        ("contact", "contacts", "coalesce(first_name, '') || ' ' || coalesce(last_name, '')", "created", "created_at", "1"),
+        ("deal", "deals", "title", "created", "created_at", "1"),
+        ("deal", "deals_archive", "title", "created", "created_at", "1"),
+        ("task", "tasks", "title", "created", "created_at", "1"),
+        ("task", "tasks_archive", "title", "created", "created_at", "1"),
+        ("task", "tasks", "title", "completed", "coalesce(completed_at, updated_at)", "is_completed"),
+        ("task", "tasks_archive", "title", "completed", "coalesce(completed_at, updated_at)", "is_completed"),
+    ]
+    for entity, table, title, action, ts, condition in sources:
+        if table not in names:
+            continue
+        conn.exec_driver_sql(
+            f"INSERT INTO activities (owner_id, entity_type, entity_id, action, title, ts) "
+            f"SELECT owner_id, '{entity}', id, '{action}', {title}, coalesce({ts}, CURRENT_TIMESTAMP) FROM {table} "
+            f"WHERE {condition} AND NOT EXISTS (SELECT 1 FROM logged_activities "
+            f"WHERE entity_id = {table}.id AND action = '{action}')"
+        )
+    conn.exec_driver_sql("DROP TABLE logged_activities")
+
+
+@migration(8)
+def job_leases(conn: Connection, tables):
+    """Add jobs.runner and jobs.lease_expires_at so only abandoned jobs are recovered"""
+    jobs = next((table for table in tables if table.name == "jobs"), None)
+    if jobs is None:
+        return
+    if conn.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'jobs'").first():
+        _add_missing_columns(conn, jobs, ["runner", "lease_expires_at"])
+    _create_missing(conn, tables)
+
+
+@migration(9)
+def leases(conn: Connection, tables):
+    """Add leases for work done by one worker at a time"""
+    _create_missing(conn, tables)
+
+
+@migration(10)
+def task_refresh_index(conn: Connection, tables):
+    """Index tasks by (owner_id, updated_at) for the reminder schedule's refresh"""
+    _create_missing(conn, tables)
+
+
+@migration(11)
+def deal_position_backfill(conn: Connection, tables):
+    """Position every deal and index (owner_id, stage, position, id), the board's full sort order"""
+    from app.ordering import rebalance_columns
+    if "deals" not in {table.name for table in tables}:
+        return
+    conn.exec_driver_sql("DROP INDEX IF EXISTS ix_deals_owner_stage_position")
+    _create_missing(conn, tables)
+    for owner_id, stage in conn.exec_driver_sql(
+        "SELECT DISTINCT owner_id, stage FROM deals WHERE position IS NULL"
+    ).fetchall():
+        rebalance_columns(conn, owner_id, [stage])
+
+
+def migrate(bind: Engine, tables=None) -> int:
+    """Bring a database up to the latest version; returns the number of steps applied"""
+    if schema_version(bind) >= latest_version():
+        return 0
+
+    import app.models  # noqa: F401  (register all tables on Base.metadata)
+    from app.database import Base
+    if tables is None:
+        tables = Base.metadata.sorted_tables
+
+    applied = 0
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        # The write lock serialises workers starting at the same time; the
+        # version is re-read under it so each step runs exactly once
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            current = conn.exec_driver_sql("PRAGMA user_version").scalar()
+            for version, description, step in MIGRATIONS:
+                if version <= current:
+                    continue
+                logger.info("Applying migration %d: %s", version, description)
+                step(conn, tables)
+                conn.exec_driver_sql(f"PRAGMA user_version = {int(version)}")
+                applied += 1
+            conn.exec_driver_sql("COMMIT")
+        except Exception:
+            conn.exec_driver_sql("ROLLBACK")
+            raise
+    return applied
+
+
+def ensure_schema(bind: Optional[Engine] = None):
+    """Startup check: migrate when AUTO_MIGRATE is on, otherwise refuse to serve an old schema"""
+    from app.config import get_settings
+    from app.database import engine
+    bind = bind or engine
+    if get_settings().auto_migrate:
+        migrate(bind)
+        return
+    version = schema_version(bind)
+    if version < latest_version():
+        raise RuntimeError(
+            f"Database schema is at version {version}, expected {latest_version()}; "
+            "run `python -m app.migrations upgrade`"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["upgrade", "status"])
+    parser.add_argument("--database", default=None, help="SQLAlchemy URL (defaults to DATABASE_URL)")
+    args = parser.parse_args()
+
+    from app.config import get_settings
+    from app.database import engine, all_tenant_engines
+    settings = get_settings()
+    bind = create_engine(args.database) if args.database else engine
+
+    if args.command == "status":
+        print(f"Schema version {schema_version(bind)} (latest {latest_version()})")
+        return
+
+    print(f"Applied {migrate(bind)} migrations to {bind.url}")
+    if settings.shard_by_owner and not args.database:
+        # Opening a shard runs its migrations
+        print(f"Checked {len(all_tenant_engines())} shard files")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,5 +2,13 @@ from app.models.user import User
 from app.models.contact import Contact
 from app.models.deal import Deal
 from app.models.task import Task
+from app.models.deal_stage_transition import DealStageTransition
+from app.models.activity import Activity
+from app.models.job import Job
+from app.models.facet_count import FacetCount
+from app.models.audit import AuditEntry
+from app.models.invalidation import CacheInvalidation
+from app.models.lease import Lease
+from app.models.archive import ArchiveSummary, deals_archive, tasks_archive
 
-__all__ = ["User", "Contact", "Deal", "Task"]
+__all__ = ["User", "Contact", "Deal", "Task", "DealStageTransition", "Activity", "Job", "FacetCount", "AuditEntry", "CacheInvalidation", "Lease", "ArchiveSummary", "deals_archive", "tasks_archive"]
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Index
+from datetime import datetime
+from app.database import Base
+from app.models.types import GUID
+
+
+class Activity(Base):
+    """Append-only timeline of create/update/complete/delete events"""
+    __tablename__ = "activities"
+    __table_args__ = (
+        Index("ix_activities_owner_ts", "owner_id", "ts", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    owner_id = Column(String, ForeignKey("users.id"), nullable=False)
+    
+    entity_type = Column(String, nullable=False)  # contact, deal, task
+    entity_id = Column(GUID, nullable=False)  # no FK: deleted entities keep their history
+    action = Column(String, nullable=False)  # created, updated, completed, deleted
+    title = Column(String, nullable=False)
+    
+    ts = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,43 @@
+from sqlalchemy import Column, String, Integer, Float, Table, Index
+from app.database import Base
+from app.models.deal import Deal
+from app.models.task import Task
+
+
+def _archive_table(model, name: str, *indexes) -> Table:
+    """A table with the columns of `model`'s table, minus defaults and foreign keys.
+
+    Rows are copied in by app.archive with explicit column lists, so a
+    column added to the hot table needs adding here by the same migration.
+    """
+    columns = [
+        Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable)
+        for column in model.__table__.columns
+    ]
+    return Table(name, Base.metadata, *columns, *indexes)
+
+
+# Closed deals and completed tasks past ARCHIVE_AFTER_DAYS (see app.archive)
+deals_archive = _archive_table(
+    Deal, "deals_archive",
+    Index("ix_deals_archive_owner_created", "owner_id", "created_at"),
+    Index("ix_deals_archive_contact", "contact_id"),
+)
+tasks_archive = _archive_table(
+    Task, "tasks_archive",
+    Index("ix_tasks_archive_owner_due", "owner_id", "due_date"),
+    Index("ix_tasks_archive_contact", "contact_id"),
+)
+
+
+class ArchiveSummary(Base):
+    """Per-month counts (and deal value) of archived rows, maintained by triggers (see app.archive)"""
+    __tablename__ = "archive_summaries"
+    __table_args__ = {"info": {"derived": True}}
+    
+    owner_id = Column(String, primary_key=True)
+    entity = Column(String, primary_key=True)  # deals, tasks
+    status = Column(String, primary_key=True)  # deal stage or task status; "" when unset
+    period = Column(String, primary_key=True)  # YYYY-MM of the close or completion date; "" when unset
+    count = Column(Integer, nullable=False, default=0)
+    value = Column(Float, nullable=False, default=0.0)  # sum of deal values
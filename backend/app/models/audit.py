@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Text, Index
+from datetime import datetime
+from app.database import Base
+from app.models.types import GUID
+
+
+class AuditEntry(Base):
+    """One field change on a contact, deal or task; written in batches by app.audit"""
+    __tablename__ = "audit_log"
+    __table_args__ = (
+        Index("ix_audit_log_entity", "owner_id", "entity_type", "entity_id", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    owner_id = Column(String, ForeignKey("users.id"), nullable=False)
+    
+    entity_type = Column(String, nullable=False)  # contact, deal, task
+    entity_id = Column(GUID, nullable=False)  # no FK: history outlives deleted entities
+    field = Column(String, nullable=False)
+    old_value = Column(Text, nullable=True)  # JSON
+    new_value = Column(Text, nullable=True)  # JSON
+    changed_by = Column(String, nullable=False)
+    changed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -2,13 +2,13 @@ from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Integer
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
-import uuid
+from app.models.types import GUID, new_id
 
 
 class Contact(Base):
     __tablename__ = "contacts"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(GUID, primary_key=True, default=new_id)
     owner_id = Column(String, ForeignKey("users.id"), nullable=False)
     
     # Basic info
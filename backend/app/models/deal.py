@@ -1,16 +1,19 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Float, Integer
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Float, Integer, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
-import uuid
+from app.models.types import GUID, new_id
 
 
 class Deal(Base):
     __tablename__ = "deals"
+    __table_args__ = (
+        Index("ix_deals_owner_stage_position_id", "owner_id", "stage", "position", "id"),
+    )
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(GUID, primary_key=True, default=new_id)
     owner_id = Column(String, ForeignKey("users.id"), nullable=False)
-    contact_id = Column(String, ForeignKey("contacts.id"), nullable=True)
+    contact_id = Column(GUID, ForeignKey("contacts.id"), nullable=True)
     
     # Deal info
     title = Column(String, nullable=False)
@@ -20,6 +23,7 @@ class Deal(Base):
     # Pipeline stage
     stage = Column(String, default="lead")  # lead, qualified, proposal, negotiation, closed_won, closed_lost
     probability = Column(Integer, default=10)  # 0-100%
+    position = Column(String, nullable=True)  # fractional index within the stage's board column (see app.ordering); set on every write
     
     # Dates
     expected_close_date = Column(DateTime, nullable=True)
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Index
+from datetime import datetime
+from app.database import Base
+from app.models.types import GUID
+
+
+class DealStageTransition(Base):
+    """Append-only log of deal stage changes (from_stage is NULL on creation)"""
+    __tablename__ = "deal_stage_transitions"
+    __table_args__ = (
+        Index("ix_deal_stage_transitions_owner_changed", "owner_id", "changed_at"),
+        Index("ix_deal_stage_transitions_deal_changed", "deal_id", "changed_at"),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    owner_id = Column(String, ForeignKey("users.id"), nullable=False)
+    deal_id = Column(GUID, nullable=False)  # no FK: history outlives deleted deals
+    
+    from_stage = Column(String, nullable=True)
+    to_stage = Column(String, nullable=False)
+    changed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, Integer
+from app.database import Base
+
+
+class FacetCount(Base):
+    """Per-owner row counts by field value, maintained by triggers (see app.facets).
+
+    Derived data: shard moves skip it and the triggers on the target
+    rebuild it as the owner's rows are copied in.
+    """
+    __tablename__ = "facet_counts"
+    __table_args__ = {"info": {"derived": True}}
+    
+    owner_id = Column(String, primary_key=True)
+    entity = Column(String, primary_key=True)  # table name
+    field = Column(String, primary_key=True)  # column name, or "*" for the row count
+    value = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
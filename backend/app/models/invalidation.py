@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, DateTime, Integer
+from datetime import datetime
+from app.database import Base
+
+
+class CacheInvalidation(Base):
+    """A "data changed" event for one owner, read by the other workers (see app.invalidation)"""
+    __tablename__ = "cache_invalidations"
+    __table_args__ = {
+        "sqlite_autoincrement": True,  # never reuse a seq after pruning, pollers read seq > last seen
+        "info": {"directory": True},
+    }
+    
+    seq = Column(Integer, primary_key=True)
+    owner_id = Column(String, nullable=False)
+    topic = Column(String, nullable=False)  # contacts, tasks
+    origin = Column(String, nullable=False)  # publishing process, which skips its own events
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,38 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Integer, Float, Boolean, Index
+from datetime import datetime
+from app.database import Base
+from app.models.types import GUID, new_id
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_status_priority", "status", "priority", "created_at"),
+        Index("ix_jobs_owner_created", "owner_id", "created_at"),
+        {"info": {"directory": True}},  # stays in the main database when sharding
+    )
+    
+    id = Column(GUID, primary_key=True, default=new_id)
+    owner_id = Column(String, ForeignKey("users.id"), nullable=True)  # NULL for system jobs
+    
+    # What to run
+    kind = Column(String, nullable=False)
+    params = Column(Text, nullable=True)  # JSON
+    priority = Column(Integer, default=100)  # lower runs first
+    
+    # State
+    status = Column(String, default="queued")  # queued, running, succeeded, failed, cancelled
+    progress = Column(Float, default=0.0)  # 0.0 - 1.0
+    message = Column(String, nullable=True)
+    result = Column(Text, nullable=True)  # JSON
+    error = Column(Text, nullable=True)
+    cancel_requested = Column(Boolean, default=False)
+    
+    # Lease held by the process running the job (see JobQueue._renew_leases)
+    runner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
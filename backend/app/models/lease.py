@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, DateTime
+from app.database import Base
+
+
+class Lease(Base):
+    """A named role held by one process at a time until expires_at (see app.leases)"""
+    __tablename__ = "leases"
+    __table_args__ = {"info": {"directory": True}}
+    
+    name = Column(String, primary_key=True)
+    holder = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
@@ -1,16 +1,21 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
-import uuid
+from app.models.types import GUID, new_id
 
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        Index("ix_tasks_open_due", "is_completed", "due_date"),
+        Index("ix_tasks_owner_open_due", "owner_id", "is_completed", "due_date"),
+        Index("ix_tasks_owner_updated", "owner_id", "updated_at"),
+    )
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(GUID, primary_key=True, default=new_id)
     owner_id = Column(String, ForeignKey("users.id"), nullable=False)
-    contact_id = Column(String, ForeignKey("contacts.id"), nullable=True)
+    contact_id = Column(GUID, ForeignKey("contacts.id"), nullable=True)
     
     # Task info
     title = Column(String, nullable=False)
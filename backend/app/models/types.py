@@ -0,0 +1,58 @@
+import os
+import time
+import uuid
+from sqlalchemy.types import TypeDecorator, String, LargeBinary
+from app.config import get_settings
+
+
+def uuid7() -> uuid.UUID:
+    """Generate a time-ordered UUIDv7 (48-bit ms timestamp + 74 random bits)"""
+    timestamp_ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")
+    value = (timestamp_ms & ((1 << 48) - 1)) << 80
+    value |= 0x7 << 76  # version
+    value |= ((rand >> 62) & 0xFFF) << 64  # rand_a
+    value |= 0b10 << 62  # RFC 4122 variant
+    value |= rand & ((1 << 62) - 1)  # rand_b
+    return uuid.UUID(int=value)
+
+
+def new_id() -> str:
+    """Primary key default: time-ordered so inserts append to the end of the index"""
+    return str(uuid7())
+
+
+def compact_ids_enabled() -> bool:
+    return get_settings().compact_ids
+
+
+class GUID(TypeDecorator):
+    """UUID column exposed as a string.
+
+    Stored as TEXT by default, or as a 16-byte BLOB when ``compact_ids`` is
+    enabled. Values that are not valid UUIDs are bound as raw bytes so that
+    lookups for them simply miss instead of failing.
+    """
+
+    impl = String
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if compact_ids_enabled():
+            return dialect.type_descriptor(LargeBinary(16))
+        return dialect.type_descriptor(String())
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, bytes) or not compact_ids_enabled():
+            return value
+        try:
+            return uuid.UUID(str(value)).bytes
+        except ValueError:
+            return str(value).encode()
+
+    def process_result_value(self, value, dialect):
+        if isinstance(value, bytes):
+            if len(value) == 16:
+                return str(uuid.UUID(bytes=value))
+            return value.decode()
+        return value
@@ -0,0 +1,113 @@
+"""Fractional-index ordering of deals within a pipeline column.
+
+Each deal has a `position` string; a column is sorted by (position, id).
+Moving a card computes a key strictly between its new neighbours' keys,
+so a move writes only the moved row. Keys are digit strings in base 62
+(ASCII order, so SQLite compares them with plain string comparison) that
+never end in "0", which guarantees a key exists between any two of them.
+
+Repeated inserts at the same spot make keys grow by about one character
+per six moves. When a move produces a key longer than REBALANCE_KEY_LENGTH
+a background job rewrites that owner's columns with short evenly spaced
+keys, preserving their order.
+"""
+from typing import List, Optional
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import Session
+from app.jobs import job_queue
+from app.models.deal import Deal
+from app.models.job import Job
+
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+
+REBALANCE_KEY_LENGTH = 16
+
+
+def key_between(before: Optional[str], after: Optional[str]) -> str:
+    """A key sorting strictly after `before` and before `after` (None means open-ended)"""
+    if before is not None and after is not None and before >= after:
+        raise ValueError(f"{before!r} is not below {after!r}")
+    return _midpoint(before or "", after)
+
+
+def _midpoint(low: str, high: Optional[str]) -> str:
+    if high is not None:
+        # Shared leading digits (padding low with "0") carry over unchanged
+        n = 0
+        while n < len(high) and (low[n] if n < len(low) else "0") == high[n]:
+            n += 1
+        if n > 0:
+            return high[:n] + _midpoint(low[n:], high[n:])
+    low_digit = DIGITS.index(low[0]) if low else 0
+    high_digit = DIGITS.index(high[0]) if high is not None else BASE
+    if high_digit - low_digit > 1:
+        return DIGITS[(low_digit + high_digit) // 2]
+    # Adjacent first digits
+    if high is not None and len(high) > 1:
+        return high[:1]
+    return DIGITS[low_digit] + _midpoint(low[1:], None)
+
+
+def spaced_keys(count: int) -> List[str]:
+    """`count` ascending keys of equal, minimal length, spread across the key space"""
+    width = 1
+    while BASE ** width - 1 < count * 2:
+        width += 1
+    step = (BASE ** width) // (count + 1)
+    keys = []
+    for i in range(1, count + 1):
+        value = i * step
+        digits = []
+        for _ in range(width):
+            value, digit = divmod(value, BASE)
+            digits.append(DIGITS[digit])
+        keys.append("".join(reversed(digits)).rstrip("0"))
+    return keys
+
+
+def top_position(db: Session, owner_id: str, stage: str) -> str:
+    """Key for a card placed at the top of a column"""
+    first = db.query(func.min(Deal.position)).filter(Deal.owner_id == owner_id, Deal.stage == stage).scalar()
+    return key_between(None, first)
+
+
+def rebalance_columns(db, owner_id: str, stages: Optional[List[str]] = None) -> int:
+    """Rewrite positions with evenly spaced keys in current board order; returns rows updated.
+
+    `db` is a Session or a Connection (migrations backfill through this too).
+    Deals without a position (seeded or imported) go after the rest, newest
+    first. updated_at is left alone. The caller commits.
+    """
+    table = Deal.__table__
+    if stages is None:
+        stages = list(db.execute(select(table.c.stage).where(table.c.owner_id == owner_id).distinct()).scalars())
+    changes = []
+    for stage in stages:
+        rows = db.execute(
+            select(table.c.id, table.c.position)
+            .where(table.c.owner_id == owner_id, table.c.stage == stage)
+            .order_by(table.c.position.asc().nullslast(), table.c.created_at.desc(), table.c.id)
+        ).all()
+        for (deal_id, position), key in zip(rows, spaced_keys(len(rows))):
+            if position != key:
+                changes.append({"deal_id": deal_id, "key": key})
+    if changes:
+        db.execute(
+            update(table).where(table.c.id == bindparam("deal_id")).values(
+                position=bindparam("key"), updated_at=table.c.updated_at
+            ),
+            changes
+        )
+    return len(changes)
+
+
+def request_rebalance(directory: Session, owner_id: str):
+    """Queue a rebalance for the owner unless one is already waiting"""
+    pending = directory.query(Job.id).filter(
+        Job.kind == "rebalance_positions",
+        Job.owner_id == owner_id,
+        Job.status == "queued"
+    ).first()
+    if pending is None:
+        job_queue.enqueue(directory, "rebalance_positions", owner_id=owner_id, priority=50)
@@ -0,0 +1,294 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from app.config import get_settings
+from app.database import all_tenant_engines, get_tenant_engine
+from app.invalidation import invalidation_bus
+from app.leases import LeaderLease
+from app.models.task import Task
+
+logger = logging.getLogger(__name__)
+
+# A refresh re-reads rows updated this long before the previous one, so a
+# write committed after that refresh ran still gets picked up
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+# The heap is rebuilt from the live entries once stale ones outnumber them by this many
+COMPACT_SLACK = 64
+
+
+# Sinks with shared = True reach something outside this process, so only the
+# worker holding the "reminders" lease sends to them; SSE streams are
+# per-process and every worker feeds its own
+
+
+class LogSink:
+    shared = True
+
+    def emit(self, event: dict):
+        logger.info("Task due: %s (%s) for owner %s", event["title"], event["task_id"], event["owner_id"])
+
+
+class WebhookSink:
+    shared = True
+
+    def __init__(self, url: str):
+        self.url = url
+
+    def emit(self, event: dict):
+        import httpx
+        try:
+            httpx.post(self.url, json=event, timeout=5.0)
+        except httpx.HTTPError:
+            logger.exception("Reminder webhook to %s failed", self.url)
+
+
+class SSEBroadcaster:
+    """Fans reminder events out to the event-stream connections of each owner"""
+
+    shared = False
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[tuple]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def subscribe(self, owner_id: str) -> asyncio.Queue:
+        subscription = (asyncio.get_running_loop(), asyncio.Queue(maxsize=100))
+        with self._lock:
+            self._subscribers[owner_id].append(subscription)
+        return subscription[1]
+
+    def unsubscribe(self, owner_id: str, events: asyncio.Queue):
+        with self._lock:
+            self._subscribers[owner_id] = [s for s in self._subscribers[owner_id] if s[1] is not events]
+            if not self._subscribers[owner_id]:
+                del self._subscribers[owner_id]
+
+    def emit(self, event: dict):
+        with self._lock:
+            subscriptions = list(self._subscribers.get(event["owner_id"], ()))
+        for loop, events in subscriptions:
+            loop.call_soon_threadsafe(self._offer, events, event)
+
+    @staticmethod
+    def _offer(events: asyncio.Queue, event: dict):
+        if not events.full():
+            events.put_nowait(event)
+
+
+sse_broadcaster = SSEBroadcaster()
+
+
+class ReminderScheduler:
+    """Min-heap of upcoming due times for open tasks.
+
+    Writes keep the heap current through schedule()/unschedule(); replaced or
+    removed entries are skipped lazily when they reach the top, and the heap
+    is rebuilt once they pile up. A single thread sleeps until the earliest
+    due time, so the work done depends on the number of tasks coming due and
+    written, never on the size of the tasks table.
+
+    Every worker keeps a schedule, since each serves its own event streams;
+    log and webhook reminders are sent only by the holder of `lease`.
+    """
+
+    def __init__(self, sinks: list, lease: LeaderLease):
+        self.sinks = sinks
+        self.lease = lease
+        self._heap = []  # (due_at, seq, task_id)
+        self._entries = {}  # task_id -> (seq, owner_id, title, due_at), the live entry for each task
+        self._refreshed: Dict[Optional[str], datetime] = {}  # owner_id (None: every owner) -> last refresh
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._stopping = False
+
+    def load(self, bind: Engine, owner_id: Optional[str] = None):
+        """Schedule every open task due in the future, in one range read over (is_completed, due_date)"""
+        query = select(Task.id, Task.owner_id, Task.title, Task.due_date).where(
+            Task.is_completed == False,
+            Task.due_date > datetime.utcnow()
+        )
+        if owner_id is not None:
+            query = query.where(Task.owner_id == owner_id)
+        with bind.connect() as conn:
+            for task_id, task_owner_id, title, due_date in conn.execute(query):
+                self.schedule(task_id, task_owner_id, title, due_date)
+
+    def refresh(self, owner_id: Optional[str]):
+        """Pick up tasks another worker created, rescheduled or completed (every owner's for None).
+
+        Only rows updated since the previous refresh are read, through
+        ix_tasks_owner_updated, and schedule() leaves unchanged entries
+        alone, so the cost follows the number of writes. Deleted tasks need
+        nothing here: their stale entries are dropped by the check made
+        before a reminder is delivered.
+        """
+        if not self._running:
+            return
+        started = datetime.utcnow()
+        everyone = self._refreshed.get(None, started)
+        since = max(self._refreshed.get(owner_id, everyone), everyone)
+        query = select(Task.id, Task.owner_id, Task.title, Task.due_date, Task.is_completed).where(
+            Task.updated_at >= since - REFRESH_OVERLAP
+        )
+        if owner_id is None:
+            self._refreshed = {None: started}
+            binds = all_tenant_engines()
+        else:
+            self._refreshed[owner_id] = started
+            query = query.where(Task.owner_id == owner_id)
+            binds = [get_tenant_engine(owner_id)]
+        for bind in binds:
+            with bind.connect() as conn:
+                for task_id, task_owner_id, title, due_date, is_completed in conn.execute(query):
+                    self._apply(task_id, task_owner_id, title, due_date, is_completed)
+
+    def schedule(self, task_id: str, owner_id: str, title: str, due_at: datetime):
+        if not self._running:
+            return
+        with self._condition:
+            entry = self._entries.get(task_id)
+            if entry is not None and entry[1:] == (owner_id, title, due_at):
+                return  # already scheduled as is
+            seq = next(self._sequence)
+            self._entries[task_id] = (seq, owner_id, title, due_at)
+            heapq.heappush(self._heap, (due_at, seq, task_id))
+            self._compact()
+            if self._heap[0][1] == seq:
+                self._condition.notify()
+
+    def unschedule(self, task_id: str):
+        with self._condition:
+            if self._entries.pop(task_id, None) is not None:
+                self._compact()
+
+    def _compact(self):
+        # Called with the condition held
+        if len(self._heap) > 2 * len(self._entries) + COMPACT_SLACK:
+            self._heap = [(due_at, seq, task_id) for task_id, (seq, _, _, due_at) in self._entries.items()]
+            heapq.heapify(self._heap)
+
+    def _apply(self, task_id: str, owner_id: str, title: str, due_at: Optional[datetime], is_completed: bool):
+        if is_completed or due_at is None or due_at <= datetime.utcnow():
+            self.unschedule(task_id)
+        else:
+            self.schedule(task_id, owner_id, title, due_at)
+
+    def sync(self, task: Task):
+        """Reflect a task write: (re)schedule open tasks with a future due date, drop the rest"""
+        self._apply(task.id, task.owner_id, task.title, task.due_date, task.is_completed)
+
+    def start(self):
+        self._running = True
+        self._refreshed = {None: datetime.utcnow()}
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="reminder-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._stopping = True
+            self._condition.notify()
+        if self._thread:
+            self._thread.join(timeout=5.0)
+        if any(sink.shared for sink in self.sinks):
+            try:
+                self.lease.release()
+            except Exception:
+                logger.exception("Releasing the reminder lease failed")
+
+    def _pop_due(self) -> List[dict]:
+        """Wait for the earliest live entry to come due and pop everything due by then"""
+        with self._condition:
+            while not self._stopping:
+                while self._heap and self._entries.get(self._heap[0][2], (None,))[0] != self._heap[0][1]:
+                    heapq.heappop(self._heap)  # replaced or unscheduled
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                wait = (self._heap[0][0] - datetime.utcnow()).total_seconds()
+                if wait > 0:
+                    self._condition.wait(timeout=wait)
+                    continue
+
+                now = datetime.utcnow()
+                due = []
+                while self._heap and self._heap[0][0] <= now:
+                    due_at, seq, task_id = heapq.heappop(self._heap)
+                    entry = self._entries.get(task_id)
+                    if entry and entry[0] == seq:
+                        del self._entries[task_id]
+                        due.append({
+                            "task_id": task_id,
+                            "owner_id": entry[1],
+                            "title": entry[2],
+                            "due_date": due_at.isoformat(),
+                        })
+                return due
+            return []
+
+    def _still_open(self, event: dict) -> bool:
+        # Guards against writes this process did not see (other workers, contact cascades)
+        with get_tenant_engine(event["owner_id"]).connect() as conn:
+            row = conn.execute(
+                select(Task.is_completed, Task.due_date).where(Task.id == event["task_id"])
+            ).first()
+        return row is not None and not row[0] and row[1] is not None and row[1].isoformat() == event["due_date"]
+
+    def _run(self):
+        while not self._stopping:
+            leader = None  # asked once per batch of due reminders
+            for event in self._pop_due():
+                try:
+                    if not self._still_open(event):
+                        continue
+                    for sink in self.sinks:
+                        if sink.shared:
+                            if leader is None:
+                                leader = self.lease.try_acquire()
+                            if not leader:
+                                continue
+                        sink.emit(event)
+                except Exception:
+                    logger.exception("Failed to deliver reminder for task %s", event["task_id"])
+
+
+def build_sinks() -> list:
+    settings = get_settings()
+    sinks = []
+    for name in filter(None, (part.strip() for part in settings.reminder_sinks.split(","))):
+        if name == "log":
+            sinks.append(LogSink())
+        elif name == "webhook" and settings.reminder_webhook_url:
+            sinks.append(WebhookSink(settings.reminder_webhook_url))
+        elif name == "sse":
+            sinks.append(sse_broadcaster)
+        else:
+            logger.warning("Ignoring unknown or unconfigured reminder sink %r", name)
+    return sinks
+
+
+reminder_scheduler = ReminderScheduler(build_sinks(), LeaderLease("reminders", get_settings().reminder_lease_seconds))
+invalidation_bus.subscribe("tasks", reminder_scheduler.refresh)
+
+
+def start_reminders():
+    if not get_settings().reminders_enabled:
+        return
+    reminder_scheduler.start()
+    for bind in all_tenant_engines():
+        reminder_scheduler.load(bind)
+
+
+def stop_reminders():
+    reminder_scheduler.stop()
@@ -0,0 +1,62 @@
+"""The request being served, for code below the routers that reports on it.
+
+RequestContextMiddleware stores the ASGI scope in a context variable, which
+follows the request into the threadpool for plain `def` handlers and
+dependencies. Route and owner are read from the scope only when asked for:
+routing records the matched route there, and token_subject() caches the
+owner id in the request state.
+
+The middleware also maps the asyncio task serving each request to its
+scope, so another thread (the event-loop watchdog) can tell which request
+the loop is running.
+"""
+import asyncio
+import hashlib
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+current_scope: ContextVar[Optional[dict]] = ContextVar("current_scope", default=None)
+
+active_requests: Dict[asyncio.Task, dict] = {}
+
+
+def route_label(scope: dict) -> str:
+    """"GET /api/deals/{deal_id}" once routed, else the raw path"""
+    route = scope.get("route")
+    return f"{scope['method']} {getattr(route, 'path', scope['path'])}"
+
+
+def owner_hash(owner_id: str) -> str:
+    """Stable pseudonym for an owner id in logs and metrics"""
+    return hashlib.sha256(owner_id.encode()).hexdigest()[:16]
+
+
+def current_route() -> Optional[str]:
+    """Route of the request this code runs for; None outside a request (jobs, other threads)"""
+    scope = current_scope.get()
+    return route_label(scope) if scope is not None else None
+
+
+def current_owner() -> Optional[str]:
+    """Hashed id of the authenticated owner, when the request has been authenticated"""
+    scope = current_scope.get()
+    owner_id = scope.get("state", {}).get("token_subject") if scope is not None else None
+    return owner_hash(owner_id) if owner_id else None
+
+
+class RequestContextMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = current_scope.set(scope)
+        task = asyncio.current_task()
+        active_requests[task] = scope
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            active_requests.pop(task, None)
+            current_scope.reset(token)
@@ -4,6 +4,10 @@ from app.routers.deals import router as deals_router
 from app.routers.tasks import router as tasks_router
 from app.routers.analytics import router as analytics_router
 from app.routers.users import router as users_router
+from app.routers.activity import router as activity_router
+from app.routers.jobs import router as jobs_router
+from app.routers.reminders import router as reminders_router
+from app.routers.bootstrap import router as bootstrap_router
 
 __all__ = [
     "auth_router",
@@ -11,5 +15,9 @@ __all__ = [
     "deals_router",
     "tasks_router",
     "analytics_router",
-    "users_router"
+    "users_router",
+    "activity_router",
+    "jobs_router",
+    "reminders_router",
+    "bootstrap_router"
 ]
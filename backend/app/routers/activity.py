@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.database import get_db
+from app.models.user import User
+from app.schemas.activity import ActivityPage
+from app.activity import latest_activities, encode_cursor
+from app.auth import get_current_user
+
+router = APIRouter(prefix="/activity", tags=["Activity"])
+
+
+@router.get("", response_model=ActivityPage)
+async def get_activity(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the activity timeline for the current user, newest first"""
+    try:
+        items = latest_activities(db, current_user.id, limit + 1, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    next_cursor = encode_cursor(items[limit - 1]) if len(items) > limit else None
+    return ActivityPage(items=items[:limit], next_cursor=next_cursor)
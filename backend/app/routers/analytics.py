@@ -1,63 +1,85 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func, extract
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, date
+from typing import Optional
 from app.database import get_db
 from app.models.contact import Contact
 from app.models.deal import Deal
 from app.models.task import Task
 from app.models.user import User
-from app.schemas.analytics import AnalyticsResponse, DealsByStage, TasksByStatus, ContactsByStatus, RecentActivity, MonthlyRevenue, WeeklyRevenue, YearlyRevenue
+from app.schemas.analytics import AnalyticsResponse, DealsByStage, TasksByStatus, ContactsByStatus, RecentActivity, MonthlyRevenue, WeeklyRevenue, YearlyRevenue, ForecastResponse, FunnelResponse
 from app.auth import get_current_user
+from app.funnel import stage_funnel
+from app.activity import latest_activities
+from app.archive import archive_summaries
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
 
-@router.get("", response_model=AnalyticsResponse)
-async def get_analytics(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Get analytics data for the current user"""
+def build_analytics(db: Session, owner_id: str) -> AnalyticsResponse:
+    """Dashboard metrics for one owner; shared by /analytics and /bootstrap.
+
+    Archived deals and tasks are added from their monthly summaries (see
+    app.archive); the weekly and monthly windows are newer than anything
+    archived.
+    """
+    archived = archive_summaries(db, owner_id)
+    archived_deals = [row for row in archived if row.entity == "deals"]
+    archived_tasks = [row for row in archived if row.entity == "tasks"]
+    # closed_won revenue and count by "YYYY-MM"
+    archived_revenue = {}
+    for row in archived_deals:
+        if row.status == "closed_won" and row.period:
+            revenue, count = archived_revenue.get(row.period, (0.0, 0))
+            archived_revenue[row.period] = (revenue + row.value, count + row.count)
     
     # Total counts
-    total_contacts = db.query(Contact).filter(Contact.owner_id == current_user.id).count()
-    total_deals = db.query(Deal).filter(Deal.owner_id == current_user.id).count()
-    total_tasks = db.query(Task).filter(Task.owner_id == current_user.id).count()
+    total_contacts = db.query(Contact).filter(Contact.owner_id == owner_id).count()
+    total_deals = db.query(Deal).filter(Deal.owner_id == owner_id).count() + sum(row.count for row in archived_deals)
+    total_tasks = db.query(Task).filter(Task.owner_id == owner_id).count() + sum(row.count for row in archived_tasks)
     
     # Total deal value
-    total_deal_value = db.query(func.sum(Deal.value)).filter(
-        Deal.owner_id == current_user.id
-    ).scalar() or 0.0
+    total_deal_value = (db.query(func.sum(Deal.value)).filter(
+        Deal.owner_id == owner_id
+    ).scalar() or 0.0) + sum(row.value for row in archived_deals)
     
     # Deals by stage
     deals_by_stage_query = db.query(
         Deal.stage,
         func.count(Deal.id).label('count'),
         func.sum(Deal.value).label('total_value')
-    ).filter(Deal.owner_id == current_user.id).group_by(Deal.stage).all()
+    ).filter(Deal.owner_id == owner_id).group_by(Deal.stage).all()
     
+    stage_totals = {row[0]: [row[1], row[2] or 0.0] for row in deals_by_stage_query}
+    for row in archived_deals:
+        totals = stage_totals.setdefault(row.status or None, [0, 0.0])
+        totals[0] += row.count
+        totals[1] += row.value
     deals_by_stage = [
-        DealsByStage(stage=row[0], count=row[1], total_value=row[2] or 0.0)
-        for row in deals_by_stage_query
+        DealsByStage(stage=stage, count=count, total_value=value)
+        for stage, (count, value) in sorted(stage_totals.items(), key=lambda item: (item[0] is not None, item[0] or ""))
     ]
     
     # Tasks by status
     tasks_by_status_query = db.query(
         Task.status,
         func.count(Task.id).label('count')
-    ).filter(Task.owner_id == current_user.id).group_by(Task.status).all()
+    ).filter(Task.owner_id == owner_id).group_by(Task.status).all()
     
+    status_counts = dict(tasks_by_status_query)
+    for row in archived_tasks:
+        status_counts[row.status or None] = status_counts.get(row.status or None, 0) + row.count
     tasks_by_status = [
-        TasksByStatus(status=row[0], count=row[1])
-        for row in tasks_by_status_query
+        TasksByStatus(status=status, count=count)
+        for status, count in sorted(status_counts.items(), key=lambda item: (item[0] is not None, item[0] or ""))
     ]
     
     # Contacts by status
     contacts_by_status_query = db.query(
         Contact.status,
         func.count(Contact.id).label('count')
-    ).filter(Contact.owner_id == current_user.id).group_by(Contact.status).all()
+    ).filter(Contact.owner_id == owner_id).group_by(Contact.status).all()
     
     contacts_by_status = [
         ContactsByStatus(status=row[0], count=row[1])
@@ -66,7 +88,7 @@ async def get_analytics(
     
     # Conversion rate (customers / total contacts)
     customers_count = db.query(Contact).filter(
-        Contact.owner_id == current_user.id,
+        Contact.owner_id == owner_id,
         Contact.status == "customer"
     ).count()
     conversion_rate = (customers_count / total_contacts * 100) if total_contacts > 0 else 0.0
@@ -74,7 +96,7 @@ async def get_analytics(
     # Tasks completed this week
     week_ago = datetime.utcnow() - timedelta(days=7)
     tasks_completed_this_week = db.query(Task).filter(
-        Task.owner_id == current_user.id,
+        Task.owner_id == owner_id,
         Task.is_completed == True,
         Task.completed_at >= week_ago
     ).count()
@@ -82,57 +104,21 @@ async def get_analytics(
     # Deals closed this month
     month_ago = datetime.utcnow() - timedelta(days=30)
     deals_closed_this_month = db.query(Deal).filter(
-        Deal.owner_id == current_user.id,
+        Deal.owner_id == owner_id,
         Deal.stage == "closed_won",
         Deal.actual_close_date >= month_ago
     ).count()
     
     # Recent activities
-    recent_activities = []
-    
-    # Recent contacts
-    recent_contacts = db.query(Contact).filter(
-        Contact.owner_id == current_user.id
-    ).order_by(Contact.created_at.desc()).limit(3).all()
-    
-    for contact in recent_contacts:
-        recent_activities.append(RecentActivity(
-            type="contact",
-            action="created",
-            title=f"{contact.first_name} {contact.last_name}",
-            timestamp=contact.created_at.isoformat()
-        ))
-    
-    # Recent deals
-    recent_deals = db.query(Deal).filter(
-        Deal.owner_id == current_user.id
-    ).order_by(Deal.created_at.desc()).limit(3).all()
-    
-    for deal in recent_deals:
-        recent_activities.append(RecentActivity(
-            type="deal",
-            action="created",
-            title=deal.title,
-            timestamp=deal.created_at.isoformat()
-        ))
-    
-    # Recent completed tasks
-    recent_completed_tasks = db.query(Task).filter(
-        Task.owner_id == current_user.id,
-        Task.is_completed == True
-    ).order_by(Task.completed_at.desc()).limit(3).all()
-    
-    for task in recent_completed_tasks:
-        recent_activities.append(RecentActivity(
-            type="task",
-            action="completed",
-            title=task.title,
-            timestamp=task.completed_at.isoformat() if task.completed_at else task.updated_at.isoformat()
-        ))
-    
-    # Sort by timestamp
-    recent_activities.sort(key=lambda x: x.timestamp, reverse=True)
-    recent_activities = recent_activities[:10]
+    recent_activities = [
+        RecentActivity(
+            type=activity.entity_type,
+            action=activity.action,
+            title=activity.title,
+            timestamp=activity.ts.isoformat()
+        )
+        for activity in latest_activities(db, owner_id, 10)
+    ]
 
     # Monthly revenue (last 12 months)
     current_year = datetime.utcnow().year
@@ -148,17 +134,18 @@ async def get_analytics(
             func.coalesce(func.sum(Deal.value), 0).label('revenue'),
             func.count(Deal.id).label('count')
         ).filter(
-            Deal.owner_id == current_user.id,
+            Deal.owner_id == owner_id,
             Deal.stage == "closed_won",
             Deal.actual_close_date >= month_start,
             Deal.actual_close_date < month_end
         ).first()
 
+        archived_month = archived_revenue.get(f"{current_year}-{month:02d}", (0.0, 0))
         monthly_revenue.append(MonthlyRevenue(
             month=month,
             year=current_year,
-            revenue=float(month_deals[0]) if month_deals[0] else 0.0,
-            deals_count=month_deals[1] if month_deals[1] else 0
+            revenue=(float(month_deals[0]) if month_deals[0] else 0.0) + archived_month[0],
+            deals_count=(month_deals[1] if month_deals[1] else 0) + archived_month[1]
         ))
 
     # Weekly revenue (last 7 weeks)
@@ -173,7 +160,7 @@ async def get_analytics(
             func.coalesce(func.sum(Deal.value), 0).label('revenue'),
             func.count(Deal.id).label('count')
         ).filter(
-            Deal.owner_id == current_user.id,
+            Deal.owner_id == owner_id,
             Deal.stage == "closed_won",
             Deal.actual_close_date >= week_start,
             Deal.actual_close_date < week_end
@@ -195,16 +182,17 @@ async def get_analytics(
             func.coalesce(func.sum(Deal.value), 0).label('revenue'),
             func.count(Deal.id).label('count')
         ).filter(
-            Deal.owner_id == current_user.id,
+            Deal.owner_id == owner_id,
             Deal.stage == "closed_won",
             Deal.actual_close_date >= year_start,
             Deal.actual_close_date < year_end
         ).first()
 
+        archived_year = [totals for period, totals in archived_revenue.items() if period.startswith(f"{year}-")]
         yearly_revenue.append(YearlyRevenue(
             year=year,
-            revenue=float(year_deals[0]) if year_deals[0] else 0.0,
-            deals_count=year_deals[1] if year_deals[1] else 0
+            revenue=(float(year_deals[0]) if year_deals[0] else 0.0) + sum(revenue for revenue, _ in archived_year),
+            deals_count=(year_deals[1] if year_deals[1] else 0) + sum(count for _, count in archived_year)
         ))
 
     return AnalyticsResponse(
@@ -223,3 +211,55 @@ async def get_analytics(
         weekly_revenue=weekly_revenue,
         yearly_revenue=yearly_revenue
     )
+
+
+@router.get("", response_model=AnalyticsResponse)
+async def get_analytics(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get analytics data for the current user"""
+    return build_analytics(db, current_user.id)
+
+
+@router.get("/forecast", response_model=ForecastResponse)
+async def get_forecast(
+    months: int = Query(12, ge=1, le=36),
+    simulations: int = Query(500, ge=0, le=10000),
+    commit_probability: int = Query(90, ge=0, le=100),
+    seed: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Probability-weighted revenue forecast for the open pipeline"""
+    from app.forecast import load_open_pipeline, compute_forecast, month_ordinal
+    values, probabilities, close_months = load_open_pipeline(db, current_user.id)
+    forecast = compute_forecast(
+        values,
+        probabilities,
+        close_months,
+        current_month=month_ordinal(datetime.utcnow()),
+        horizon=months,
+        commit_probability=commit_probability,
+        simulations=simulations,
+        seed=seed
+    )
+    return ForecastResponse(**forecast)
+
+
+@router.get("/funnel", response_model=FunnelResponse)
+async def get_funnel(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Stage conversion and median days in stage, from the stage transition log"""
+    end_at = datetime.combine(end, datetime.min.time()) + timedelta(days=1) if end else datetime.utcnow()
+    start_at = datetime.combine(start, datetime.min.time()) if start else end_at - timedelta(days=90)
+    
+    return FunnelResponse(
+        start=start_at,
+        end=end_at,
+        stages=stage_funnel(db, current_user.id, start_at, end_at)
+    )
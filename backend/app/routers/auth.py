@@ -1,8 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Response, Request
 from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
-import httpx
-from app.database import get_db
+from app.database import get_directory_db
 from app.models.user import User
 from app.schemas.user import UserResponse
 from app.auth import create_access_token, set_auth_cookie, clear_auth_cookie, get_current_user
@@ -39,11 +38,13 @@ async def google_login():
 async def google_callback(
     code: str,
     response: Response,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_directory_db)
 ):
     """Handle Google OAuth callback"""
     redirect_uri = f"{settings.backend_url}/api/auth/google/callback"
     
+    import httpx
+    
     # Exchange code for tokens
     async with httpx.AsyncClient() as client:
         token_response = await client.post(
@@ -127,7 +128,7 @@ async def logout(response: Response):
 
 
 @router.get("/check")
-async def check_auth(request: Request, db: Session = Depends(get_db)):
+async def check_auth(request: Request, db: Session = Depends(get_directory_db)):
     """Check if user is authenticated"""
     from app.auth import get_current_user_optional
     user = await get_current_user_optional(request, db)
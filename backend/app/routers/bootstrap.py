@@ -0,0 +1,98 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func
+from sqlalchemy.orm import Session, aliased
+from typing import List, Optional
+from datetime import datetime, timedelta
+from app.database import read_snapshot
+from app.models.deal import Deal
+from app.models.task import Task
+from app.models.user import User
+from app.schemas.bootstrap import BootstrapResponse, PipelineColumn
+from app.auth import get_current_user
+from app.activity import latest_activities
+from app.routers.analytics import build_analytics
+
+router = APIRouter(prefix="/bootstrap", tags=["Bootstrap"])
+
+SECTIONS = ("user", "summary", "pipeline", "today", "activity")
+
+# Board column order; stages not listed here follow in name order
+PIPELINE_STAGES = ("lead", "qualified", "proposal", "negotiation", "closed_won", "closed_lost")
+
+
+def parse_sections(sections: Optional[str]) -> List[str]:
+    if not sections:
+        return list(SECTIONS)
+    requested = list(dict.fromkeys(part.strip() for part in sections.split(",") if part.strip()))
+    unknown = [name for name in requested if name not in SECTIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown section(s): {', '.join(unknown)}; expected any of {', '.join(SECTIONS)}"
+        )
+    return requested
+
+
+def pipeline_columns(db: Session, owner_id: str, per_stage: int) -> List[PipelineColumn]:
+    """Deal board: per-stage count and value plus the top cards of each column, in two queries"""
+    totals = db.query(
+        Deal.stage, func.count(Deal.id), func.coalesce(func.sum(Deal.value), 0.0)
+    ).filter(Deal.owner_id == owner_id).group_by(Deal.stage).all()
+
+    ranked = db.query(
+        Deal,
+        func.row_number().over(
+            partition_by=Deal.stage, order_by=(Deal.position, Deal.id)
+        ).label("rank")
+    ).filter(Deal.owner_id == owner_id).subquery()
+    ranked_deal = aliased(Deal, ranked)
+    deals = db.query(ranked_deal).filter(ranked.c.rank <= per_stage).order_by(ranked.c.rank).all()
+
+    by_stage = {}
+    for deal in deals:
+        by_stage.setdefault(deal.stage, []).append(deal)
+    order = {stage: i for i, stage in enumerate(PIPELINE_STAGES)}
+    return [
+        PipelineColumn(stage=stage, count=count, total_value=float(value), deals=by_stage.get(stage, []))
+        for stage, count, value in sorted(totals, key=lambda row: (order.get(row[0], len(order)), row[0] or ""))
+    ]
+
+
+def tasks_due_today(db: Session, owner_id: str, limit: int) -> List[Task]:
+    """Open tasks due by the end of today, overdue ones first"""
+    tomorrow = datetime.combine(datetime.utcnow().date() + timedelta(days=1), datetime.min.time())
+    return db.query(Task).filter(
+        Task.owner_id == owner_id,
+        Task.is_completed == False,
+        Task.due_date < tomorrow
+    ).order_by(Task.due_date.asc()).limit(limit).all()
+
+
+# A plain def: the sections share one connection and snapshot, so they run
+# back to back on a worker thread rather than blocking the event loop
+@router.get("", response_model=BootstrapResponse, response_model_exclude_unset=True)
+def get_bootstrap(
+    sections: Optional[str] = Query(None, description=f"Comma-separated subset of {', '.join(SECTIONS)}; all by default"),
+    pipeline_limit: int = Query(20, ge=0, le=100, description="Deals per pipeline column"),
+    today_limit: int = Query(20, ge=1, le=100),
+    activity_limit: int = Query(10, ge=1, le=100),
+    current_user: User = Depends(get_current_user)
+):
+    """Everything the dashboard's first render needs, read from one consistent snapshot"""
+    wanted = parse_sections(sections)
+    response = {}
+    if "user" in wanted:
+        response["user"] = current_user
+    if wanted == ["user"]:
+        return response
+
+    with read_snapshot(current_user.id) as db:
+        if "summary" in wanted:
+            response["summary"] = build_analytics(db, current_user.id)
+        if "pipeline" in wanted:
+            response["pipeline"] = pipeline_columns(db, current_user.id, pipeline_limit)
+        if "today" in wanted:
+            response["today"] = tasks_due_today(db, current_user.id, today_limit)
+        if "activity" in wanted:
+            response["activity"] = latest_activities(db, current_user.id, activity_limit)
+    return response
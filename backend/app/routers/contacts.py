@@ -1,25 +1,50 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
 from app.database import get_db
 from app.models.contact import Contact
 from app.models.user import User
-from app.schemas.contact import ContactCreate, ContactResponse, ContactUpdate
+from app.schemas.contact import ContactCreate, ContactResponse, ContactUpdate, DuplicatesResponse, DuplicateCluster, MergeRequest, MergeResponse, ContactSuggestion
 from app.auth import get_current_user
+from app.activity import record_activity
+from app.loaders import BatchLoader, get_loader, parse_ids
+from app.expansion import parse_include, include_options, expand_contact
+from app.schemas.expanded import ContactWithRelated, ContactPage
+from app.facets import parse_facets, count_facets
+from app.reminders import reminder_scheduler
+from app.dedupe import DEFAULT_THRESHOLD, find_duplicate_clusters, merge_contacts
+from app.suggest import suggest_index, load_suggest_rows
+from app.invalidation import invalidation_bus
+from app.archive import delete_archived_for_contacts
+from app.audit import audit_writer, snapshot, field_changes, history_page
+from app.schemas.audit import AuditPage
 
 router = APIRouter(prefix="/contacts", tags=["Contacts"])
 
 
-@router.get("", response_model=List[ContactResponse])
+@router.get("", response_model=Union[List[ContactWithRelated], ContactPage], response_model_exclude_unset=True)
 async def get_contacts(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     status: Optional[str] = None,
     search: Optional[str] = None,
+    ids: Optional[str] = Query(None, description="Comma-separated ids to fetch in one query; other filters are ignored"),
+    include: Optional[str] = Query(None, description="Comma-separated related entities to embed"),
+    facets: Optional[str] = Query(None, description="Comma-separated fields to count values of; returns a page object"),
+    with_total: bool = Query(False, description="Return a page object with the exact total for the filter"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    loader: BatchLoader = Depends(get_loader)
 ):
     """Get all contacts for the current user"""
+    includes = parse_include(Contact, include)
+    options = include_options(Contact, includes)
+    facet_fields = parse_facets(Contact, facets)
+    id_list = parse_ids(ids)
+    if id_list is not None:
+        found = loader.load_many(Contact, id_list, options)
+        return [expand_contact(found[i], includes) for i in id_list if i in found]
+    
     query = db.query(Contact).filter(Contact.owner_id == current_user.id)
     
     if status:
@@ -34,18 +59,111 @@ async def get_contacts(
             (Contact.company.ilike(search_term))
         )
     
-    contacts = query.order_by(Contact.created_at.desc()).offset(skip).limit(limit).all()
-    return contacts
+    contacts = query.options(*options).order_by(Contact.created_at.desc()).offset(skip).limit(limit).all()
+    items = [expand_contact(contact, includes) for contact in contacts]
+    if not facet_fields and not with_total:
+        return items
+    total, counts = count_facets(
+        db, Contact, current_user.id, query, facet_fields, filtered=bool(status or search)
+    )
+    page = ContactPage(items=items, total=total)
+    if facet_fields:
+        page.facets = counts
+    return page
+
+
+# A plain def: the first query for an owner builds the index in the threadpool
+@router.get("/suggest", response_model=List[ContactSuggestion])
+def suggest_contacts(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Typeahead: contacts whose name, last name, email or company starts with q"""
+    matches = suggest_index.search(
+        current_user.id, q.strip(), limit,
+        lambda: load_suggest_rows(db, current_user.id)
+    )
+    return [
+        ContactSuggestion(
+            id=contact_id,
+            name=f"{first_name or ''} {last_name or ''}".strip(),
+            email=email,
+            company=company
+        )
+        for contact_id, first_name, last_name, email, company in matches
+    ]
+
 
+# A plain def so the scan (seconds at hundreds of thousands of contacts)
+# runs in the threadpool instead of blocking the event loop
+@router.get("/duplicates", response_model=DuplicatesResponse)
+def get_duplicate_contacts(
+    threshold: float = Query(DEFAULT_THRESHOLD, ge=0.3, le=1.0),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    loader: BatchLoader = Depends(get_loader)
+):
+    """Clusters of likely duplicate contacts, strongest matches first"""
+    result = find_duplicate_clusters(db, current_user.id, threshold)
+    clusters = result["clusters"][:limit]
+    found = loader.load_many(Contact, [i for cluster in clusters for i in cluster["contact_ids"]])
+    return DuplicatesResponse(
+        clusters=[
+            DuplicateCluster(
+                score=cluster["score"],
+                reasons=cluster["reasons"],
+                contacts=[found[i] for i in cluster["contact_ids"] if i in found]
+            )
+            for cluster in clusters
+        ],
+        total_clusters=len(result["clusters"]),
+        scanned=result["scanned"],
+        compared=result["compared"]
+    )
 
-@router.get("/{contact_id}", response_model=ContactResponse)
+
+@router.post("/merge", response_model=MergeResponse)
+async def merge_duplicate_contacts(
+    merge_data: MergeRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Merge duplicates into the primary contact, moving their deals and tasks"""
+    primary = db.query(Contact).filter(
+        Contact.id == merge_data.primary_id,
+        Contact.owner_id == current_user.id
+    ).first()
+    
+    if not primary:
+        raise HTTPException(status_code=404, detail="Contact not found")
+    
+    result = merge_contacts(db, current_user.id, primary, merge_data.duplicate_ids)
+    audit = result.pop("audit")
+    if result["merged"]:
+        record_activity(db, current_user.id, "contact", primary.id, "merged", primary.full_name)
+    db.commit()
+    db.refresh(primary)
+    for entity_type, entity_id, changes in audit:
+        audit_writer.record(current_user.id, entity_type, entity_id, current_user.id, changes)
+    suggest_index.remove(current_user.id, merge_data.duplicate_ids)
+    suggest_index.upsert(current_user.id, primary)
+    invalidation_bus.publish(current_user.id, "contacts")
+    return MergeResponse(contact=primary, **result)
+
+
+@router.get("/{contact_id}", response_model=ContactWithRelated, response_model_exclude_unset=True)
 async def get_contact(
     contact_id: str,
+    include: Optional[str] = Query(None, description="Comma-separated related entities to embed"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get a specific contact"""
-    contact = db.query(Contact).filter(
+    includes = parse_include(Contact, include)
+    contact = db.query(Contact).options(*include_options(Contact, includes)).filter(
         Contact.id == contact_id,
         Contact.owner_id == current_user.id
     ).first()
@@ -53,7 +171,25 @@ async def get_contact(
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found")
     
-    return contact
+    return expand_contact(contact, includes)
+
+
+@router.get("/{contact_id}/history", response_model=AuditPage)
+def get_contact_history(
+    contact_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Field-level change history of a contact, newest first"""
+    try:
+        page = history_page(db, current_user.id, "contact", contact_id, cursor, limit, (Contact,))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if page is None:
+        raise HTTPException(status_code=404, detail="Contact not found")
+    return page
 
 
 @router.post("", response_model=ContactResponse)
@@ -68,8 +204,12 @@ async def create_contact(
         **contact_data.model_dump()
     )
     db.add(contact)
+    db.flush()
+    record_activity(db, current_user.id, "contact", contact.id, "created", contact.full_name)
     db.commit()
     db.refresh(contact)
+    suggest_index.upsert(current_user.id, contact)
+    invalidation_bus.publish(current_user.id, "contacts")
     return contact
 
 
@@ -90,11 +230,16 @@ async def update_contact(
         raise HTTPException(status_code=404, detail="Contact not found")
     
     update_data = contact_data.model_dump(exclude_unset=True)
+    before = snapshot(contact, update_data)
     for field, value in update_data.items():
         setattr(contact, field, value)
     
+    record_activity(db, current_user.id, "contact", contact.id, "updated", contact.full_name)
     db.commit()
     db.refresh(contact)
+    audit_writer.record(current_user.id, "contact", contact.id, current_user.id, field_changes(contact, before))
+    suggest_index.upsert(current_user.id, contact)
+    invalidation_bus.publish(current_user.id, "contacts")
     return contact
 
 
@@ -113,6 +258,18 @@ async def delete_contact(
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found")
     
+    record_activity(db, current_user.id, "contact", contact.id, "deleted", contact.full_name)
+    # Deals and tasks go with the contact through the ORM cascade
+    for deal in contact.deals:
+        record_activity(db, current_user.id, "deal", deal.id, "deleted", deal.title)
+    for task in contact.tasks:
+        record_activity(db, current_user.id, "task", task.id, "deleted", task.title)
+    task_ids = [task.id for task in contact.tasks]
     db.delete(contact)
+    delete_archived_for_contacts(db, current_user.id, [contact_id])
     db.commit()
+    suggest_index.remove(current_user.id, [contact_id])
+    invalidation_bus.publish(current_user.id, "contacts")
+    for task_id in task_ids:
+        reminder_scheduler.unschedule(task_id)
     return {"message": "Contact deleted successfully"}
@@ -1,55 +1,143 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
 from datetime import datetime
-from app.database import get_db
+from app.database import get_db, get_directory_db
 from app.models.deal import Deal
+from app.models.deal_stage_transition import DealStageTransition
 from app.models.user import User
-from app.schemas.deal import DealCreate, DealResponse, DealUpdate
+from app.schemas.deal import DealCreate, DealResponse, DealUpdate, DealMove
 from app.auth import get_current_user
+from app.activity import record_activity
+from app.loaders import BatchLoader, get_loader, parse_ids
+from app.expansion import parse_include, include_options, expand_deal
+from app.schemas.expanded import DealWithRelated, DealPage
+from app.audit import audit_writer, snapshot, field_changes, history_page
+from app.schemas.audit import AuditPage
+from app.ordering import REBALANCE_KEY_LENGTH, key_between, top_position, request_rebalance
+from app.facets import parse_facets, count_facets
+from app.archive import AllDeals, ArchivedDeal, add_counts, archived_counts, read_through
 
 router = APIRouter(prefix="/deals", tags=["Deals"])
 
 
-@router.get("", response_model=List[DealResponse])
+def record_stage_change(db: Session, deal: Deal, from_stage: Optional[str]):
+    """Append a stage transition row for the deal's current stage"""
+    db.add(DealStageTransition(
+        owner_id=deal.owner_id,
+        deal_id=deal.id,
+        from_stage=from_stage,
+        to_stage=deal.stage or "lead"
+    ))
+
+
+@router.get("", response_model=Union[List[DealWithRelated], DealPage], response_model_exclude_unset=True)
 async def get_deals(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     stage: Optional[str] = None,
     search: Optional[str] = None,
+    sort: str = Query("created_at", pattern="^(created_at|position)$", description="position: board order within each stage"),
+    ids: Optional[str] = Query(None, description="Comma-separated ids to fetch in one query; other filters are ignored"),
+    include: Optional[str] = Query(None, description="Comma-separated related entities to embed"),
+    facets: Optional[str] = Query(None, description="Comma-separated fields to count values of; returns a page object"),
+    with_total: bool = Query(False, description="Return a page object with the exact total for the filter"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    loader: BatchLoader = Depends(get_loader)
 ):
     """Get all deals for the current user"""
-    query = db.query(Deal).filter(Deal.owner_id == current_user.id)
+    includes = parse_include(Deal, include)
+    options = include_options(Deal, includes)
+    facet_fields = parse_facets(Deal, facets)
+    id_list = parse_ids(ids)
+    if id_list is not None:
+        found = loader.load_many(Deal, id_list, options)
+        missing = [i for i in id_list if i not in found]
+        if missing:
+            # Reads by id fall through to the archive, as GET /{id} does
+            found.update(loader.load_many(ArchivedDeal, missing, include_options(ArchivedDeal, includes)))
+        return [expand_deal(found[i], includes) for i in id_list if i in found]
     
-    if stage:
-        query = query.filter(Deal.stage == stage)
+    def filtered(entity):
+        query = db.query(entity).filter(entity.owner_id == current_user.id)
+        if stage:
+            query = query.filter(entity.stage == stage)
+        if search:
+            search_term = f"%{search}%"
+            query = query.filter(entity.title.ilike(search_term))
+        return query
     
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(Deal.title.ilike(search_term))
+    def fetch(entity, skip, limit):
+        order = (entity.stage, entity.position, entity.id) if sort == "position" else (entity.created_at.desc(),)
+        return filtered(entity).options(*include_options(entity, includes)).order_by(*order).offset(skip).limit(limit).all()
     
-    deals = query.order_by(Deal.created_at.desc()).offset(skip).limit(limit).all()
-    return deals
+    # Archived deals are off the board, so position order reads the hot table only
+    archived = archived_counts(db, current_user.id, "deals") if sort != "position" else {}
+    with_archive = bool(archived) and (not stage or stage in archived)
+    if with_archive:
+        deals = read_through(fetch, Deal, ArchivedDeal, AllDeals, skip, limit,
+                             sort_key=lambda deal: -deal.created_at.timestamp())
+    else:
+        deals = fetch(Deal, skip, limit)
+    items = [expand_deal(deal, includes) for deal in deals]
+    if not facet_fields and not with_total:
+        return items
+    total, counts = count_facets(
+        db, Deal, current_user.id, filtered(Deal), facet_fields, filtered=bool(stage or search)
+    )
+    if with_archive:
+        total, counts = add_counts(total, counts, *count_facets(
+            db, ArchivedDeal, current_user.id, filtered(ArchivedDeal), facet_fields,
+            filtered=bool(stage or search), entity="deals_archive"
+        ))
+    page = DealPage(items=items, total=total)
+    if facet_fields:
+        page.facets = counts
+    return page
 
 
-@router.get("/{deal_id}", response_model=DealResponse)
+@router.get("/{deal_id}", response_model=DealWithRelated, response_model_exclude_unset=True)
 async def get_deal(
     deal_id: str,
+    include: Optional[str] = Query(None, description="Comma-separated related entities to embed"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get a specific deal"""
-    deal = db.query(Deal).filter(
-        Deal.id == deal_id,
-        Deal.owner_id == current_user.id
-    ).first()
+    includes = parse_include(Deal, include)
+    deal = None
+    for entity in (Deal, ArchivedDeal):
+        deal = db.query(entity).options(*include_options(entity, includes)).filter(
+            entity.id == deal_id,
+            entity.owner_id == current_user.id
+        ).first()
+        if deal:
+            break
     
     if not deal:
         raise HTTPException(status_code=404, detail="Deal not found")
     
-    return deal
+    return expand_deal(deal, includes)
+
+
+@router.get("/{deal_id}/history", response_model=AuditPage)
+def get_deal_history(
+    deal_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Field-level change history of a deal, newest first"""
+    try:
+        page = history_page(db, current_user.id, "deal", deal_id, cursor, limit, (Deal, ArchivedDeal))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if page is None:
+        raise HTTPException(status_code=404, detail="Deal not found")
+    return page
 
 
 @router.post("", response_model=DealResponse)
@@ -63,7 +151,12 @@ async def create_deal(
         owner_id=current_user.id,
         **deal_data.model_dump()
     )
+    # New deals go to the top of their column
+    deal.position = top_position(db, current_user.id, deal.stage or "lead")
     db.add(deal)
+    db.flush()
+    record_stage_change(db, deal, None)
+    record_activity(db, current_user.id, "deal", deal.id, "created", deal.title)
     db.commit()
     db.refresh(deal)
     return deal
@@ -86,6 +179,7 @@ async def update_deal(
         raise HTTPException(status_code=404, detail="Deal not found")
     
     update_data = deal_data.model_dump(exclude_unset=True)
+    previous_stage = deal.stage
     
     # Handle stage changes
     if "stage" in update_data:
@@ -93,11 +187,84 @@ async def update_deal(
         if new_stage in ["closed_won", "closed_lost"] and deal.stage not in ["closed_won", "closed_lost"]:
             update_data["actual_close_date"] = datetime.utcnow()
     
+    before = snapshot(deal, update_data)
     for field, value in update_data.items():
         setattr(deal, field, value)
     
+    if deal.stage != previous_stage:
+        deal.position = top_position(db, current_user.id, deal.stage)
+        record_stage_change(db, deal, previous_stage)
+    
+    record_activity(db, current_user.id, "deal", deal.id, "updated", deal.title)
+    db.commit()
+    db.refresh(deal)
+    audit_writer.record(current_user.id, "deal", deal.id, current_user.id, field_changes(deal, before))
+    return deal
+
+
+@router.post("/{deal_id}/move", response_model=DealResponse)
+async def move_deal(
+    deal_id: str,
+    move: DealMove,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    directory: Session = Depends(get_directory_db)
+):
+    """Place a deal in a board column between two neighbours; only the deal's own row is rewritten"""
+    deal = db.query(Deal).filter(
+        Deal.id == deal_id,
+        Deal.owner_id == current_user.id
+    ).first()
+    
+    if not deal:
+        raise HTTPException(status_code=404, detail="Deal not found")
+    
+    stage = move.stage or deal.stage
+    neighbour_ids = [i for i in (move.after_id, move.before_id) if i is not None]
+    if deal_id in neighbour_ids:
+        raise HTTPException(status_code=400, detail="A deal cannot be placed next to itself")
+    neighbours = {
+        row.id: row for row in db.query(Deal.id, Deal.stage, Deal.position).filter(
+            Deal.owner_id == current_user.id, Deal.id.in_(neighbour_ids)
+        )
+    } if neighbour_ids else {}
+    for neighbour_id in neighbour_ids:
+        if neighbour_id not in neighbours or neighbours[neighbour_id].stage != stage:
+            raise HTTPException(status_code=400, detail=f"Deal {neighbour_id} is not in the {stage} column")
+    
+    # A missing neighbour is the next card past the given one (or the column end)
+    column = db.query(func.min(Deal.position) if move.after_id else func.max(Deal.position)).filter(
+        Deal.owner_id == current_user.id, Deal.stage == stage, Deal.id != deal.id
+    )
+    low = neighbours[move.after_id].position if move.after_id else None
+    high = neighbours[move.before_id].position if move.before_id else None
+    if move.after_id and not move.before_id:
+        high = column.filter(Deal.position > low).scalar() if low is not None else None
+    elif move.before_id and not move.after_id:
+        low = column.filter(Deal.position < high).scalar() if high is not None else None
+    elif not neighbour_ids:
+        low = column.scalar()
+    try:
+        position = key_between(low, high)
+    except ValueError:
+        # Neighbours share a key after concurrent moves; respacing the column fixes that
+        request_rebalance(directory, current_user.id)
+        raise HTTPException(status_code=409, detail="Column order is being rebuilt, retry the move")
+    
+    previous_stage = deal.stage
+    before = snapshot(deal, ["stage", "actual_close_date"])
+    if stage != previous_stage:
+        if stage in ["closed_won", "closed_lost"] and previous_stage not in ["closed_won", "closed_lost"]:
+            deal.actual_close_date = datetime.utcnow()
+        deal.stage = stage
+        record_stage_change(db, deal, previous_stage)
+        record_activity(db, current_user.id, "deal", deal.id, "updated", deal.title)
+    deal.position = position
     db.commit()
     db.refresh(deal)
+    audit_writer.record(current_user.id, "deal", deal.id, current_user.id, field_changes(deal, before))
+    if len(position) > REBALANCE_KEY_LENGTH:
+        request_rebalance(directory, current_user.id)
     return deal
 
 
@@ -116,6 +283,7 @@ async def delete_deal(
     if not deal:
         raise HTTPException(status_code=404, detail="Deal not found")
     
+    record_activity(db, current_user.id, "deal", deal.id, "deleted", deal.title)
     db.delete(deal)
     db.commit()
     return {"message": "Deal deleted successfully"}
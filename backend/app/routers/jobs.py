@@ -0,0 +1,61 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List
+from app.database import get_directory_db
+from app.models.job import Job
+from app.models.user import User
+from app.schemas.job import JobResponse
+from app.jobs import job_queue
+from app.auth import get_current_user
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+@router.get("", response_model=List[JobResponse])
+async def get_jobs(
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_directory_db)
+):
+    """Get recent background jobs for the current user"""
+    return db.query(Job).filter(
+        Job.owner_id == current_user.id
+    ).order_by(Job.created_at.desc()).limit(limit).all()
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_directory_db)
+):
+    """Get the status and progress of a job"""
+    job = db.query(Job).filter(
+        Job.id == job_id,
+        Job.owner_id == current_user.id
+    ).first()
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return job
+
+
+@router.post("/{job_id}/cancel", response_model=JobResponse)
+async def cancel_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_directory_db)
+):
+    """Cancel a queued job or ask a running one to stop"""
+    job = db.query(Job).filter(
+        Job.id == job_id,
+        Job.owner_id == current_user.id
+    ).first()
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    job_queue.cancel(db, job)
+    db.refresh(job)
+    return job
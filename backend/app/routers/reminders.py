@@ -0,0 +1,32 @@
+import asyncio
+import json
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from app.models.user import User
+from app.reminders import sse_broadcaster
+from app.auth import get_current_user
+
+router = APIRouter(prefix="/reminders", tags=["Reminders"])
+
+KEEPALIVE_SECONDS = 15
+
+
+@router.get("/stream")
+async def stream_reminders(current_user: User = Depends(get_current_user)):
+    """Server-sent events for the current user's tasks as they come due (requires the sse sink)"""
+    owner_id = current_user.id
+    
+    async def events():
+        queue = sse_broadcaster.subscribe(owner_id)
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: reminder\ndata: {json.dumps(event)}\n\n"
+        finally:
+            sse_broadcaster.unsubscribe(owner_id, queue)
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
@@ -1,17 +1,33 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import datetime
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import func, case
+from typing import List, Optional, Union
+from datetime import datetime, date, timedelta
 from app.database import get_db
 from app.models.task import Task
 from app.models.user import User
-from app.schemas.task import TaskCreate, TaskResponse, TaskUpdate
+from app.schemas.task import TaskCreate, TaskResponse, TaskUpdate, AgendaResponse, AgendaDay, AgendaCounts
 from app.auth import get_current_user
+from app.activity import record_activity
+from app.loaders import BatchLoader, get_loader, parse_ids
+from app.expansion import parse_include, include_options, expand_task
+from app.schemas.expanded import TaskWithRelated, TaskPage
+from app.audit import audit_writer, snapshot, field_changes, history_page
+from app.schemas.audit import AuditPage
+from app.facets import parse_facets, count_facets
+from app.archive import AllTasks, ArchivedTask, add_counts, archived_counts, read_through
+from app.reminders import reminder_scheduler
+from app.invalidation import invalidation_bus
 
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
 
 
-@router.get("", response_model=List[TaskResponse])
+def task_order(task: Task) -> tuple:
+    """Sort key matching the list order: by due date, undated last, then newest first"""
+    return (task.due_date is None, task.due_date or datetime.min, -task.created_at.timestamp())
+
+
+@router.get("", response_model=Union[List[TaskWithRelated], TaskPage], response_model_exclude_unset=True)
 async def get_tasks(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
@@ -19,48 +35,188 @@ async def get_tasks(
     priority: Optional[str] = None,
     task_type: Optional[str] = None,
     search: Optional[str] = None,
+    ids: Optional[str] = Query(None, description="Comma-separated ids to fetch in one query; other filters are ignored"),
+    include: Optional[str] = Query(None, description="Comma-separated related entities to embed"),
+    facets: Optional[str] = Query(None, description="Comma-separated fields to count values of; returns a page object"),
+    with_total: bool = Query(False, description="Return a page object with the exact total for the filter"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    loader: BatchLoader = Depends(get_loader)
 ):
     """Get all tasks for the current user"""
-    query = db.query(Task).filter(Task.owner_id == current_user.id)
+    includes = parse_include(Task, include)
+    options = include_options(Task, includes)
+    facet_fields = parse_facets(Task, facets)
+    id_list = parse_ids(ids)
+    if id_list is not None:
+        found = loader.load_many(Task, id_list, options)
+        missing = [i for i in id_list if i not in found]
+        if missing:
+            # Reads by id fall through to the archive, as GET /{id} does
+            found.update(loader.load_many(ArchivedTask, missing, include_options(ArchivedTask, includes)))
+        return [expand_task(found[i], includes) for i in id_list if i in found]
+    
+    def filtered(entity):
+        query = db.query(entity).filter(entity.owner_id == current_user.id)
+        if status:
+            query = query.filter(entity.status == status)
+        if priority:
+            query = query.filter(entity.priority == priority)
+        if task_type:
+            query = query.filter(entity.task_type == task_type)
+        if search:
+            search_term = f"%{search}%"
+            query = query.filter(
+                (entity.title.ilike(search_term)) |
+                (entity.description.ilike(search_term))
+            )
+        return query
+    
+    def fetch(entity, skip, limit):
+        return filtered(entity).options(*include_options(entity, includes)).order_by(
+            entity.due_date.asc().nullslast(), entity.created_at.desc()
+        ).offset(skip).limit(limit).all()
+    
+    archived = archived_counts(db, current_user.id, "tasks")
+    with_archive = bool(archived) and (not status or status in archived)
+    if with_archive:
+        tasks = read_through(fetch, Task, ArchivedTask, AllTasks, skip, limit, sort_key=task_order)
+    else:
+        tasks = fetch(Task, skip, limit)
+    items = [expand_task(task, includes) for task in tasks]
+    if not facet_fields and not with_total:
+        return items
+    is_filtered = bool(status or priority or task_type or search)
+    total, counts = count_facets(db, Task, current_user.id, filtered(Task), facet_fields, filtered=is_filtered)
+    if with_archive:
+        total, counts = add_counts(total, counts, *count_facets(
+            db, ArchivedTask, current_user.id, filtered(ArchivedTask), facet_fields,
+            filtered=is_filtered, entity="tasks_archive"
+        ))
+    page = TaskPage(items=items, total=total)
+    if facet_fields:
+        page.facets = counts
+    return page
+
+
+@router.get("/agenda", response_model=AgendaResponse)
+async def get_agenda(
+    start: Optional[date] = Query(None, alias="from"),
+    end: Optional[date] = Query(None, alias="to"),
+    include_completed: bool = False,
+    per_day: int = Query(50, ge=1, le=200, description="Tasks listed per day; `count` has the day's total"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get tasks due in a date window grouped by day, plus overdue/today/week/later counts"""
+    today = datetime.utcnow().date()
+    start = start or today
+    end = end or start + timedelta(days=6)
+    if end < start:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if (end - start).days > 366:
+        raise HTTPException(status_code=400, detail="Agenda window is limited to one year")
     
-    if status:
-        query = query.filter(Task.status == status)
+    # Grouping happens in SQL: one aggregate for the per-day totals and one
+    # windowed query for the first `per_day` tasks of each day, both range
+    # scans on (owner_id, is_completed, due_date)
+    completed_states = [False, True] if include_completed else [False]
+    window = (
+        datetime.combine(start, datetime.min.time()),
+        datetime.combine(end + timedelta(days=1), datetime.min.time())
+    )
+    # Archived tasks are all completed
+    entity = AllTasks if include_completed and archived_counts(db, current_user.id, "tasks") else Task
+    day = func.date(entity.due_date)
+    in_window = db.query(entity).filter(
+        entity.owner_id == current_user.id,
+        entity.is_completed.in_(completed_states),
+        entity.due_date >= window[0],
+        entity.due_date < window[1]
+    )
+    totals = in_window.with_entities(day, func.count()).group_by(day).order_by(day).all()
+    ranked = in_window.add_columns(
+        func.row_number().over(partition_by=day, order_by=(entity.due_date, entity.id)).label("rank")
+    ).subquery()
+    ranked_task = aliased(Task, ranked, adapt_on_names=True)
+    by_day = {}
+    for task in db.query(ranked_task).filter(ranked.c.rank <= per_day).order_by(ranked.c.due_date, ranked.c.id):
+        by_day.setdefault(task.due_date.date(), []).append(task)
     
-    if priority:
-        query = query.filter(Task.priority == priority)
+    days = []
+    for day_value, count in totals:
+        day_date = date.fromisoformat(day_value)
+        days.append(AgendaDay(date=day_date, count=count, tasks=by_day.get(day_date, [])))
     
-    if task_type:
-        query = query.filter(Task.task_type == task_type)
+    today_start = datetime.combine(today, datetime.min.time())
+    tomorrow_start = today_start + timedelta(days=1)
+    week_end = today_start + timedelta(days=7 - today.weekday())
+    counts = db.query(
+        func.sum(case((Task.due_date.is_(None), 1), else_=0)),
+        func.sum(case((Task.due_date < today_start, 1), else_=0)),
+        func.sum(case(((Task.due_date >= today_start) & (Task.due_date < tomorrow_start), 1), else_=0)),
+        func.sum(case(((Task.due_date >= tomorrow_start) & (Task.due_date < week_end), 1), else_=0)),
+        func.sum(case((Task.due_date >= week_end, 1), else_=0))
+    ).filter(
+        Task.owner_id == current_user.id,
+        Task.is_completed == False
+    ).one()
+    no_due_date, overdue, due_today, this_week, later = (count or 0 for count in counts)
     
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            (Task.title.ilike(search_term)) |
-            (Task.description.ilike(search_term))
+    return AgendaResponse(
+        start=start,
+        end=end,
+        days=days,
+        counts=AgendaCounts(
+            overdue=overdue,
+            today=due_today,
+            this_week=this_week,
+            later=later,
+            no_due_date=no_due_date
         )
-    
-    tasks = query.order_by(Task.due_date.asc().nullslast(), Task.created_at.desc()).offset(skip).limit(limit).all()
-    return tasks
+    )
 
 
-@router.get("/{task_id}", response_model=TaskResponse)
+@router.get("/{task_id}", response_model=TaskWithRelated, response_model_exclude_unset=True)
 async def get_task(
     task_id: str,
+    include: Optional[str] = Query(None, description="Comma-separated related entities to embed"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get a specific task"""
-    task = db.query(Task).filter(
-        Task.id == task_id,
-        Task.owner_id == current_user.id
-    ).first()
+    includes = parse_include(Task, include)
+    task = None
+    for entity in (Task, ArchivedTask):
+        task = db.query(entity).options(*include_options(entity, includes)).filter(
+            entity.id == task_id,
+            entity.owner_id == current_user.id
+        ).first()
+        if task:
+            break
     
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    return task
+    return expand_task(task, includes)
+
+
+@router.get("/{task_id}/history", response_model=AuditPage)
+def get_task_history(
+    task_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Field-level change history of a task, newest first"""
+    try:
+        page = history_page(db, current_user.id, "task", task_id, cursor, limit, (Task, ArchivedTask))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if page is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return page
 
 
 @router.post("", response_model=TaskResponse)
@@ -75,8 +231,12 @@ async def create_task(
         **task_data.model_dump()
     )
     db.add(task)
+    db.flush()
+    record_activity(db, current_user.id, "task", task.id, "created", task.title)
     db.commit()
     db.refresh(task)
+    reminder_scheduler.sync(task)
+    invalidation_bus.publish(current_user.id, "tasks")
     return task
 
 
@@ -97,21 +257,28 @@ async def update_task(
         raise HTTPException(status_code=404, detail="Task not found")
     
     update_data = task_data.model_dump(exclude_unset=True)
+    action = "updated"
     
     # Handle completion
     if "is_completed" in update_data:
         if update_data["is_completed"] and not task.is_completed:
             update_data["completed_at"] = datetime.utcnow()
             update_data["status"] = "completed"
+            action = "completed"
         elif not update_data["is_completed"] and task.is_completed:
             update_data["completed_at"] = None
             update_data["status"] = "pending"
     
+    before = snapshot(task, update_data)
     for field, value in update_data.items():
         setattr(task, field, value)
     
+    record_activity(db, current_user.id, "task", task.id, action, task.title)
     db.commit()
     db.refresh(task)
+    audit_writer.record(current_user.id, "task", task.id, current_user.id, field_changes(task, before))
+    reminder_scheduler.sync(task)
+    invalidation_bus.publish(current_user.id, "tasks")
     return task
 
 
@@ -130,8 +297,10 @@ async def delete_task(
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
+    record_activity(db, current_user.id, "task", task.id, "deleted", task.title)
     db.delete(task)
     db.commit()
+    reminder_scheduler.unschedule(task_id)
     return {"message": "Task deleted successfully"}
 
 
@@ -150,10 +319,15 @@ async def complete_task(
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
+    before = snapshot(task, ("is_completed", "completed_at", "status"))
     task.is_completed = True
     task.completed_at = datetime.utcnow()
     task.status = "completed"
     
+    record_activity(db, current_user.id, "task", task.id, "completed", task.title)
     db.commit()
     db.refresh(task)
+    audit_writer.record(current_user.id, "task", task.id, current_user.id, field_changes(task, before))
+    reminder_scheduler.sync(task)
+    invalidation_bus.publish(current_user.id, "tasks")
     return task
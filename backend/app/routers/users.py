@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_directory_db
 from app.models.user import User
 from app.schemas.user import UserResponse, UserUpdate
 from app.auth import get_current_user
@@ -20,7 +20,7 @@ async def get_current_user_profile(
 async def update_current_user(
     user_data: UserUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_directory_db)
 ):
     """Update current user profile"""
     update_data = user_data.model_dump(exclude_unset=True)
@@ -1,13 +1,21 @@
 from app.schemas.user import UserCreate, UserResponse, UserUpdate
 from app.schemas.contact import ContactCreate, ContactResponse, ContactUpdate
-from app.schemas.deal import DealCreate, DealResponse, DealUpdate
+from app.schemas.deal import DealCreate, DealResponse, DealUpdate, DealMove
 from app.schemas.task import TaskCreate, TaskResponse, TaskUpdate
 from app.schemas.analytics import AnalyticsResponse, DealsByStage, TasksByStatus, ContactsByStatus
+from app.schemas.activity import ActivityResponse, ActivityPage
+from app.schemas.job import JobResponse
+from app.schemas.bootstrap import BootstrapResponse, PipelineColumn
+from app.schemas.audit import AuditEntryResponse, AuditPage
 
 __all__ = [
     "UserCreate", "UserResponse", "UserUpdate",
     "ContactCreate", "ContactResponse", "ContactUpdate",
-    "DealCreate", "DealResponse", "DealUpdate",
+    "DealCreate", "DealResponse", "DealUpdate", "DealMove",
     "TaskCreate", "TaskResponse", "TaskUpdate",
-    "AnalyticsResponse", "DealsByStage", "TasksByStatus", "ContactsByStatus"
+    "AnalyticsResponse", "DealsByStage", "TasksByStatus", "ContactsByStatus",
+    "ActivityResponse", "ActivityPage",
+    "JobResponse",
+    "BootstrapResponse", "PipelineColumn",
+    "AuditEntryResponse", "AuditPage"
 ]
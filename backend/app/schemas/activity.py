@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+
+
+class ActivityResponse(BaseModel):
+    id: int
+    entity_type: str
+    entity_id: str
+    action: str
+    title: str
+    ts: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class ActivityPage(BaseModel):
+    items: List[ActivityResponse]
+    next_cursor: Optional[str] = None
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
 
 class DealsByStage(BaseModel):
@@ -20,7 +21,7 @@ class ContactsByStatus(BaseModel):
 
 class RecentActivity(BaseModel):
     type: str  # contact, deal, task
-    action: str  # created, updated, completed
+    action: str  # created, updated, completed, deleted
     title: str
     timestamp: str
 
@@ -59,3 +60,54 @@ class AnalyticsResponse(BaseModel):
     monthly_revenue: List[MonthlyRevenue]
     weekly_revenue: List[WeeklyRevenue]
     yearly_revenue: List[YearlyRevenue]
+
+
+class ForecastMonth(BaseModel):
+    year: int
+    month: int
+    expected_revenue: float
+    best_case: float
+    worst_case: float
+    deals_count: int
+
+
+class HistogramBin(BaseModel):
+    lower: float
+    upper: float
+    count: int
+
+
+class ForecastDistribution(BaseModel):
+    simulations: int
+    mean: float
+    p10: float
+    p50: float
+    p90: float
+    histogram: List[HistogramBin]
+
+
+class ForecastResponse(BaseModel):
+    open_deals: int
+    horizon_months: int
+    expected_revenue: float
+    best_case: float
+    worst_case: float
+    unscheduled_value: float
+    months: List[ForecastMonth]
+    distribution: ForecastDistribution
+
+
+class StageFunnel(BaseModel):
+    stage: str
+    entered: int
+    advanced: int
+    lost: int
+    still_in_stage: int
+    conversion_rate: float
+    median_days: Optional[float] = None
+
+
+class FunnelResponse(BaseModel):
+    start: datetime
+    end: datetime
+    stages: List[StageFunnel]
@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Json
+from datetime import datetime
+from typing import Any, List, Optional
+
+
+class AuditEntryResponse(BaseModel):
+    id: int
+    field: str
+    old_value: Optional[Json[Any]] = None
+    new_value: Optional[Json[Any]] = None
+    changed_by: str
+    changed_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class AuditPage(BaseModel):
+    items: List[AuditEntryResponse]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from app.schemas.user import UserResponse
+from app.schemas.analytics import AnalyticsResponse
+from app.schemas.deal import DealResponse
+from app.schemas.task import TaskResponse
+from app.schemas.activity import ActivityResponse
+
+
+class PipelineColumn(BaseModel):
+    stage: str
+    count: int
+    total_value: float
+    deals: List[DealResponse]  # board order, up to pipeline_limit
+
+
+class BootstrapResponse(BaseModel):
+    """First-paint data; only the requested sections are present"""
+    user: Optional[UserResponse] = None
+    summary: Optional[AnalyticsResponse] = None
+    pipeline: Optional[List[PipelineColumn]] = None
+    today: Optional[List[TaskResponse]] = None  # open tasks due today or overdue
+    activity: Optional[List[ActivityResponse]] = None
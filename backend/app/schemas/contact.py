@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 
 class ContactBase(BaseModel):
@@ -45,3 +45,35 @@ class ContactResponse(ContactBase):
     
     class Config:
         from_attributes = True
+
+
+class ContactSuggestion(BaseModel):
+    id: str
+    name: str
+    email: Optional[str] = None
+    company: Optional[str] = None
+
+
+class DuplicateCluster(BaseModel):
+    score: float
+    reasons: List[str]
+    contacts: List[ContactResponse]
+
+
+class DuplicatesResponse(BaseModel):
+    clusters: List[DuplicateCluster]
+    total_clusters: int
+    scanned: int
+    compared: int
+
+
+class MergeRequest(BaseModel):
+    primary_id: str
+    duplicate_ids: List[str] = Field(max_length=50)  # one merge is one write transaction
+
+
+class MergeResponse(BaseModel):
+    contact: ContactResponse
+    merged: int
+    deals_moved: int
+    tasks_moved: int
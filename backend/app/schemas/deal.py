@@ -30,6 +30,13 @@ class DealUpdate(BaseModel):
     contact_id: Optional[str] = None
 
 
+class DealMove(BaseModel):
+    """Target of a board move; with neither neighbour the deal goes to the bottom of the column"""
+    stage: Optional[str] = None  # defaults to the deal's current stage
+    after_id: Optional[str] = None  # the deal lands directly below this one
+    before_id: Optional[str] = None  # ... and directly above this one
+
+
 class DealResponse(BaseModel):
     id: str
     owner_id: str
@@ -38,6 +45,7 @@ class DealResponse(BaseModel):
     currency: Optional[str] = "USD"
     stage: Optional[str] = "lead"
     probability: Optional[int] = 10
+    position: Optional[str] = None
     expected_close_date: Optional[datetime] = None
     actual_close_date: Optional[datetime] = None
     notes: Optional[str] = None
@@ -0,0 +1,48 @@
+from pydantic import Field
+from typing import Dict, List, Optional
+from pydantic import BaseModel
+from app.schemas.contact import ContactResponse
+from app.schemas.deal import DealResponse
+from app.schemas.task import TaskResponse
+
+# Embedded relations use validation aliases that do not exist on the ORM
+# models, so validating a row never touches (and lazy-loads) a relationship.
+# They are filled in only when requested and left unset otherwise, and the
+# endpoints drop unset fields from the response.
+
+
+class ContactWithRelated(ContactResponse):
+    deals: Optional[List[DealResponse]] = Field(None, validation_alias="included_deals")
+    tasks: Optional[List[TaskResponse]] = Field(None, validation_alias="included_tasks")
+    deal_value_total: Optional[float] = None
+    open_deal_value: Optional[float] = None
+
+
+class DealWithRelated(DealResponse):
+    contact: Optional[ContactResponse] = Field(None, validation_alias="included_contact")
+
+
+class TaskWithRelated(TaskResponse):
+    contact: Optional[ContactResponse] = Field(None, validation_alias="included_contact")
+
+
+# Returned by the list endpoints instead of a bare array when ?facets= or
+# ?with_total= is given; total and facets describe the whole filtered list
+
+
+class ContactPage(BaseModel):
+    items: List[ContactWithRelated]
+    total: Optional[int] = None
+    facets: Optional[Dict[str, Dict[str, int]]] = None
+
+
+class DealPage(BaseModel):
+    items: List[DealWithRelated]
+    total: Optional[int] = None
+    facets: Optional[Dict[str, Dict[str, int]]] = None
+
+
+class TaskPage(BaseModel):
+    items: List[TaskWithRelated]
+    total: Optional[int] = None
+    facets: Optional[Dict[str, Dict[str, int]]] = None
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime, date
-from typing import Optional
+from typing import List, Optional
 
 
 class TaskBase(BaseModel):
@@ -45,3 +45,24 @@ class TaskResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class AgendaDay(BaseModel):
+    date: date
+    count: int  # tasks due that day; `tasks` holds at most per_day of them
+    tasks: List[TaskResponse]
+
+
+class AgendaCounts(BaseModel):
+    overdue: int
+    today: int
+    this_week: int
+    later: int
+    no_due_date: int
+
+
+class AgendaResponse(BaseModel):
+    start: date
+    end: date
+    days: List[AgendaDay]
+    counts: AgendaCounts
@@ -3,7 +3,10 @@ from sqlalchemy.orm import Session
 from app.models.contact import Contact
 from app.models.deal import Deal
 from app.models.task import Task
-import uuid
+from app.models.deal_stage_transition import DealStageTransition
+from app.models.types import new_id
+from app.activity import record_activity
+from app.ordering import spaced_keys
 
 
 def seed_example_data(db: Session, user_id: str):
@@ -117,11 +120,12 @@ def seed_example_data(db: Session, user_id: str):
     contacts = []
     for contact_data in contacts_data:
         contact = Contact(
-            id=str(uuid.uuid4()),
+            id=new_id(),
             owner_id=user_id,
             **contact_data
         )
         db.add(contact)
+        record_activity(db, user_id, "contact", contact.id, "created", contact.full_name)
         contacts.append(contact)
     
     db.flush()
@@ -196,15 +200,26 @@ def seed_example_data(db: Session, user_id: str):
         }
     ]
     
+    # Board positions, in list order within each stage
+    stages = [deal_data["stage"] for deal_data in deals_data]
+    positions = {stage: iter(spaced_keys(stages.count(stage))) for stage in stages}
+    
     for deal_data in deals_data:
         contact = deal_data.pop("contact")
         deal = Deal(
-            id=str(uuid.uuid4()),
+            id=new_id(),
             owner_id=user_id,
             contact_id=contact.id,
+            position=next(positions[deal_data["stage"]]),
             **deal_data
         )
         db.add(deal)
+        db.add(DealStageTransition(
+            owner_id=user_id,
+            deal_id=deal.id,
+            to_stage=deal.stage
+        ))
+        record_activity(db, user_id, "deal", deal.id, "created", deal.title)
     
     # Create example tasks
     tasks_data = [
@@ -287,11 +302,14 @@ def seed_example_data(db: Session, user_id: str):
     for task_data in tasks_data:
         contact = task_data.pop("contact")
         task = Task(
-            id=str(uuid.uuid4()),
+            id=new_id(),
             owner_id=user_id,
             contact_id=contact.id,
             **task_data
         )
         db.add(task)
+        record_activity(db, user_id, "task", task.id, "created", task.title)
+        if task.is_completed:
+            record_activity(db, user_id, "task", task.id, "completed", task.title, ts=task.completed_at)
     
     db.commit()
@@ -0,0 +1,131 @@
+"""Move owner data between the monolithic database and shard files.
+
+Usage:
+    python -m app.shards split [--source ./crm.db] [--delete-source]
+    python -m app.shards rebalance
+
+``split`` copies every owner's rows out of the monolithic file into the
+shard chosen by the current SHARD_COUNT. ``rebalance`` re-homes owners
+after SHARD_COUNT changes (for example from per-owner files to buckets).
+Users and other shared tables stay in DATABASE_URL either way. Run both
+with the app stopped; shard files left empty by a rebalance are listed so
+they can be removed afterwards.
+"""
+import argparse
+import glob
+import os
+import sqlite3
+import time
+from app.config import get_settings
+from app.database import tenant_tables, tenant_engines, shard_key, shard_path, sqlite_path
+import app.models  # noqa: F401  (register all tables on Base.metadata)
+
+
+def _owners(conn: sqlite3.Connection, schema: str = "main") -> set:
+    existing = {row[0] for row in conn.execute(f"SELECT name FROM {schema}.sqlite_master WHERE type = 'table'")}
+    owners = set()
+    for table in tenant_tables():
+        if table.name in existing:
+            owners.update(row[0] for row in conn.execute(f"SELECT DISTINCT owner_id FROM {schema}.{table.name}"))
+    return owners
+
+
+def _copy_owner(conn: sqlite3.Connection, owner_id: str, source: str, target: str) -> int:
+    """Copy one owner's rows between two attached schemas; returns rows copied"""
+    existing = {row[0] for row in conn.execute(f"SELECT name FROM {source}.sqlite_master WHERE type = 'table'")}
+    copied = 0
+    for table in tenant_tables():
+        # Derived tables are rebuilt by the target's triggers as rows arrive
+        if table.name not in existing or table.info.get("derived"):
+            continue
+        source_columns = {row[1] for row in conn.execute(f"PRAGMA {source}.table_info({table.name})")}
+        columns = ", ".join(c.name for c in table.columns if c.name in source_columns)
+        copied += conn.execute(
+            f"INSERT OR IGNORE INTO {target}.{table.name} ({columns}) "
+            f"SELECT {columns} FROM {source}.{table.name} WHERE owner_id = ?",
+            (owner_id,)
+        ).rowcount
+    return copied
+
+
+def _delete_owner(conn: sqlite3.Connection, owner_id: str, schema: str):
+    for table in reversed(tenant_tables()):
+        conn.execute(f"DELETE FROM {schema}.{table.name} WHERE owner_id = ?", (owner_id,))
+
+
+def _move(source_path: str, owner_ids, delete_source: bool) -> int:
+    """Copy owners from source_path into their shards, one transaction per owner"""
+    moved = 0
+    conn = sqlite3.connect(source_path, isolation_level=None)
+    try:
+        for owner_id in sorted(owner_ids):
+            key = shard_key(owner_id)
+            target = shard_path(key)
+            if os.path.abspath(target) == os.path.abspath(source_path):
+                continue
+            tenant_engines.get(key)  # creates the shard schema if needed
+            conn.execute("ATTACH DATABASE ? AS shard", (target,))
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                moved += _copy_owner(conn, owner_id, "main", "shard")
+                if delete_source:
+                    _delete_owner(conn, owner_id, "main")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            finally:
+                conn.execute("DETACH DATABASE shard")
+    finally:
+        conn.close()
+    return moved
+
+
+def split(source_path: str, delete_source: bool = False) -> dict:
+    conn = sqlite3.connect(source_path)
+    owners = _owners(conn)
+    conn.close()
+    rows = _move(source_path, owners, delete_source)
+    return {"owners": len(owners), "rows": rows}
+
+
+def rebalance() -> dict:
+    settings = get_settings()
+    owners_moved = 0
+    rows = 0
+    emptied = []
+    for path in sorted(glob.glob(os.path.join(settings.shard_dir, "*.db"))):
+        key = os.path.splitext(os.path.basename(path))[0]
+        conn = sqlite3.connect(path)
+        owners = _owners(conn)
+        conn.close()
+        misplaced = {owner_id for owner_id in owners if shard_key(owner_id) != key}
+        if misplaced:
+            rows += _move(path, misplaced, delete_source=True)
+            owners_moved += len(misplaced)
+            if misplaced == owners:
+                emptied.append(path)
+    return {"owners": owners_moved, "rows": rows, "emptied": emptied}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    split_parser = subparsers.add_parser("split", help="Copy owners from the monolithic file into shards")
+    split_parser.add_argument("--source", default=None, help="SQLite file (defaults to DATABASE_URL)")
+    split_parser.add_argument("--delete-source", action="store_true", help="Remove copied rows from the source")
+    subparsers.add_parser("rebalance", help="Move owners whose shard changed with SHARD_COUNT")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.command == "split":
+        report = split(args.source or sqlite_path(get_settings().database_url), args.delete_source)
+    else:
+        report = rebalance()
+    print(f"Moved {report['owners']} owners ({report['rows']} rows) in {time.perf_counter() - started:.2f}s")
+    for path in report.get("emptied", []):
+        print(f"Empty shard file: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""Slow-query log.
+
+With SLOW_QUERY_ENABLED, engine event hooks time every statement on every
+engine (the main database and shard files alike). A statement slower than
+SLOW_QUERY_THRESHOLD_MS is written as one JSON line to a rotating log at
+SLOW_QUERY_LOG_PATH with:
+
+- route: method and route template of the request that ran it, or
+  "background" for jobs and other threads;
+- owner: a hash of the authenticated owner id;
+- sql: the statement with whitespace, literals and IN lists collapsed, so
+  every variant of a query shares one entry;
+- params: the types of the bound parameters, e.g. "str, datetime, int×3";
+- plan: EXPLAIN QUERY PLAN output, run on the same connection with the same
+  parameters the first time the normalized statement is slow;
+- seconds.
+
+Each worker also keeps totals for the SLOW_QUERY_MAX_STATEMENTS most
+recently slow statements, served by GET /api/metrics/slow-queries.
+"""
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from typing import List
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.config import get_settings
+from app.metrics import register_metrics
+from app.request_context import current_owner, current_route
+
+logger = logging.getLogger(__name__)
+
+# Slow statements are written here as JSON lines
+query_logger = logging.getLogger("app.slow_queries")
+
+# Statements EXPLAIN QUERY PLAN accepts
+EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN \(\?(?:, \?)*\)", re.IGNORECASE)
+_VALUES_ROWS = re.compile(r"(\(\?(?:, \?)*\))(?:, \1)+")
+
+
+def normalize_sql(statement: str) -> str:
+    sql = _WHITESPACE.sub(" ", statement).strip()
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return _VALUES_ROWS.sub(r"\1, ...", sql)
+
+
+def _type_runs(values) -> str:
+    runs = []
+    for value in values:
+        name = type(value).__name__
+        if runs and runs[-1][0] == name:
+            runs[-1][1] += 1
+        else:
+            runs.append([name, 1])
+    return ", ".join(name if count == 1 else f"{name}×{count}" for name, count in runs)
+
+
+def parameter_shape(parameters, executemany: bool) -> str:
+    """Types of the bound values, never the values themselves"""
+    if executemany:
+        rows = list(parameters or ())
+        return f"{len(rows)} × ({parameter_shape(rows[0], False) if rows else ''})"
+    if isinstance(parameters, dict):
+        return ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items())
+    return _type_runs(parameters or ())
+
+
+def explain(cursor, statement: str, parameters, executemany: bool) -> List[str]:
+    """EXPLAIN QUERY PLAN lines, indented by depth as the sqlite3 shell prints them"""
+    if not statement.lstrip().upper().startswith(EXPLAINABLE):
+        return []
+    if executemany:
+        parameters = next(iter(parameters), ())
+    try:
+        rows = cursor.connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ()).fetchall()
+    except Exception as exc:
+        return [f"unavailable: {exc}"]
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return lines
+
+
+class SlowQueryLog:
+    """Times statements through engine events and keeps per-statement totals for the slow ones"""
+
+    def __init__(self, threshold_ms: float, max_statements: int):
+        self.threshold = threshold_ms / 1000
+        self.max_statements = max_statements
+        self._statements: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"slow": 0, "plans": 0, "log_failed": 0}
+        register_metrics("slow_queries", self.stats)
+
+    def stats(self) -> dict:
+        with self._lock:
+            statements = len(self._statements)
+        return {**self.counters, "statements": statements, "threshold_ms": self.threshold * 1000}
+
+    def install(self):
+        if not event.contains(Engine, "before_cursor_execute", self._before):
+            event.listen(Engine, "before_cursor_execute", self._before)
+            event.listen(Engine, "after_cursor_execute", self._after)
+
+    def uninstall(self):
+        if event.contains(Engine, "before_cursor_execute", self._before):
+            event.remove(Engine, "before_cursor_execute", self._before)
+            event.remove(Engine, "after_cursor_execute", self._after)
+
+    # The start time rides on the execution context, so a statement that
+    # raises leaves nothing behind
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context.slowlog_started = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "slowlog_started", None)
+        if started is None:
+            return
+        seconds = time.perf_counter() - started
+        if seconds >= self.threshold:
+            try:
+                self.record(cursor, statement, parameters, executemany, seconds)
+            except Exception:
+                logger.exception("Recording a slow query failed")
+
+    def record(self, cursor, statement: str, parameters, executemany: bool, seconds: float):
+        sql = normalize_sql(statement)
+        route = current_route() or "background"
+        with self._lock:
+            entry = self._statements.get(sql)
+            if entry is not None:
+                self._statements.move_to_end(sql)
+        if entry is None:
+            # Outside the lock: the plan query runs on this request's connection
+            entry = {
+                "sql": sql, "count": 0, "total_seconds": 0.0, "max_seconds": 0.0,
+                "params": parameter_shape(parameters, executemany),
+                "plan": explain(cursor, statement, parameters, executemany),
+                "routes": {},
+            }
+            self.counters["plans"] += 1
+            with self._lock:
+                entry = self._statements.setdefault(sql, entry)
+                while len(self._statements) > self.max_statements:
+                    self._statements.popitem(last=False)
+        with self._lock:
+            entry["count"] += 1
+            entry["total_seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+            entry["last_seen"] = datetime.utcnow().isoformat()
+            entry["routes"][route] = entry["routes"].get(route, 0) + 1
+        self.counters["slow"] += 1
+        try:
+            query_logger.warning(json.dumps({
+                "at": datetime.utcnow().isoformat(),
+                "seconds": round(seconds, 4),
+                "route": route,
+                "owner": current_owner(),
+                "sql": sql,
+                "params": entry["params"],
+                "plan": entry["plan"],
+            }))
+        except Exception:
+            self.counters["log_failed"] += 1
+
+    def top(self, limit: int, sort: str = "total") -> List[dict]:
+        """Statements with the most total (or max, or count of) slow time, heaviest first"""
+        key = {"total": "total_seconds", "max": "max_seconds", "count": "count"}[sort]
+        with self._lock:
+            entries = [{**entry, "routes": dict(entry["routes"])} for entry in self._statements.values()]
+        entries.sort(key=lambda entry: entry[key], reverse=True)
+        for entry in entries[:limit]:
+            entry["total_seconds"] = round(entry["total_seconds"], 4)
+            entry["max_seconds"] = round(entry["max_seconds"], 4)
+        return entries[:limit]
+
+
+slow_query_log = SlowQueryLog(
+    get_settings().slow_query_threshold_ms,
+    get_settings().slow_query_max_statements
+)
+
+
+def _configure_log_file(path: str, max_bytes: int, backups: int):
+    if not path or query_logger.handlers:
+        return
+    handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    query_logger.addHandler(handler)
+    query_logger.propagate = False
+
+
+def start_slow_query_log():
+    settings = get_settings()
+    if settings.slow_query_enabled:
+        _configure_log_file(settings.slow_query_log_path, settings.slow_query_log_bytes,
+                            settings.slow_query_log_backups)
+        slow_query_log.install()
+
+
+def stop_slow_query_log():
+    slow_query_log.uninstall()
@@ -0,0 +1,225 @@
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+from app.config import get_settings
+from app.invalidation import invalidation_bus
+from app.metrics import register_metrics
+from app.models.types import GUID
+
+# Terms are stored as "<term>\x00<slot>" so one sorted list of plain strings
+# holds the whole index; "\x00" sorts before any character a query can end with
+SEPARATOR = "\x00"
+
+SUGGEST_SQL = """
+    SELECT id, first_name, last_name, email, company
+    FROM contacts
+    WHERE owner_id = ?
+"""
+
+
+def contact_terms(first_name: Optional[str], last_name: Optional[str],
+                  email: Optional[str], company: Optional[str]) -> List[str]:
+    """Lower-cased prefixes a contact can be found by: full name, last name, email and company"""
+    full_name = f"{first_name or ''} {last_name or ''}".strip()
+    terms = {full_name, last_name or "", email or "", company or ""}
+    return sorted(term.lower() for term in terms if term)
+
+
+class OwnerIndex:
+    """Sorted term list for one owner's contacts, searched with bisect"""
+
+    def __init__(self):
+        self.entries: List[str] = []
+        self.contacts: Dict[int, tuple] = {}  # slot -> (id, first_name, last_name, email, company)
+        self.slots: Dict[str, int] = {}  # contact id -> slot
+        self._next_slot = 0
+
+    def build(self, rows):
+        entries = []
+        for contact_id, first_name, last_name, email, company in rows:
+            slot = self._assign(contact_id, first_name, last_name, email, company)
+            entries.extend(f"{term}{SEPARATOR}{slot}" for term in contact_terms(first_name, last_name, email, company))
+        entries.sort()
+        self.entries = entries
+
+    def _assign(self, contact_id, first_name, last_name, email, company) -> int:
+        slot = self._next_slot
+        self._next_slot += 1
+        self.slots[contact_id] = slot
+        self.contacts[slot] = (contact_id, first_name, last_name, email, company)
+        return slot
+
+    def add(self, contact_id, first_name, last_name, email, company):
+        self.remove(contact_id)
+        slot = self._assign(contact_id, first_name, last_name, email, company)
+        for term in contact_terms(first_name, last_name, email, company):
+            insort(self.entries, f"{term}{SEPARATOR}{slot}")
+
+    def remove(self, contact_id):
+        slot = self.slots.pop(contact_id, None)
+        if slot is None:
+            return
+        for term in contact_terms(*self.contacts.pop(slot)[1:]):
+            entry = f"{term}{SEPARATOR}{slot}"
+            position = bisect_left(self.entries, entry)
+            if position < len(self.entries) and self.entries[position] == entry:
+                del self.entries[position]
+
+    def search(self, query: str, limit: int) -> List[tuple]:
+        query = query.lower()
+        results = []
+        seen = set()
+        position = bisect_left(self.entries, query)
+        while position < len(self.entries) and len(results) < limit:
+            entry = self.entries[position]
+            if not entry.startswith(query):
+                break
+            slot = int(entry.rpartition(SEPARATOR)[2])
+            if slot not in seen:
+                seen.add(slot)
+                results.append(self.contacts[slot])
+            position += 1
+        return results
+
+
+class _Build:
+    """An owner's index being built outside the global lock; concurrent queries wait on `done`"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.index: Optional[OwnerIndex] = None
+        self.error: Optional[BaseException] = None
+        self.pending: List[tuple] = []  # writes made while the rows were being read
+        self.invalidated = False
+
+
+class SuggestIndex:
+    """Per-owner prefix indexes for contact typeahead.
+
+    An owner's index is built from the database on first use and kept
+    current by contact writes in this process; writes in other workers
+    drop it through the invalidation bus. Least recently used owners
+    are dropped once the total number of terms exceeds `max_terms`.
+
+    The lock only guards short in-memory steps. A build reads and sorts
+    without it, one build per owner at a time, and the result is installed
+    under the lock together with any writes made meanwhile.
+    """
+
+    def __init__(self, max_terms: int):
+        self.max_terms = max_terms
+        self._owners: "OrderedDict[str, OwnerIndex]" = OrderedDict()
+        self._building: Dict[str, _Build] = {}
+        self._lock = threading.Lock()
+        self._terms = 0
+        self.counters = {"builds": 0, "evictions": 0, "queries": 0}
+        register_metrics("suggest", self.stats)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.counters, "owners": len(self._owners), "terms": self._terms, "building": len(self._building)}
+
+    def search(self, owner_id: str, query: str, limit: int, load_rows: Callable[[], list]) -> List[tuple]:
+        with self._lock:
+            self.counters["queries"] += 1
+            index = self._owners.get(owner_id)
+            if index is not None:
+                self._owners.move_to_end(owner_id)
+                return index.search(query, limit)
+            build = self._building.get(owner_id)
+            leader = build is None
+            if leader:
+                build = self._building[owner_id] = _Build()
+        if leader:
+            self._build(owner_id, build, load_rows)
+        else:
+            build.done.wait()
+        if build.error is not None:
+            raise build.error
+        with self._lock:
+            return build.index.search(query, limit)
+
+    def _build(self, owner_id: str, build: _Build, load_rows: Callable[[], list]):
+        try:
+            index = OwnerIndex()
+            index.build(load_rows())
+        except BaseException as exc:
+            build.error = exc
+            with self._lock:
+                self._building.pop(owner_id, None)
+            build.done.set()
+            raise
+        with self._lock:
+            for op, args in build.pending:
+                getattr(index, op)(*args)
+            build.index = index
+            self._building.pop(owner_id, None)
+            self.counters["builds"] += 1
+            # An invalidation during the build may mean rows it read are out of date
+            if not build.invalidated:
+                self._owners[owner_id] = index
+                self._terms += len(index.entries)
+                self._evict()
+        build.done.set()
+
+    def upsert(self, owner_id: str, contact):
+        """Reflect a contact create or update; a no-op until the owner's index has been built"""
+        args = (contact.id, contact.first_name, contact.last_name, contact.email, contact.company)
+        with self._lock:
+            index = self._owners.get(owner_id)
+            if index is not None:
+                before = len(index.entries)
+                index.add(*args)
+                self._terms += len(index.entries) - before
+                self._evict()
+            elif owner_id in self._building:
+                self._building[owner_id].pending.append(("add", args))
+
+    def remove(self, owner_id: str, contact_ids: List[str]):
+        with self._lock:
+            index = self._owners.get(owner_id)
+            if index is not None:
+                before = len(index.entries)
+                for contact_id in contact_ids:
+                    index.remove(contact_id)
+                self._terms += len(index.entries) - before
+            elif owner_id in self._building:
+                self._building[owner_id].pending.extend(("remove", (contact_id,)) for contact_id in contact_ids)
+
+    def invalidate(self, owner_id: Optional[str]):
+        """Drop an owner's index (every index for None) after bulk writes or writes
+        in another worker; it is rebuilt on the next query"""
+        with self._lock:
+            if owner_id is None:
+                self._owners.clear()
+                self._terms = 0
+                for build in self._building.values():
+                    build.invalidated = True
+                return
+            index = self._owners.pop(owner_id, None)
+            if index is not None:
+                self._terms -= len(index.entries)
+            if owner_id in self._building:
+                self._building[owner_id].invalidated = True
+
+    def _evict(self):
+        # Keep at least the most recent owner even if it alone is over budget
+        while self._terms > self.max_terms and len(self._owners) > 1:
+            _, evicted = self._owners.popitem(last=False)
+            self._terms -= len(evicted.entries)
+            self.counters["evictions"] += 1
+
+
+def load_suggest_rows(db, owner_id: str) -> list:
+    to_str = GUID().process_result_value
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.execute(SUGGEST_SQL, (owner_id,))
+        return [(to_str(row[0], None),) + tuple(row[1:]) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+suggest_index = SuggestIndex(get_settings().suggest_max_terms)
+invalidation_bus.subscribe("contacts", suggest_index.invalidate)
@@ -0,0 +1,155 @@
+"""Event-loop watchdog.
+
+Many handlers are `async def` but query SQLite, hash passwords or sign
+tokens synchronously, and while one of them runs no other request on the
+worker makes progress. With LOOP_WATCHDOG_ENABLED, a heartbeat task sleeps
+LOOP_WATCHDOG_INTERVAL seconds at a time and records how late it wakes up
+(the loop lag) in a histogram. A watcher thread checks the heartbeat; once
+it is LOOP_WATCHDOG_THRESHOLD seconds overdue, the thread takes the stack
+of the event-loop thread (which is still inside the blocking code) and the
+route of the request whose task is running. When the loop comes back, the
+stall is counted against that route and logged with the stack.
+
+GET /api/metrics reports the lag histogram, stalls per route and the most
+recent stalls under "event_loop".
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Dict, Optional
+from app.config import get_settings
+from app.metrics import register_metrics
+from app.request_context import active_requests, route_label
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the lag histogram buckets; the last bucket is open-ended
+LAG_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Innermost frames kept from a blocked stack
+STACK_DEPTH = 20
+
+RECENT_STALLS = 20
+
+
+class LoopWatchdog:
+    def __init__(self, interval: float, threshold: float):
+        self.interval = interval
+        self.threshold = threshold
+        self.histogram = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self.max_lag = 0.0
+        self.stalls_by_route: Dict[str, int] = {}
+        self.recent = deque(maxlen=RECENT_STALLS)
+        self.counters = {"beats": 0, "stalls": 0, "captured": 0}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._beat = 0.0  # when the heartbeat last went to sleep
+        self._capture: Optional[dict] = None
+        register_metrics("event_loop", self.stats)
+
+    def stats(self) -> dict:
+        buckets = {f"le_{bound}ms": count for bound, count in zip(LAG_BUCKETS_MS, self.histogram)}
+        buckets[f"gt_{LAG_BUCKETS_MS[-1]}ms"] = self.histogram[-1]
+        return {
+            **self.counters,
+            "running": self._heartbeat is not None,
+            "threshold_ms": self.threshold * 1000,
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "lag_histogram": buckets,
+            "stalls_by_route": dict(self.stalls_by_route),
+            "recent_stalls": list(self.recent),
+        }
+
+    def start(self):
+        """Start on the event loop's thread (from a startup handler)"""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopping.clear()
+        self._heartbeat = self._loop.create_task(self._run_heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._heartbeat is None:
+            return
+        self._heartbeat.cancel()
+        self._heartbeat = None
+        self._stopping.set()
+        self._thread.join(1.0)
+        self._thread = None
+
+    def _observe(self, lag: float):
+        self.counters["beats"] += 1
+        self.max_lag = max(self.max_lag, lag)
+        lag_ms = lag * 1000
+        for i, bound in enumerate(LAG_BUCKETS_MS):
+            if lag_ms <= bound:
+                self.histogram[i] += 1
+                return
+        self.histogram[-1] += 1
+
+    async def _run_heartbeat(self):
+        while True:
+            beat = time.monotonic()
+            self._beat = beat
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - beat - self.interval)
+            self._observe(lag)
+            if lag >= self.threshold:
+                capture = self._capture if self._capture is not None and self._capture["beat"] == beat else None
+                self._stalled(lag, capture)
+
+    def _stalled(self, lag: float, capture: Optional[dict]):
+        route = capture["route"] if capture else "unknown"
+        self.counters["stalls"] += 1
+        self.stalls_by_route[route] = self.stalls_by_route.get(route, 0) + 1
+        stall = {"lag_ms": round(lag * 1000, 1), "route": route, "stack": capture["stack"] if capture else []}
+        self.recent.append(stall)
+        logger.warning("Event loop blocked for %.0f ms in %s\n%s", stall["lag_ms"], route, "".join(stall["stack"]))
+
+    def _watch(self):
+        # Polling at a quarter of the threshold catches a stall well before it ends
+        while not self._stopping.wait(self.threshold / 4):
+            beat = self._beat
+            overdue = time.monotonic() - beat - self.interval
+            if overdue < self.threshold or (self._capture is not None and self._capture["beat"] == beat):
+                continue
+            try:
+                self._capture = self._take_capture(beat)
+                self.counters["captured"] += 1
+            except Exception:
+                logger.exception("Capturing the blocked event loop failed")
+
+    def _take_capture(self, beat: float) -> dict:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = traceback.format_list(traceback.extract_stack(frame)[-STACK_DEPTH:]) if frame else []
+        task = asyncio.current_task(self._loop)
+        scope = active_requests.get(task) if task is not None else None
+        if scope is not None:
+            route = route_label(scope)
+        else:
+            route = f"task {task.get_name()}" if task is not None else "background"
+        return {"beat": beat, "route": route, "stack": stack}
+
+
+loop_watchdog = LoopWatchdog(
+    get_settings().loop_watchdog_interval,
+    get_settings().loop_watchdog_threshold
+)
+
+
+def start_loop_watchdog():
+    if get_settings().loop_watchdog_enabled:
+        loop_watchdog.start()
+
+
+def stop_loop_watchdog():
+    loop_watchdog.stop()
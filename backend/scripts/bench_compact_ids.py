@@ -0,0 +1,95 @@
+"""Benchmark TEXT vs 16-byte BLOB UUID keys on SQLite.
+
+Builds a tasks-shaped table (UUID primary key, UUID foreign key with an
+index, owner id and title) for each key layout and reports file size,
+insert throughput and random primary-key lookup latency.
+
+Usage (from backend/):
+    python -m scripts.bench_compact_ids --rows 10000000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import uuid
+from app.models.types import uuid7
+
+LAYOUTS = [
+    # name, column type, id generator, encoder
+    ("text/uuid4", "VARCHAR", uuid.uuid4, str),
+    ("text/uuid7", "VARCHAR", uuid7, str),
+    ("blob/uuid4", "BLOB", uuid.uuid4, lambda u: u.bytes),
+    ("blob/uuid7", "BLOB", uuid7, lambda u: u.bytes),
+]
+
+
+def run_layout(directory, name, column_type, generate, encode, rows, batch, lookups):
+    path = os.path.join(directory, name.replace("/", "_") + ".db")
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(
+        f"CREATE TABLE tasks (id {column_type} PRIMARY KEY, owner_id VARCHAR NOT NULL, "
+        f"contact_id {column_type}, title VARCHAR NOT NULL)"
+    )
+    conn.execute("CREATE INDEX ix_tasks_contact_id ON tasks (contact_id)")
+
+    contact_ids = [encode(generate()) for _ in range(min(rows, 100_000))]
+    sample = []
+    sample_every = max(rows // lookups, 1)
+
+    insert_seconds = 0.0
+    for start in range(0, rows, batch):
+        chunk = []
+        for i in range(start, min(start + batch, rows)):
+            key = encode(generate())
+            if i % sample_every == 0:
+                sample.append(key)
+            chunk.append((key, "104582937461029384756", contact_ids[i % len(contact_ids)], f"Task {i}"))
+        began = time.perf_counter()
+        conn.execute("BEGIN")
+        conn.executemany("INSERT INTO tasks VALUES (?, ?, ?, ?)", chunk)
+        conn.execute("COMMIT")
+        insert_seconds += time.perf_counter() - began
+
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    size = os.path.getsize(path)
+
+    random.shuffle(sample)
+    began = time.perf_counter()
+    for key in sample:
+        conn.execute("SELECT title FROM tasks WHERE id = ?", (key,)).fetchone()
+    lookup_seconds = time.perf_counter() - began
+    conn.close()
+    os.remove(path)
+
+    return {
+        "layout": name,
+        "size_mb": size / 1_048_576,
+        "inserts_per_s": rows / insert_seconds if insert_seconds else 0.0,
+        "lookup_us": lookup_seconds / len(sample) * 1_000_000 if sample else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--batch", type=int, default=50_000)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    parser.add_argument("--dir", default=None, help="Scratch directory (defaults to a temp dir)")
+    args = parser.parse_args()
+
+    directory = args.dir or tempfile.mkdtemp(prefix="crm-bench-")
+    print(f"{'layout':<12} {'size (MB)':>10} {'inserts/s':>12} {'lookup (us)':>12}")
+    for name, column_type, generate, encode in LAYOUTS:
+        result = run_layout(directory, name, column_type, generate, encode, args.rows, args.batch, args.lookups)
+        print(
+            f"{result['layout']:<12} {result['size_mb']:>10.1f} "
+            f"{result['inserts_per_s']:>12,.0f} {result['lookup_us']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Fail when importing the app gets slow or starts doing startup work.
+
+Imports app.main in fresh interpreters against a database path that does
+not exist, then checks that:
+
+- the best wall time over --runs imports stays under --budget seconds,
+- heavy optional dependencies (httpx, jose, numpy) are still deferred,
+- the import did not open or create the database.
+
+Runs as part of the test suite (tests/test_import_time.py), or on its own
+from backend/:
+    python -m scripts.check_import_time --budget 1.5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+DEFERRED_MODULES = ["httpx", "jose", "numpy"]
+
+DEFAULT_BUDGET = 1.5  # seconds
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "seconds": elapsed,
+    "loaded": [name for name in %r if name in sys.modules],
+}))
+""" % (DEFERRED_MODULES,)
+
+
+def probe(database_path: str) -> dict:
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{database_path}")
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], env=env, cwd=BACKEND_DIR, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def check(budget: float = DEFAULT_BUDGET, runs: int = 3) -> tuple:
+    """(best import seconds, list of failure messages)"""
+    database_path = os.path.join(tempfile.mkdtemp(prefix="crm-import-"), "crm.db")
+    results = [probe(database_path) for _ in range(runs)]
+    best = min(result["seconds"] for result in results)
+
+    failures = []
+    if best > budget:
+        failures.append(f"import app.main took {best:.3f}s (budget {budget:.3f}s)")
+    loaded = sorted({name for result in results for name in result["loaded"]})
+    if loaded:
+        failures.append(f"imported eagerly: {', '.join(loaded)}")
+    if os.path.exists(database_path):
+        failures.append("importing the app touched the database")
+    return best, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="Maximum seconds for `import app.main`")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    best, failures = check(args.budget, args.runs)
+    print(f"import app.main: best {best:.3f}s over {args.runs} runs (budget {args.budget:.3f}s)")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
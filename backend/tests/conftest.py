@@ -0,0 +1,38 @@
+import os
+import sys
+import tempfile
+
+# Settings are read once at import, so point the app at a scratch database first
+_scratch = tempfile.mkdtemp(prefix="crm-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_scratch}/crm.db")
+os.environ.setdefault("SHARD_DIR", f"{_scratch}/shards")
+os.environ.setdefault("SLOW_QUERY_LOG_PATH", "")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def database():
+    from app.database import engine
+    from app.migrations import migrate
+    migrate(engine)
+    return engine
+
+
+@pytest.fixture()
+def session(database):
+    from app.database import SessionLocal
+    db = SessionLocal()
+    yield db
+    db.close()
+
+
+@pytest.fixture()
+def user(session):
+    import uuid
+    from app.models.user import User
+    user = User(id=uuid.uuid4().hex, email=f"{uuid.uuid4().hex[:8]}@example.com", name="Test")
+    session.add(user)
+    session.commit()
+    return user
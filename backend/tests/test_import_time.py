@@ -0,0 +1,6 @@
+from scripts.check_import_time import check
+
+
+def test_import_stays_fast_and_side_effect_free():
+    best, failures = check()
+    assert not failures, "; ".join(failures)
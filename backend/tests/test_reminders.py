@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+from app.leases import LeaderLease
+from app.models.task import Task
+from app.reminders import ReminderScheduler
+
+
+def _scheduler():
+    scheduler = ReminderScheduler([], LeaderLease("reminders-test", 60.0))
+    scheduler._running = True  # schedule without the delivery thread
+    scheduler._refreshed = {None: datetime.utcnow()}
+    return scheduler
+
+
+def test_refresh_keeps_heap_size_constant(session, user):
+    due = datetime.utcnow() + timedelta(days=1)
+    session.add_all([Task(owner_id=user.id, title=f"Task {i}", due_date=due + timedelta(minutes=i)) for i in range(20)])
+    session.commit()
+    scheduler = _scheduler()
+    scheduler.refresh(user.id)
+    assert len(scheduler._entries) == 20
+    size = len(scheduler._heap)
+
+    for _ in range(5):
+        scheduler.refresh(user.id)
+        scheduler.refresh(None)
+    assert len(scheduler._heap) == size
+
+
+def test_refresh_picks_up_other_workers_writes(session, user):
+    due = datetime.utcnow() + timedelta(days=1)
+    open_task = Task(owner_id=user.id, title="Call back", due_date=due)
+    done_task = Task(owner_id=user.id, title="Send quote", due_date=due)
+    session.add_all([open_task, done_task])
+    session.commit()
+    scheduler = _scheduler()
+    scheduler.refresh(user.id)
+    assert {open_task.id, done_task.id} <= set(scheduler._entries)
+
+    open_task.due_date = due + timedelta(hours=1)
+    done_task.is_completed = True
+    session.commit()
+    scheduler.refresh(user.id)
+    assert scheduler._entries[open_task.id][3] == open_task.due_date
+    assert done_task.id not in scheduler._entries
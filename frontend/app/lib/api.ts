@@ -3,12 +3,19 @@ import type {
   User, 
   Contact, 
   ContactCreate, 
+  ContactSuggestion,
   Deal, 
   DealCreate, 
+  DealMove,
   Task, 
   TaskCreate, 
   Analytics,
-  AuthCheck 
+  AuthCheck,
+  Job,
+  Page,
+  Bootstrap,
+  BootstrapSection,
+  HistoryPage
 } from './types';
 
 const api = axios.create({
@@ -19,6 +26,18 @@ const api = axios.create({
   },
 });
 
+// Back off and retry once when the server sheds load (429/503 with Retry-After)
+api.interceptors.response.use(undefined, async (error) => {
+  const { config, response } = error;
+  if (!config || config._retried || !response || ![429, 503].includes(response.status)) {
+    return Promise.reject(error);
+  }
+  const retryAfter = Number(response.headers['retry-after']) || 1;
+  config._retried = true;
+  await new Promise((resolve) => setTimeout(resolve, Math.min(retryAfter, 10) * 1000));
+  return api(config);
+});
+
 // Auth
 export const authApi = {
   check: () => api.get<AuthCheck>('/auth/check'),
@@ -28,35 +47,59 @@ export const authApi = {
 
 // Contacts
 export const contactsApi = {
-  getAll: (params?: { status?: string; search?: string }) => 
+  getAll: (params?: { status?: string; search?: string; include?: string }) => 
     api.get<Contact[]>('/contacts', { params }),
-  getById: (id: string) => api.get<Contact>(`/contacts/${id}`),
+  getPage: (params?: { status?: string; search?: string; include?: string; facets?: string; skip?: number; limit?: number }) =>
+    api.get<Page<Contact>>('/contacts', { params: { with_total: true, ...params } }),
+  getById: (id: string, include?: string) => api.get<Contact>(`/contacts/${id}`, { params: { include } }),
+  getByIds: (ids: string[]) => api.get<Contact[]>('/contacts', { params: { ids: ids.join(',') } }),
+  suggest: (q: string, limit?: number) =>
+    api.get<ContactSuggestion[]>('/contacts/suggest', { params: { q, limit } }),
+  // Fetch contacts referenced by `ids` that are not already in `known`, in one request
+  withReferenced: async (known: Contact[], ids: (string | null | undefined)[]): Promise<Contact[]> => {
+    const have = new Set(known.map((c) => c.id));
+    const missing = [...new Set(ids.filter((id): id is string => !!id && !have.has(id)))];
+    if (missing.length === 0) return known;
+    const { data } = await api.get<Contact[]>('/contacts', { params: { ids: missing.join(',') } });
+    return [...known, ...data];
+  },
   create: (data: ContactCreate) => api.post<Contact>('/contacts', data),
   update: (id: string, data: Partial<ContactCreate>) => 
     api.put<Contact>(`/contacts/${id}`, data),
   delete: (id: string) => api.delete(`/contacts/${id}`),
+  history: (id: string, cursor?: string) =>
+    api.get<HistoryPage>(`/contacts/${id}/history`, { params: { cursor } }),
 };
 
 // Deals
 export const dealsApi = {
-  getAll: (params?: { stage?: string; search?: string }) => 
+  getAll: (params?: { stage?: string; search?: string; include?: string; sort?: 'created_at' | 'position' }) => 
     api.get<Deal[]>('/deals', { params }),
-  getById: (id: string) => api.get<Deal>(`/deals/${id}`),
+  getById: (id: string, include?: string) => api.get<Deal>(`/deals/${id}`, { params: { include } }),
+  getByIds: (ids: string[]) => api.get<Deal[]>('/deals', { params: { ids: ids.join(',') } }),
   create: (data: DealCreate) => api.post<Deal>('/deals', data),
   update: (id: string, data: Partial<DealCreate>) => 
     api.put<Deal>(`/deals/${id}`, data),
+  move: (id: string, data: DealMove) => api.post<Deal>(`/deals/${id}/move`, data),
   delete: (id: string) => api.delete(`/deals/${id}`),
+  history: (id: string, cursor?: string) =>
+    api.get<HistoryPage>(`/deals/${id}/history`, { params: { cursor } }),
 };
 
 // Tasks
 export const tasksApi = {
-  getAll: (params?: { status?: string; priority?: string; search?: string }) => 
+  getAll: (params?: { status?: string; priority?: string; search?: string; include?: string }) => 
     api.get<Task[]>('/tasks', { params }),
-  getById: (id: string) => api.get<Task>(`/tasks/${id}`),
+  getPage: (params?: { status?: string; priority?: string; task_type?: string; search?: string; include?: string; facets?: string; skip?: number; limit?: number }) =>
+    api.get<Page<Task>>('/tasks', { params: { with_total: true, ...params } }),
+  getById: (id: string, include?: string) => api.get<Task>(`/tasks/${id}`, { params: { include } }),
+  getByIds: (ids: string[]) => api.get<Task[]>('/tasks', { params: { ids: ids.join(',') } }),
   create: (data: TaskCreate) => api.post<Task>('/tasks', data),
   update: (id: string, data: Partial<TaskCreate & { is_completed?: boolean }>) => 
     api.put<Task>(`/tasks/${id}`, data),
   delete: (id: string) => api.delete(`/tasks/${id}`),
+  history: (id: string, cursor?: string) =>
+    api.get<HistoryPage>(`/tasks/${id}/history`, { params: { cursor } }),
   complete: (id: string) => api.post<Task>(`/tasks/${id}/complete`),
 };
 
@@ -65,9 +108,29 @@ export const analyticsApi = {
   get: () => api.get<Analytics>('/analytics'),
 };
 
+// First-paint data in one request; all sections when none are given
+export const bootstrapApi = {
+  get: (sections?: BootstrapSection[]) =>
+    api.get<Bootstrap>('/bootstrap', { params: { sections: sections?.join(',') } }),
+};
+
+// Background jobs
+export const jobsApi = {
+  get: (id: string) => api.get<Job>(`/jobs/${id}`),
+  cancel: (id: string) => api.post<Job>(`/jobs/${id}/cancel`),
+  // Poll until the job leaves the queued/running states
+  wait: async (id: string, intervalMs = 500): Promise<Job> => {
+    for (;;) {
+      const { data } = await api.get<Job>(`/jobs/${id}`);
+      if (data.status !== 'queued' && data.status !== 'running') return data;
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+  },
+};
+
 // Seed data
 export const seedApi = {
-  seed: () => api.post('/seed'),
+  seed: () => api.post<{ message: string; job_id: string }>('/seed'),
 };
 
 export default api;
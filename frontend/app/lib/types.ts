@@ -25,6 +25,18 @@ export interface Contact {
   notes: string | null;
   created_at: string;
   updated_at: string;
+  // Present only when requested with ?include=deals / tasks / open_tasks
+  deals?: Deal[];
+  tasks?: Task[];
+  deal_value_total?: number;
+  open_deal_value?: number;
+}
+
+export interface ContactSuggestion {
+  id: string;
+  name: string;
+  email?: string;
+  company?: string;
 }
 
 export type ContactStatus = 'lead' | 'prospect' | 'customer' | 'churned';
@@ -56,8 +68,16 @@ export interface Deal {
   expected_close_date: string | null;
   actual_close_date: string | null;
   notes: string | null;
+  position: string | null;  // board order within the stage
   created_at: string;
   updated_at: string;
+  contact?: Contact | null;  // ?include=contact
+}
+
+export interface DealMove {
+  stage?: DealStage;
+  after_id?: string;
+  before_id?: string;
 }
 
 export type DealStage = 'lead' | 'qualified' | 'proposal' | 'negotiation' | 'closed_won' | 'closed_lost';
@@ -87,6 +107,7 @@ export interface Task {
   completed_at: string | null;
   created_at: string;
   updated_at: string;
+  contact?: Contact | null;  // ?include=contact
 }
 
 export type TaskType = 'task' | 'call' | 'meeting' | 'email' | 'follow_up';
@@ -162,6 +183,69 @@ export interface Analytics {
   yearly_revenue: YearlyRevenue[];
 }
 
+export interface ActivityItem {
+  id: number;
+  entity_type: string;
+  entity_id: string;
+  action: string;
+  title: string;
+  ts: string;
+}
+
+export interface HistoryEntry {
+  id: number;
+  field: string;
+  old_value: unknown;
+  new_value: unknown;
+  changed_by: string;
+  changed_at: string;
+}
+
+export interface HistoryPage {
+  items: HistoryEntry[];
+  next_cursor: string | null;
+}
+
+export interface PipelineColumn {
+  stage: DealStage;
+  count: number;
+  total_value: number;
+  deals: Deal[];
+}
+
+export type BootstrapSection = 'user' | 'summary' | 'pipeline' | 'today' | 'activity';
+
+// Only the requested sections are present
+export interface Bootstrap {
+  user?: User;
+  summary?: Analytics;
+  pipeline?: PipelineColumn[];
+  today?: Task[];
+  activity?: ActivityItem[];
+}
+
+// List endpoints return this instead of an array when facets or with_total is requested
+export interface Page<T> {
+  items: T[];
+  total?: number;
+  facets?: Record<string, Record<string, number>>;
+}
+
+export interface Job {
+  id: string;
+  kind: string;
+  status: 'queued' | 'running' | 'succeeded' | 'failed' | 'cancelled';
+  priority: number;
+  progress: number;
+  message: string | null;
+  result: unknown;
+  error: string | null;
+  cancel_requested: boolean;
+  created_at: string;
+  started_at: string | null;
+  finished_at: string | null;
+}
+
 export interface AuthCheck {
   authenticated: boolean;
   user: User | null;
@@ -13,7 +13,7 @@ import {
   Search
 } from 'lucide-react';
 import { Card, Button, Badge, Avatar } from '~/components/ui';
-import { analyticsApi, seedApi } from '~/lib/api';
+import { bootstrapApi, jobsApi, seedApi } from '~/lib/api';
 import { formatCurrency, formatRelativeTime, cn } from '~/lib/utils';
 import type { Analytics } from '~/lib/types';
 
@@ -115,8 +115,8 @@ export default function Dashboard() {
 
   const loadAnalytics = async () => {
     try {
-      const response = await analyticsApi.get();
-      setAnalytics(response.data);
+      const response = await bootstrapApi.get(['summary']);
+      setAnalytics(response.data.summary ?? null);
     } catch (error) {
       console.error('Failed to load analytics:', error);
     } finally {
@@ -127,7 +127,8 @@ export default function Dashboard() {
   const handleSeedData = async () => {
     setIsSeeding(true);
     try {
-      await seedApi.seed();
+      const { data } = await seedApi.seed();
+      await jobsApi.wait(data.job_id);
       await loadAnalytics();
     } catch (error) {
       console.error('Failed to seed data:', error);
@@ -72,11 +72,11 @@ export default function Deals() {
   const loadData = async () => {
     try {
       const [dealsRes, contactsRes] = await Promise.all([
-        dealsApi.getAll({ stage: stageFilter || undefined, search: searchQuery || undefined }),
+        dealsApi.getAll({ stage: stageFilter || undefined, search: searchQuery || undefined, sort: 'position' }),
         contactsApi.getAll(),
       ]);
       setDeals(dealsRes.data);
-      setContacts(contactsRes.data);
+      setContacts(await contactsApi.withReferenced(contactsRes.data, dealsRes.data.map((d) => d.contact_id)));
     } catch (error) {
       console.error('Failed to load data:', error);
     } finally {
@@ -114,15 +114,6 @@ export default function Deals() {
     }
   };
 
-  const handleStageChange = async (dealId: string, newStage: DealStage) => {
-    try {
-      await dealsApi.update(dealId, { stage: newStage });
-      await loadData();
-    } catch (error) {
-      console.error('Failed to update stage:', error);
-    }
-  };
-
   const openModal = (deal?: Deal, mode: 'view' | 'edit' = 'view') => {
     setModalMode(mode);
     if (deal) {
@@ -168,10 +159,22 @@ export default function Deals() {
     setDragOverStage(stage);
   };
   const handleDragLeave = () => setDragOverStage(null);
-  const handleDrop = async (e: DragEvent<HTMLDivElement>, targetStage: DealStage) => {
+  // Dropping on a card places the dragged deal just above it; dropping on
+  // the column's empty space places it at the bottom
+  const handleDrop = async (e: DragEvent<HTMLDivElement>, targetStage: DealStage, beforeDeal?: Deal) => {
     e.preventDefault();
-    if (draggedDeal && draggedDeal.stage !== targetStage) {
-      await handleStageChange(draggedDeal.id, targetStage);
+    e.stopPropagation();
+    if (draggedDeal && draggedDeal.id !== beforeDeal?.id) {
+      const column = getDealsByStage(targetStage).filter(d => d.id !== draggedDeal.id);
+      const beforeIndex = beforeDeal ? column.findIndex(d => d.id === beforeDeal.id) : column.length;
+      const after = beforeIndex > 0 ? column[beforeIndex - 1] : undefined;
+      try {
+        await dealsApi.move(draggedDeal.id, { stage: targetStage, after_id: after?.id, before_id: beforeDeal?.id });
+        await loadData();
+      } catch (error) {
+        console.error('Failed to move deal:', error);
+        await loadData();
+      }
     }
     setDraggedDeal(null);
     setDragOverStage(null);
@@ -285,6 +288,7 @@ export default function Deals() {
                         draggable
                         onDragStart={(e) => handleDragStart(e, deal)}
                         onDragEnd={handleDragEnd}
+                        onDrop={(e) => handleDrop(e, stage, deal)}
                         onClick={() => openModal(deal, 'view')}
                         className={cn(
                           'bg-white rounded-lg border border-gray-200 p-2.5 hover:shadow-sm transition-all cursor-grab active:cursor-grabbing group',
@@ -81,7 +81,7 @@ export default function Tasks() {
         contactsApi.getAll(),
       ]);
       setTasks(tasksRes.data);
-      setContacts(contactsRes.data);
+      setContacts(await contactsApi.withReferenced(contactsRes.data, tasksRes.data.map((t) => t.contact_id)));
     } catch (error) {
       console.error('Failed to load data:', error);
     } finally {